@@ -2,6 +2,7 @@ from process_pose_data.local_io import *
 from process_pose_data.overlay import *
 from process_pose_data.viz_3d import *
 from process_pose_data.geom_render import *
+from process_pose_data.reconstruct import *
 from process_pose_data.process import *
 
 __version__ = '6.3.0'
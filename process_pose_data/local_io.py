@@ -9,17 +9,84 @@ from uuid import uuid4
 import datetime
 import dateutil
 from collections import OrderedDict
+from collections import deque
+import concurrent.futures
+import functools
 import os
 import glob
 import pickle
+import shutil
+import struct
+import io
+import tempfile
 import re
 import json
+import operator
 import math
 import uuid
 import time
+import threading
+import gzip
+import bz2
+import lzma
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
 
 logger = logging.getLogger(__name__)
 
+PACK_FILE_MAGIC = b'PPDPACK1'
+
+# Leading bytes that identify compressed segment files
+CODEC_MAGIC_BYTES = OrderedDict([
+    ('gzip', b'\x1f\x8b'),
+    ('bz2', b'BZh'),
+    ('lzma', b'\xfd7zXZ\x00'),
+    ('zstd', b'\x28\xb5\x2f\xfd'),
+    ('lz4', b'\x04\x22\x4d\x18')
+])
+
+# Pack file indexes (along with an open handle to each pack) and segment
+# manifests, keyed by file path and validated against the file's modification
+# time and size
+pack_index_cache = OrderedDict()
+pack_index_cache_lock = threading.Lock()
+# Names of the pack files in each day directory, validated against the
+# directory's modification time, so that data that has never been packed
+# doesn't cost a lookup for each pack it could be in
+pack_file_names_cache = dict()
+manifest_cache = dict()
+id_index_cache = dict()
+
+# Optional LRU cache of data read from segment files (or pack entries), keyed
+# by file path (or pack path and offset) and projected columns, validated
+# against the file's modification time and size, and budgeted by in-memory
+# size. Disabled unless enable_segment_cache() is called
+segment_cache = OrderedDict()
+segment_cache_lock = threading.Lock()
+segment_cache_settings = {
+    'enabled': False,
+    'max_bytes': process_pose_data.shared_constants.DEFAULT_SEGMENT_CACHE_MAX_BYTES
+}
+segment_cache_stats = {
+    'hits': 0,
+    'misses': 0,
+    'evictions': 0,
+    'num_bytes': 0
+}
+
 class CustomJSONEncoder(json.JSONEncoder):
         def default(self, obj):
                 if isinstance(obj, datetime.datetime):
@@ -99,6 +166,12 @@ def extract_poses_2d_gamma(
         extracting_time/60,
         (extracting_time/60)/num_minutes
     ))
+    return {
+        'camera_id': camera_id,
+        'num_batches': num_batches,
+        'num_minutes': num_minutes,
+        'extracting_time': extracting_time
+    }
 
 def extract_poses_2d_batch(
     batch_start,
@@ -147,24 +220,19 @@ def extract_poses_2d_batch(
         return 0, None
     # Fetch 2D pose detection results
     try:
-        with open(poses_2d_path, 'r') as fp:
-            poses_2d_list_json = json.load(fp)
+        poses_2d_list_json = load_json_file(poses_2d_path)
     except:
         logger.info('2D pose detection output file \'{}\' contains no JSON'.format(
             poses_2d_path
         ))
         return 0, None
     # Parse 2D pose detection results
-    poses_2d_list = list()
-    for pose_2d_json in poses_2d_list_json:
-        pose_2d = parse_pose_2d_json_gamma(
-            pose_2d_json=pose_2d_json,
+    if len(poses_2d_list_json) > 0:
+        poses_2d = parse_poses_2d_json_gamma(
+            poses_2d_json=poses_2d_list_json,
             camera_id=camera_id,
             batch_start=batch_start
         )
-        poses_2d_list.append(pose_2d)
-    if len(poses_2d_list) > 0:
-        poses_2d = pd.DataFrame(poses_2d_list).set_index('pose_2d_id')
     else:
         logger.info('2D pose detection output file \'{}\' contains no poses'.format(
             poses_2d_path
@@ -176,7 +244,8 @@ def extract_poses_2d_batch(
         environment_id=environment_id,
         camera_id=camera_id,
         base_dir=base_dir,
-        pose_detection_2d_subdirectory=pose_detection_2d_subdirectory
+        pose_detection_2d_subdirectory=pose_detection_2d_subdirectory,
+        pose_processing_subdirectory=pose_processing_subdirectory
     )
     frames_per_video=process_pose_data.shared_constants.VIDEO_FRAMES_PER_VIDEO
     video_duration_seconds = process_pose_data.shared_constants.VIDEO_DURATION_SECONDS
@@ -185,7 +254,7 @@ def extract_poses_2d_batch(
         camera_id
     )
     os.makedirs(output_directory, exist_ok=True)
-    frame_period_microseconds = process_pose_data.shared_constants.VIDEO_FRAME_PERIOD_MICROSECONDS
+    frame_period = pd.Timedelta(microseconds=process_pose_data.shared_constants.VIDEO_FRAME_PERIOD_MICROSECONDS)
     for video_start, poses_2d_video in poses_2d.groupby('video_start'):
         frame_count = frame_counts_batch.loc[video_start, 'frame_count']
         poses_2d_video_output = poses_2d_video.copy()
@@ -207,12 +276,9 @@ def extract_poses_2d_batch(
             poses_2d_video_output = poses_2d_video_output.loc[poses_2d_video_output['frame_number'] <= frames_per_video]
         else:
             poses_2d_video_output = poses_2d_video
-        poses_2d_video_output['timestamp'] = poses_2d_video_output.apply(
-            lambda row: (
-                row['video_start'] +
-                (row['frame_number'] - 1)*datetime.timedelta(microseconds=frame_period_microseconds)
-            ),
-            axis=1
+        poses_2d_video_output['timestamp'] = (
+            poses_2d_video_output['video_start'] +
+            (poses_2d_video_output['frame_number'] - 1)*frame_period
         )
         poses_2d_video_output = (
             poses_2d_video_output
@@ -241,6 +307,75 @@ def extract_poses_2d_batch(
         )
     return num_carryover_frames, carryover_poses
 
+def parse_poses_2d_json_gamma(
+    poses_2d_json,
+    camera_id,
+    batch_start
+):
+    # Bulk version of parse_pose_2d_json_gamma(): builds the columns for all
+    # of the poses in a batch at once
+    # Get batch start time into UTC
+    if batch_start.tzinfo is None:
+        logger.info('Specified batch start is timezone-naive. Assuming UTC')
+        batch_start=batch_start.replace(tzinfo=datetime.timezone.utc)
+    batch_start = batch_start.astimezone(datetime.timezone.utc)
+    num_poses = len(poses_2d_json)
+    # Many poses share an image, so parse each image ID once
+    image_ids = [pose_2d_json['image_id'] for pose_2d_json in poses_2d_json]
+    image_id_info = dict()
+    for image_id in set(image_ids):
+        image_id_minute, image_id_second, image_id_frame_number = parse_alphapose_image_filename(image_id)
+        if (
+            image_id_minute is None or
+            image_id_second is None or
+            image_id_frame_number is None
+        ):
+            raise ValueError('Failed to parse image ID \'{}\''.format(image_id))
+        image_id_info[image_id] = (
+            60*image_id_minute + image_id_second,
+            image_id_frame_number
+        )
+    image_id_info_array = np.array([image_id_info[image_id] for image_id in image_ids], dtype='int64').reshape((num_poses, 2))
+    batch_hour_start = pd.Timestamp(batch_start.replace(minute=0, second=0, microsecond=0))
+    video_starts = batch_hour_start + pd.to_timedelta(image_id_info_array[:, 0], unit='s')
+    try:
+        keypoints = np.array(
+            [pose_2d_json['keypoints'] for pose_2d_json in poses_2d_json],
+            dtype='float'
+        ).reshape((num_poses, -1, 3))
+        keypoint_coordinates = list(keypoints[:, :, :2])
+        keypoint_quality = list(np.where(keypoints[:, :, 2] == 0.0, np.nan, keypoints[:, :, 2]))
+    except ValueError:
+        # Differing numbers of keypoints across poses
+        keypoint_coordinates = list()
+        keypoint_quality = list()
+        for pose_2d_json in poses_2d_json:
+            pose_keypoints = np.asarray(pose_2d_json['keypoints']).reshape((-1, 3))
+            keypoint_coordinates.append(pose_keypoints[:, :2])
+            keypoint_quality.append(np.where(pose_keypoints[:, 2] == 0.0, np.nan, pose_keypoints[:, 2]))
+    bounding_boxes = np.array(
+        [pose_2d_json['box'] for pose_2d_json in poses_2d_json]
+    ).reshape((num_poses, 2, 2))
+    poses_2d = pd.DataFrame({
+        'pose_2d_id': generate_uuids(num_poses),
+        'camera_id': camera_id,
+        'video_start': video_starts,
+        'frame_number': image_id_info_array[:, 1],
+        'bounding_box': list(bounding_boxes),
+        'keypoint_coordinates_2d': keypoint_coordinates,
+        'keypoint_quality_2d': keypoint_quality,
+        'pose_quality_2d': [pose_2d_json['score'] for pose_2d_json in poses_2d_json]
+    }).set_index('pose_2d_id')
+    return poses_2d
+
+def generate_uuids(num_uuids):
+    # Equivalent to calling uuid.uuid4() num_uuids times, but draws the random
+    # bytes in a single call
+    uuid_bytes = np.frombuffer(os.urandom(16*num_uuids), dtype='uint8').reshape((num_uuids, 16)).copy()
+    uuid_bytes[:, 6] = (uuid_bytes[:, 6] & 0x0f) | 0x40
+    uuid_bytes[:, 8] = (uuid_bytes[:, 8] & 0x3f) | 0x80
+    return [uuid.UUID(bytes=uuid_bytes_row.tobytes()) for uuid_bytes_row in uuid_bytes]
+
 def parse_pose_2d_json_gamma(
     pose_2d_json,
     camera_id,
@@ -299,6 +434,7 @@ def calculate_frame_counts_gamma(
     camera_ids=None,
     base_dir=process_pose_data.shared_constants.DEFAULT_BASE_DATA_DIRECTORY,
     pose_detection_2d_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_DETECTION_2D_OUTPUT_SUBDIRECTORY,
+    pose_processing_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_PROCESSING_SUBDIRECTORY,
     task_progress_bar=False,
     notebook=False
 ):
@@ -345,10 +481,13 @@ def calculate_frame_counts_gamma(
             environment_id=environment_id,
             camera_id=camera_id,
             base_dir=base_dir,
-            pose_detection_2d_subdirectory=pose_detection_2d_subdirectory
+            pose_detection_2d_subdirectory=pose_detection_2d_subdirectory,
+            pose_processing_subdirectory=pose_processing_subdirectory
         )
         if len(frame_counts_batch) > 0:
             frame_counts_list.append(frame_counts_batch)
+    if len(frame_counts_list) == 0:
+        return pd.DataFrame()
     frame_counts = (
         pd.concat(frame_counts_list)
         .sort_index()
@@ -366,7 +505,8 @@ def calculate_frame_counts_batch(
     environment_id,
     camera_id,
     base_dir=process_pose_data.shared_constants.DEFAULT_BASE_DATA_DIRECTORY,
-    pose_detection_2d_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_DETECTION_2D_OUTPUT_SUBDIRECTORY    
+    pose_detection_2d_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_DETECTION_2D_OUTPUT_SUBDIRECTORY,
+    pose_processing_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_PROCESSING_SUBDIRECTORY
 ):
     # Get batch start time into UTC
     if batch_start.tzinfo is None:
@@ -385,40 +525,82 @@ def calculate_frame_counts_batch(
     if not os.path.isdir(directory_path):
         logger.info('Directory \'{}\' does not exist'.format(directory_path))
         return pd.DataFrame()
-    # Build list of image times
-    images_list = list()
-    for directory_entry in os.scandir(directory_path):
-        filename=directory_entry.name
-        minute, second, frame_number = parse_alphapose_image_filename(filename)
+    # Use the stored frame counts for this directory unless the directory
+    # has changed since they were calculated
+    directory_mtime_ns = os.stat(directory_path).st_mtime_ns
+    index_file_path = frame_count_index_file_path(
+        directory_path=directory_path,
+        environment_id=environment_id,
+        base_dir=base_dir,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    if os.path.isfile(index_file_path):
+        try:
+            frame_count_index = read_data_file(index_file_path, object_type='dict')
+        except:
+            logger.warning('Failed to read frame count index \'{}\'. Rescanning directory'.format(index_file_path))
+            frame_count_index = None
         if (
-            minute is None or
-            second is None or
-            frame_number is None
+            frame_count_index is not None and
+            frame_count_index.get('directory_mtime_ns') == directory_mtime_ns
         ):
-            continue
-        video_start = datetime.datetime(
-            batch_start.year,
-            batch_start.month,
-            batch_start.day,
-            batch_start.hour,
-            minute,
-            second,
-            tzinfo=datetime.timezone.utc
+            return frame_count_index['frame_counts']
+    # Count image files by video
+    video_frame_counts = dict()
+    with os.scandir(directory_path) as directory_entries:
+        for directory_entry in directory_entries:
+            m = image_filename_re.match(directory_entry.name)
+            if m is None:
+                continue
+            video_key = (m.group('minute_string'), m.group('second_string'))
+            video_frame_counts[video_key] = video_frame_counts.get(video_key, 0) + 1
+    if len(video_frame_counts) == 0:
+        frame_counts_batch = pd.DataFrame()
+    else:
+        video_starts = [
+            datetime.datetime(
+                batch_start.year,
+                batch_start.month,
+                batch_start.day,
+                batch_start.hour,
+                int(minute_string),
+                int(second_string),
+                tzinfo=datetime.timezone.utc
+            )
+            for minute_string, second_string in video_frame_counts.keys()
+        ]
+        frame_counts_batch = (
+            pd.DataFrame(
+                {'frame_count': list(video_frame_counts.values())},
+                index=pd.Index(video_starts, name='video_start')
+            )
+            .sort_index()
         )
-        images_list.append(OrderedDict([
-            ('video_start', video_start),
-            ('frame_number', frame_number)
-        ]))
-    if len(images_list) == 0:
-        return pd.DataFrame()
-    images = pd.DataFrame(images_list)
-    frame_counts_batch = (
-        images
-        .groupby('video_start')
-        .agg(frame_count = ('frame_number', 'count'))
+    os.makedirs(os.path.dirname(index_file_path), exist_ok=True)
+    write_data_file(
+        data_object={
+            'directory_mtime_ns': directory_mtime_ns,
+            'frame_counts': frame_counts_batch
+        },
+        file_path=index_file_path,
+        object_type='dict'
     )
     return frame_counts_batch
-   
+
+def frame_count_index_file_path(
+    directory_path,
+    environment_id,
+    base_dir=process_pose_data.shared_constants.DEFAULT_BASE_DATA_DIRECTORY,
+    pose_processing_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_PROCESSING_SUBDIRECTORY
+):
+    return os.path.join(
+        base_dir,
+        pose_processing_subdirectory,
+        'frame_counts',
+        environment_id,
+        '{}.pkl'.format(os.path.basename(os.path.normpath(directory_path)))
+    )
+
 def fetch_2d_pose_data_alphapose_local_time_segment(
     base_dir,
     environment_id,
@@ -460,49 +642,98 @@ def fetch_2d_pose_data_alphapose_local_time_segment(
             client_secret=client_secret
         )
         camera_assignment_ids = camera_info['assignment_id'].unique().tolist()
-    current_pose_list = list()
-    carryover_pose_list = list()
+    parsed_frames = parse_2d_pose_data_alphapose_local_time_segment(
+        time_segment_start=time_segment_start,
+        base_dir=base_dir,
+        environment_id=environment_id,
+        camera_assignment_ids=camera_assignment_ids,
+        alphapose_subdirectory=alphapose_subdirectory,
+        tree_structure=tree_structure,
+        filename=filename,
+        json_format=json_format
+    )
+    current_poses, carryover_poses = stitch_2d_pose_data_alphapose_time_segment(
+        time_segment_start=time_segment_start,
+        parsed_frames=parsed_frames,
+        carryover_poses=carryover_poses
+    )
+    return current_poses, carryover_poses
+
+def parse_2d_pose_data_alphapose_local_time_segment_indexed(
+    time_segment_frame_files,
+    environment_id,
+    camera_assignment_ids,
+    json_format='cmu'
+):
+    # Version of parse_2d_pose_data_alphapose_local_time_segment() for use
+    # with Pool.imap() over the entries of an index from
+    # generate_alphapose_file_index(). Takes a (time segment start, frame
+    # files) tuple so that each task only carries its own part of the index
+    time_segment_start, frame_files = time_segment_frame_files
+    return parse_2d_pose_data_alphapose_local_time_segment(
+        time_segment_start=time_segment_start,
+        base_dir=None,
+        environment_id=environment_id,
+        camera_assignment_ids=camera_assignment_ids,
+        json_format=json_format,
+        frame_files=frame_files
+    )
+
+def parse_2d_pose_data_alphapose_local_time_segment(
+    time_segment_start,
+    base_dir,
+    environment_id,
+    camera_assignment_ids,
+    alphapose_subdirectory='prepared',
+    tree_structure='file-per-frame',
+    filename='alphapose-results.json',
+    json_format='cmu',
+    frame_files=None
+):
+    # Reads and validates the per-frame JSON files for a time segment. This
+    # does not depend on the previous time segment, so time segments can be
+    # parsed in parallel and then stitched in order. If frame_files (the
+    # entry for this time segment from generate_alphapose_file_index()) is
+    # specified, file paths are taken from there rather than from a glob
+    if tree_structure != 'file-per-frame':
+        raise NotImplementedError('Only \'file-per-frame\' tree structure currently supported')
+    time_segment_start_utc = time_segment_start.astimezone(datetime.timezone.utc)
+    parsed_frames = OrderedDict()
     for camera_assignment_id in camera_assignment_ids:
-        num_carryover_frames = 0
-        base_timestamp = time_segment_start_utc
-        if (
-            carryover_poses is not None and
-            'assignment_id' in carryover_poses.columns
-        ):
-            carryover_poses_camera = carryover_poses.loc[carryover_poses['assignment_id'] == camera_assignment_id]
-            num_carryover_frames = len(carryover_poses_camera)
-            if num_carryover_frames > 0:
-                base_timestamp = carryover_poses_camera['timestamp'].max() + datetime.timedelta(milliseconds=100)
-        glob_pattern = alphapose_data_file_glob_pattern(
-            base_dir=base_dir,
-            environment_id=environment_id,
-            camera_assignment_id=camera_assignment_id,
-            year=time_segment_start_utc.year,
-            month=time_segment_start_utc.month,
-            day=time_segment_start_utc.day,
-            hour=time_segment_start_utc.hour,
-            minute=time_segment_start_utc.minute,
-            second=time_segment_start_utc.second,
-            alphapose_subdirectory=alphapose_subdirectory,
-            tree_structure=tree_structure,
-            filename=filename
-        )
-        re_pattern = alphapose_data_file_re_pattern(
-            base_dir=base_dir,
-            alphapose_subdirectory=alphapose_subdirectory,
-            tree_structure=tree_structure,
-            filename=filename
-        )
-        paths = glob.glob(glob_pattern)
-        num_new_frames = len(paths)
-        new_frames = list()
-        for path in paths:
-            m = re.match(re_pattern, path)
-            if not m:
-                raise ValueError('Regular expression does not match path: {}'.format(path))
-            frame_number = int(m.group('frame_number_string'))
-            new_frames.append((frame_number, path))
-        new_frames = OrderedDict(sorted(new_frames, key=lambda x: x[0]))
+        if frame_files is not None:
+            new_frames = OrderedDict(frame_files.get(camera_assignment_id, []))
+            num_new_frames = len(new_frames)
+        else:
+            glob_pattern = alphapose_data_file_glob_pattern(
+                base_dir=base_dir,
+                environment_id=environment_id,
+                camera_assignment_id=camera_assignment_id,
+                year=time_segment_start_utc.year,
+                month=time_segment_start_utc.month,
+                day=time_segment_start_utc.day,
+                hour=time_segment_start_utc.hour,
+                minute=time_segment_start_utc.minute,
+                second=time_segment_start_utc.second,
+                alphapose_subdirectory=alphapose_subdirectory,
+                tree_structure=tree_structure,
+                filename=filename
+            )
+            re_pattern = alphapose_data_file_re_pattern(
+                base_dir=base_dir,
+                alphapose_subdirectory=alphapose_subdirectory,
+                tree_structure=tree_structure,
+                filename=filename
+            )
+            paths = glob.glob(glob_pattern)
+            num_new_frames = len(paths)
+            new_frames = list()
+            for path in paths:
+                m = re.match(re_pattern, path)
+                if not m:
+                    raise ValueError('Regular expression does not match path: {}'.format(path))
+                frame_number = int(m.group('frame_number_string'))
+                new_frames.append((frame_number, path))
+            new_frames = OrderedDict(sorted(new_frames, key=lambda x: x[0]))
         if list(new_frames.keys()) != list(range(num_new_frames)):
             raise ValueError('Found {} files for time segment {} and camera \'{}\' so expected frame numbers 0 through {} but found frame numbers {}'.format(
                 num_new_frames,
@@ -511,20 +742,13 @@ def fetch_2d_pose_data_alphapose_local_time_segment(
                 num_new_frames - 1,
                 list(new_frames.keys())
             ))
-        # If we only have one extra frame, it's due to clock drift and we want to just drop the last frame
-        if num_carryover_frames + num_new_frames == 101:
-            logger.warning('2D pose data for camera \'{}\' at time segment {} has exactly one extra frame. Deleting.'.format(
-                camera_assignment_id,
-                time_segment_start.isoformat()
-            ))
-            del new_frames[num_new_frames - 1]
-            num_new_frames = num_new_frames - 1
+        frame_number_list = list()
+        pose_list = list()
         for new_frame_number, path in new_frames.items():
-            with open(path, 'r') as fp:
-                try:
-                    pose_data_object = json.load(fp)
-                except:
-                    raise ValueError('Error reading JSON from file {}'.format(path))
+            try:
+                pose_data_object = load_json_file(path)
+            except:
+                raise ValueError('Error reading JSON from file {}'.format(path))
             if pose_data_object.get('assignment_id') != camera_assignment_id:
                 raise ValueError('Camera assignment ID in JSON \'{}\' does not match assignment ID inferred from path \'{}\' for file \'{}\''.format(
                     pose_data_object.get('assignment_id'),
@@ -538,9 +762,9 @@ def fetch_2d_pose_data_alphapose_local_time_segment(
                     path
                 ))
             try:
-                timestamp_json = dateutil.parser.isoparse(pose_data_object.get('timestamp'))
+                timestamp_json = parse_timestamp_string(pose_data_object.get('timestamp'))
             except:
-                raise ValueError('Timestamp string in JSON \'{}\' cannot be parsed by dateutil.parser.isoparse()'.format(
+                raise ValueError('Timestamp string in JSON \'{}\' cannot be parsed as an ISO 8601 timestamp'.format(
                     pose_data_object.get('timestamp')
                 ))
             if timestamp_json != time_segment_start_utc + datetime.timedelta(milliseconds=100*new_frame_number):
@@ -549,31 +773,105 @@ def fetch_2d_pose_data_alphapose_local_time_segment(
                     new_frame_number,
                     timestamp_json
                 ))
-            timestamp = base_timestamp + datetime.timedelta(milliseconds=100*new_frame_number)
             poses = pose_data_object.get('poses')
             if poses is None:
                 raise ValueError('JSON in file \'{}\' does not contain \'poses\' field')
-            for pose in poses:
-                keypoints = np.asarray([[keypoint.get('x'), keypoint.get('y')] for keypoint in pose.get('keypoints')])
-                keypoint_quality = np.asarray([keypoint.get('quality')for keypoint in pose.get('keypoints')])
-                keypoints = np.where(keypoints == 0.0, np.nan, keypoints)
-                keypoint_quality = np.where(keypoint_quality == 0.0, np.nan, keypoint_quality)
-                pose_quality = pose.get('quality')
-                pose_2d_id = pose.get('pose_id')
-                datum = {
-                    'pose_2d_id': pose_2d_id,
-                    'timestamp': timestamp,
-                    'assignment_id': camera_assignment_id,
-                    'keypoint_coordinates_2d': keypoints,
-                    'keypoint_quality_2d': keypoint_quality,
-                    'pose_quality_2d': pose_quality
-                }
-                if timestamp < time_segment_start_utc + datetime.timedelta(seconds=10):
-                    current_pose_list.append(datum)
-                else:
-                    carryover_pose_list.append(datum)
-    current_poses = pd.DataFrame(current_pose_list)
-    carryover_poses = pd.DataFrame(carryover_pose_list)
+            frame_number_list.extend([new_frame_number]*len(poses))
+            pose_list.extend(poses)
+        parsed_frames[camera_assignment_id] = parse_alphapose_poses(
+            pose_list=pose_list,
+            frame_numbers=frame_number_list,
+            num_frames=num_new_frames
+        )
+    return parsed_frames
+
+def parse_alphapose_poses(
+    pose_list,
+    frame_numbers,
+    num_frames
+):
+    # Converts the poses for a camera and time segment into (N, K, 2) keypoint
+    # and (N, K) keypoint quality arrays all at once. The keypoint values for
+    # each pose are pulled out with a single map() call rather than separate
+    # Python-level lookups for each keypoint
+    num_poses = len(pose_list)
+    keypoint_getter = operator.itemgetter('x', 'y', 'quality')
+    try:
+        keypoint_data = np.array(
+            [list(map(keypoint_getter, pose['keypoints'])) for pose in pose_list],
+            dtype='float'
+        ).reshape((num_poses, -1, 3))
+        keypoints = keypoint_data[:, :, :2]
+        keypoint_quality = keypoint_data[:, :, 2]
+        keypoints = np.where(keypoints == 0.0, np.nan, keypoints)
+        keypoint_quality = np.where(keypoint_quality == 0.0, np.nan, keypoint_quality)
+    except (KeyError, TypeError, ValueError):
+        # Missing keypoint fields or differing numbers of keypoints across
+        # poses: fall back to building arrays pose by pose
+        keypoints = np.empty(num_poses, dtype='object')
+        keypoint_quality = np.empty(num_poses, dtype='object')
+        for pose_index, pose in enumerate(pose_list):
+            pose_keypoints = np.asarray([[keypoint.get('x'), keypoint.get('y')] for keypoint in pose.get('keypoints')])
+            pose_keypoint_quality = np.asarray([keypoint.get('quality')for keypoint in pose.get('keypoints')])
+            keypoints[pose_index] = np.where(pose_keypoints == 0.0, np.nan, pose_keypoints)
+            keypoint_quality[pose_index] = np.where(pose_keypoint_quality == 0.0, np.nan, pose_keypoint_quality)
+    return {
+        'num_frames': num_frames,
+        'frame_number': np.asarray(frame_numbers, dtype='int64'),
+        'pose_2d_id': [pose.get('pose_id') for pose in pose_list],
+        'keypoint_coordinates_2d': keypoints,
+        'keypoint_quality_2d': keypoint_quality,
+        'pose_quality_2d': [pose.get('quality') for pose in pose_list]
+    }
+
+def stitch_2d_pose_data_alphapose_time_segment(
+    time_segment_start,
+    parsed_frames,
+    carryover_poses=None
+):
+    # Applies carryover from the previous time segment and assigns timestamps
+    # to the output of parse_2d_pose_data_alphapose_local_time_segment()
+    time_segment_start_utc = time_segment_start.astimezone(datetime.timezone.utc)
+    time_segment_end_utc = time_segment_start_utc + datetime.timedelta(seconds=10)
+    current_pose_dfs = list()
+    carryover_pose_dfs = list()
+    for camera_assignment_id, parsed_poses in parsed_frames.items():
+        num_carryover_frames = 0
+        base_timestamp = time_segment_start_utc
+        if (
+            carryover_poses is not None and
+            'assignment_id' in carryover_poses.columns
+        ):
+            carryover_poses_camera = carryover_poses.loc[carryover_poses['assignment_id'] == camera_assignment_id]
+            num_carryover_frames = len(carryover_poses_camera)
+            if num_carryover_frames > 0:
+                base_timestamp = carryover_poses_camera['timestamp'].max() + datetime.timedelta(milliseconds=100)
+        num_new_frames = parsed_poses['num_frames']
+        frame_numbers = parsed_poses['frame_number']
+        keep = np.full(len(frame_numbers), True)
+        # If we only have one extra frame, it's due to clock drift and we want to just drop the last frame
+        if num_carryover_frames + num_new_frames == 101:
+            logger.warning('2D pose data for camera \'{}\' at time segment {} has exactly one extra frame. Deleting.'.format(
+                camera_assignment_id,
+                time_segment_start.isoformat()
+            ))
+            keep = frame_numbers != num_new_frames - 1
+        if not np.any(keep):
+            continue
+        timestamps = pd.Timestamp(base_timestamp) + pd.to_timedelta(100*frame_numbers[keep], unit='ms')
+        poses_camera = pd.DataFrame({
+            'pose_2d_id': np.asarray(parsed_poses['pose_2d_id'], dtype='object')[keep],
+            'timestamp': timestamps,
+            'assignment_id': camera_assignment_id,
+            'keypoint_coordinates_2d': list(parsed_poses['keypoint_coordinates_2d'][keep]),
+            'keypoint_quality_2d': list(parsed_poses['keypoint_quality_2d'][keep]),
+            'pose_quality_2d': np.asarray(parsed_poses['pose_quality_2d'], dtype='float')[keep]
+        })
+        current = poses_camera['timestamp'] < time_segment_end_utc
+        current_pose_dfs.append(poses_camera.loc[current])
+        carryover_pose_dfs.append(poses_camera.loc[~current])
+    current_poses = pd.concat(current_pose_dfs, ignore_index=True) if len(current_pose_dfs) > 0 else pd.DataFrame()
+    carryover_poses = pd.concat(carryover_pose_dfs, ignore_index=True) if len(carryover_pose_dfs) > 0 else pd.DataFrame()
     if len(current_poses) > 0:
         current_poses.set_index('pose_2d_id', inplace=True)
         current_poses.sort_values(['timestamp', 'assignment_id'], inplace=True)
@@ -582,6 +880,21 @@ def fetch_2d_pose_data_alphapose_local_time_segment(
         carryover_poses.sort_values(['timestamp', 'assignment_id'], inplace=True)
     return current_poses, carryover_poses
 
+def load_json_file(path):
+    if orjson is not None:
+        with open(path, 'rb') as fp:
+            return orjson.loads(fp.read())
+    with open(path, 'r') as fp:
+        return json.load(fp)
+
+def parse_timestamp_string(timestamp_string):
+    # datetime.fromisoformat() covers the timestamps we write and is much
+    # faster than dateutil; fall back to dateutil for anything else
+    try:
+        return datetime.datetime.fromisoformat(timestamp_string)
+    except ValueError:
+        return dateutil.parser.isoparse(timestamp_string)
+
 def fetch_all_data_json(
     base_dir,
     environment_id,
@@ -613,7 +926,8 @@ def fetch_all_data_json(
         token_uri=token_uri,
         audience=audience,
         client_id=client_id,
-        client_secret=client_secret
+        client_secret=client_secret,
+        columns=['timestamp', 'keypoint_coordinates_3d']
     )
     person_positions = fetch_person_positions_local(
         base_dir=base_dir,
@@ -632,7 +946,7 @@ def fetch_all_data_json(
         pose_processing_subdirectory=pose_processing_subdirectory
     )
     all_data_json = process_pose_data.viz_3d.convert_all_data_to_json(
-        poses_3d_with_person_info_df=poses_3d_with_person_info_df,
+        poses_3d_with_person_info_df=decode_id_columns(poses_3d_with_person_info_df),
         person_positions=person_positions,
         tray_positions=tray_positions,
         tray_events=tray_events,
@@ -668,10 +982,11 @@ def fetch_3d_poses_with_person_info_json(
         token_uri=token_uri,
         audience=audience,
         client_id=client_id,
-        client_secret=client_secret
+        client_secret=client_secret,
+        columns=['timestamp', 'keypoint_coordinates_3d']
     )
     poses_3d_with_person_info_json = process_pose_data.viz_3d.convert_3d_poses_with_person_info_to_json(
-        poses_3d_with_person_info_df=poses_3d_with_person_info_df,
+        poses_3d_with_person_info_df=decode_id_columns(poses_3d_with_person_info_df),
         output_path=output_path
     )
     return poses_3d_with_person_info_json
@@ -688,7 +1003,8 @@ def fetch_3d_poses_with_person_info(
     token_uri=None,
     audience=None,
     client_id=None,
-    client_secret=None
+    client_secret=None,
+    columns=None
 ):
     poses_3d_with_tracks_identified_df = fetch_3d_poses_with_identified_tracks_local(
         base_dir=base_dir,
@@ -696,7 +1012,8 @@ def fetch_3d_poses_with_person_info(
         pose_track_3d_identification_inference_id=pose_track_3d_identification_inference_id,
         start=start,
         end=end,
-        pose_processing_subdirectory=pose_processing_subdirectory
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        columns=columns
     )
     person_info_df = honeycomb_io.fetch_person_info(
         environment_id=environment_id,
@@ -719,7 +1036,8 @@ def fetch_3d_poses_with_identified_tracks_local(
     pose_track_3d_identification_inference_id,
     start=None,
     end=None,
-    pose_processing_subdirectory='pose_processing'
+    pose_processing_subdirectory='pose_processing',
+    columns=None
 ):
     pose_track_3d_identification_metadata = fetch_data_local(
         base_dir=base_dir,
@@ -744,7 +1062,8 @@ def fetch_3d_poses_with_identified_tracks_local(
         pose_track_3d_interpolation_inference_id=pose_track_3d_interpolation_inference_id,
         start=start,
         end=end,
-        pose_processing_subdirectory=pose_processing_subdirectory
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        columns=columns
     )
     pose_track_identification_df = fetch_data_local(
         base_dir=base_dir,
@@ -774,7 +1093,8 @@ def fetch_3d_poses_with_interpolated_tracks_local(
     pose_track_3d_interpolation_inference_id,
     start=None,
     end=None,
-    pose_processing_subdirectory='pose_processing'
+    pose_processing_subdirectory='pose_processing',
+    columns=None
 ):
     pose_track_3d_interpolation_metadata = fetch_data_local(
         base_dir=base_dir,
@@ -801,7 +1121,8 @@ def fetch_3d_poses_with_interpolated_tracks_local(
         pose_tracking_3d_inference_id=pose_tracking_3d_inference_id,
         start=start,
         end=end,
-        pose_processing_subdirectory=pose_processing_subdirectory
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        columns=columns
     )
     poses_3d_with_tracks_from_interpolation_df = fetch_3d_poses_with_tracks_local(
         base_dir=base_dir,
@@ -810,7 +1131,8 @@ def fetch_3d_poses_with_interpolated_tracks_local(
         pose_tracking_3d_inference_id=pose_track_3d_interpolation_inference_id,
         start=start,
         end=end,
-        pose_processing_subdirectory=pose_processing_subdirectory
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        columns=columns
     )
     poses_3d_with_tracks_df = pd.concat((
         poses_3d_with_tracks_before_interpolation_df,
@@ -824,7 +1146,8 @@ def fetch_3d_poses_with_uninterpolated_tracks_local(
     pose_tracking_3d_inference_id,
     start=None,
     end=None,
-    pose_processing_subdirectory='pose_processing'
+    pose_processing_subdirectory='pose_processing',
+    columns=None
 ):
     pose_tracks_3d_metadata = fetch_data_local(
         base_dir=base_dir,
@@ -850,7 +1173,8 @@ def fetch_3d_poses_with_uninterpolated_tracks_local(
         pose_tracking_3d_inference_id=pose_tracking_3d_inference_id,
         start=start,
         end=end,
-        pose_processing_subdirectory=pose_processing_subdirectory
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        columns=columns
     )
     return poses_3d_with_tracks_df
 
@@ -861,8 +1185,12 @@ def fetch_3d_poses_with_tracks_local(
     end,
     pose_reconstruction_3d_inference_id,
     pose_tracking_3d_inference_id,
-    pose_processing_subdirectory='pose_processing'
+    pose_processing_subdirectory='pose_processing',
+    columns=None
 ):
+    # Columns apply to the 3D pose data; timestamp is always included
+    if columns is not None and 'timestamp' not in columns:
+        columns = ['timestamp'] + list(columns)
     poses_3d_df = fetch_data_local_by_time_segment(
         start=start,
         end=end,
@@ -874,7 +1202,8 @@ def fetch_3d_poses_with_tracks_local(
         data_ids=None,
         sort_field=None,
         object_type='dataframe',
-        pose_processing_subdirectory=pose_processing_subdirectory
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        columns=columns
     )
     pose_tracks_3d = fetch_data_local(
         base_dir=base_dir,
@@ -889,9 +1218,9 @@ def fetch_3d_poses_with_tracks_local(
         pose_processing_subdirectory=pose_processing_subdirectory
     )
     pose_tracks_3d_df = convert_pose_tracks_3d_to_df(pose_tracks_3d)
-    poses_3d_with_tracks_df = poses_3d_df.join(
-        pose_tracks_3d_df,
-        how='inner'
+    poses_3d_with_tracks_df = join_pose_tracks_3d(
+        poses_3d_df=poses_3d_df,
+        pose_3d_ids_with_tracks_df=pose_tracks_3d_df
     )
     return poses_3d_with_tracks_df
 
@@ -1116,23 +1445,17 @@ def write_data_local_by_time_segment(
     object_type='dataframe',
     append=False,
     sort_field=None,
-    pose_processing_subdirectory='pose_processing'
+    pose_processing_subdirectory='pose_processing',
+    index_data_ids=False,
+    codec=process_pose_data.shared_constants.DEFAULT_STORAGE_CODEC,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE,
+    encode_ids=False
 ):
-    if object_type != 'dataframe':
-        raise ValueError('Writing data by time segment only available for dataframe objects')
+    if object_type not in ['dataframe', 'columnar']:
+        raise ValueError('Writing data by time segment only available for dataframe and columnar objects')
     if 'timestamp' not in data_object.columns.tolist():
         raise ValueError('Writing data by time segment only available for dataframes with a \'timestamp\' field')
-    start = pd.to_datetime(data_object['timestamp'].min()).to_pydatetime()
-    end = pd.to_datetime(data_object['timestamp'].max()).to_pydatetime()
-    time_segment_start_list = generate_time_segment_start_list(
-        start,
-        end
-    )
-    for time_segment_start in time_segment_start_list:
-        data_object_time_segment = data_object.loc[
-            (data_object['timestamp'] >= time_segment_start) &
-            (data_object['timestamp'] < time_segment_start + datetime.timedelta(seconds=10))
-        ]
+    for time_segment_start, data_object_time_segment in split_data_by_time_segment(data_object):
         write_data_local(
             data_object=data_object_time_segment,
             base_dir=base_dir,
@@ -1144,10 +1467,82 @@ def write_data_local_by_time_segment(
             object_type=object_type,
             append=append,
             sort_field=sort_field,
-            pose_processing_subdirectory=pose_processing_subdirectory
+            pose_processing_subdirectory=pose_processing_subdirectory,
+            index_data_ids=index_data_ids,
+            codec=codec,
+            keypoint_dtype=keypoint_dtype,
+            encode_ids=encode_ids
         )
 
 
+def split_data_by_time_segment(data_object):
+    # Returns (time segment start, data) for every time segment spanned by the
+    # data (including empty ones), in order
+    if len(data_object) == 0:
+        return list()
+    # Rows without a timestamp don't belong to any time segment
+    missing_timestamp = data_object['timestamp'].isna()
+    if missing_timestamp.any():
+        logger.warning('Dropping {} rows with missing timestamps'.format(
+            missing_timestamp.sum()
+        ))
+        data_object = data_object.loc[~missing_timestamp]
+        if len(data_object) == 0:
+            return list()
+    data_object = sort_by_timestamp(data_object)
+    start = pd.to_datetime(data_object['timestamp'].iloc[0]).to_pydatetime()
+    end = pd.to_datetime(data_object['timestamp'].iloc[-1]).to_pydatetime()
+    time_segment_start_list = generate_time_segment_start_list(
+        start,
+        end
+    )
+    data_object_time_segment_list = split_data_by_time_windows(
+        data_object=data_object,
+        window_start_list=time_segment_start_list,
+        window_duration=datetime.timedelta(seconds=10),
+        presorted=True
+    )
+    return list(zip(time_segment_start_list, data_object_time_segment_list))
+
+def split_data_by_time_windows(
+    data_object,
+    window_start_list,
+    window_duration,
+    presorted=False
+):
+    # Returns the rows of the data with timestamps in [window_start,
+    # window_start + window_duration) for each window. Sorts the data by
+    # timestamp once (unless presorted) and finds each window's boundaries by
+    # binary search, so each window is a slice of the sorted data rather than
+    # a boolean mask over all of it. Windows may overlap
+    if not presorted:
+        data_object = sort_by_timestamp(data_object)
+    if len(window_start_list) == 0:
+        return list()
+    timestamps = datetimes_to_nanoseconds(data_object['timestamp'])
+    window_starts = datetimes_to_nanoseconds(window_start_list)
+    window_ends = datetimes_to_nanoseconds([
+        window_start + window_duration
+        for window_start in window_start_list
+    ])
+    start_positions = np.searchsorted(timestamps, window_starts, side='left')
+    end_positions = np.searchsorted(timestamps, window_ends, side='left')
+    return [
+        data_object.iloc[start_position:end_position]
+        for start_position, end_position in zip(start_positions, end_positions)
+    ]
+
+def sort_by_timestamp(data_object):
+    if data_object['timestamp'].is_monotonic_increasing:
+        return data_object
+    return data_object.sort_values('timestamp', kind='stable')
+
+def datetimes_to_nanoseconds(datetimes):
+    datetimes = pd.DatetimeIndex(datetimes)
+    if datetimes.tz is not None:
+        datetimes = datetimes.tz_convert(None)
+    return datetimes.to_numpy(dtype='datetime64[ns]').view('int64')
+
 def write_data_local(
     data_object,
     base_dir,
@@ -1159,7 +1554,11 @@ def write_data_local(
     object_type='dataframe',
     append=False,
     sort_field=None,
-    pose_processing_subdirectory='pose_processing'
+    pose_processing_subdirectory='pose_processing',
+    index_data_ids=False,
+    codec=process_pose_data.shared_constants.DEFAULT_STORAGE_CODEC,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE,
+    encode_ids=False
 ):
     directory_path, filename = data_file_path(
         base_dir=base_dir,
@@ -1176,218 +1575,2613 @@ def write_data_local(
         directory_path,
         filename
     )
+    if encode_ids and object_type in ['dataframe', 'columnar']:
+        data_object = encode_id_columns(data_object)
+    if append:
+        # Appended data is written as a separate part file alongside the main
+        # file rather than rewriting the main file, so repeated appends stay
+        # linear and concurrent writers never touch the same file. Readers
+        # merge the parts transparently and compact_data_local() folds them
+        # back into the main file.
+        if object_type not in ['dataframe', 'columnar']:
+            raise ValueError('Append and sort field options only available for dataframe and columnar objects')
+        parts_directory_path = data_parts_directory_path(
+            directory_path=directory_path,
+            filename=filename
+        )
+        os.makedirs(parts_directory_path, exist_ok=True)
+        part_file_path = os.path.join(
+            parts_directory_path,
+            '{:020d}-{}.{}'.format(
+                time.time_ns(),
+                uuid4().hex,
+                process_pose_data.shared_constants.DATA_FILE_EXTENSIONS[object_type]
+            )
+        )
+        logger.debug('Appending data to file \'{}\''.format(part_file_path))
+        write_data_file(
+            data_object=data_object,
+            file_path=part_file_path,
+            object_type=object_type,
+            codec=codec,
+            keypoint_dtype=keypoint_dtype
+        )
+        if time_segment_start is not None:
+            append_manifest_entry(
+                base_dir=base_dir,
+                pipeline_stage=pipeline_stage,
+                environment_id=environment_id,
+                filename_stem=filename_stem,
+                inference_id=inference_id,
+                time_segment_start=time_segment_start,
+                mode='append',
+                num_rows=len(data_object),
+                num_bytes=os.path.getsize(part_file_path),
+                pose_processing_subdirectory=pose_processing_subdirectory
+            )
+            if index_data_ids:
+                append_id_index_entry(
+                    base_dir=base_dir,
+                    pipeline_stage=pipeline_stage,
+                    environment_id=environment_id,
+                    filename_stem=filename_stem,
+                    inference_id=inference_id,
+                    time_segment_start=time_segment_start,
+                    mode='append',
+                    data_ids=data_object.index.tolist(),
+                    pose_processing_subdirectory=pose_processing_subdirectory
+                )
+        return
     logger.debug('Writing data to file \'{}\''.format(file_path))
-    if append and os.path.exists(file_path):
-        if object_type != 'dataframe':
-            raise ValueError('Append and sort field options only available for dataframe objects')
-        existing_data_object = fetch_data_local(
+    write_data_file(
+        data_object=data_object,
+        file_path=file_path,
+        object_type=object_type,
+        codec=codec if object_type != 'dict' else None,
+        keypoint_dtype=keypoint_dtype if object_type != 'dict' else None
+    )
+    # Any parts left over from earlier appends (and any copy of the data in a
+    # different storage format) are superseded by the new file
+    remove_superseded_data_files(
+        directory_path=directory_path,
+        filename=filename
+    )
+    parts_directory_path = data_parts_directory_path(
+        directory_path=directory_path,
+        filename=filename
+    )
+    if os.path.isdir(parts_directory_path):
+        shutil.rmtree(parts_directory_path, ignore_errors=True)
+        invalidate_segment_cache(parts_directory_path)
+    if time_segment_start is not None and object_type != 'dict':
+        append_manifest_entry(
             base_dir=base_dir,
             pipeline_stage=pipeline_stage,
             environment_id=environment_id,
             filename_stem=filename_stem,
-            inference_ids=inference_id,
+            inference_id=inference_id,
             time_segment_start=time_segment_start,
-            object_type=object_type,
+            mode='write',
+            num_rows=len(data_object),
+            num_bytes=os.path.getsize(file_path),
             pose_processing_subdirectory=pose_processing_subdirectory
         )
-        data_object = pd.concat((existing_data_object, data_object))
-        if sort_field is not None:
-            data_object.sort_values(sort_field, inplace=True)
-    if object_type == 'dataframe':
-        data_object.to_pickle(file_path)
-    elif object_type == 'dict':
-        with open(file_path, 'wb') as fp:
-            pickle.dump(data_object, fp)
-    else:
-        raise ValueError('Only allowed object types are \'dataframe\' and \'dict\'')
+        if index_data_ids:
+            append_id_index_entry(
+                base_dir=base_dir,
+                pipeline_stage=pipeline_stage,
+                environment_id=environment_id,
+                filename_stem=filename_stem,
+                inference_id=inference_id,
+                time_segment_start=time_segment_start,
+                mode='write',
+                data_ids=data_object.index.tolist(),
+                pose_processing_subdirectory=pose_processing_subdirectory
+            )
 
-def fetch_data_local_by_time_segment(
-    start,
-    end,
-    base_dir,
-    pipeline_stage,
-    environment_id,
-    filename_stem,
-    inference_ids,
-    data_ids=None,
-    sort_field=None,
+def write_data_file(
+    data_object,
+    file_path,
     object_type='dataframe',
-    pose_processing_subdirectory='pose_processing'
+    codec=None,
+    keypoint_dtype=None
 ):
-    if object_type != 'dataframe':
-        raise ValueError('Fetching data by time segment only available for dataframe objects')
-    time_segment_start_list = generate_time_segment_start_list(
-        start,
-        end
+    if object_type == 'dataframe' and keypoint_dtype is not None:
+        if keypoint_dtype == 'int16':
+            raise ValueError('Quantized keypoint storage only available for columnar objects')
+        data_object = convert_keypoint_dtype(
+            data_object=data_object,
+            keypoint_dtype=keypoint_dtype
+        )
+    # Write to a temporary file and then rename so that readers never see a
+    # partially written file
+    temp_file_path = '{}.{}.tmp'.format(
+        file_path,
+        uuid4().hex
     )
-    data_object_list = list()
-    for time_segment_start in time_segment_start_list:
-        data_object_time_segment = fetch_data_local(
-            base_dir=base_dir,
-            pipeline_stage=pipeline_stage,
-            environment_id=environment_id,
-            filename_stem=filename_stem,
-            inference_ids=inference_ids,
-            data_ids=data_ids,
-            sort_field=sort_field,
-            time_segment_start=time_segment_start,
+    try:
+        if codec is not None:
+            with open(temp_file_path, 'wb') as fp:
+                fp.write(compress_bytes(
+                    data_bytes=serialize_data_object(
+                        data_object=data_object,
+                        object_type=object_type,
+                        keypoint_dtype=keypoint_dtype
+                    ),
+                    codec=codec
+                ))
+        elif object_type == 'dataframe':
+            data_object.to_pickle(temp_file_path)
+        elif object_type == 'dict':
+            with open(temp_file_path, 'wb') as fp:
+                pickle.dump(data_object, fp)
+        elif object_type == 'columnar':
+            with open(temp_file_path, 'wb') as fp:
+                np.savez(fp, **convert_dataframe_to_columnar(
+                    data_object,
+                    keypoint_dtype=keypoint_dtype
+                ))
+        else:
+            raise ValueError('Only allowed object types are {}'.format(
+                process_pose_data.shared_constants.SUPPORTED_OBJECT_TYPES
+            ))
+        os.replace(temp_file_path, file_path)
+    finally:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        invalidate_segment_cache(file_path)
+
+def read_data_file(
+    file_path,
+    object_type='dataframe',
+    columns=None,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE
+):
+    def read_function():
+        with open(file_path, 'rb') as fp:
+            return read_data_buffer(
+                fp=fp,
+                extension=os.path.splitext(file_path)[1].lstrip('.'),
+                object_type=object_type,
+                columns=columns,
+                keypoint_dtype=keypoint_dtype
+            )
+    if not segment_cache_settings['enabled'] or object_type == 'dict':
+        return read_function()
+    stat_result = os.stat(file_path)
+    return read_data_cached(
+        source_key=file_path,
+        file_key=(stat_result.st_mtime_ns, stat_result.st_size),
+        read_function=read_function,
+        columns=columns,
+        keypoint_dtype=keypoint_dtype
+    )
+
+def read_pack_entry(
+    pack_entry,
+    object_type='dataframe',
+    columns=None,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE
+):
+    def read_function():
+        return read_data_buffer(
+            fp=io.BytesIO(read_pack_entry_bytes(pack_entry)),
+            extension=pack_entry[3],
             object_type=object_type,
-            pose_processing_subdirectory=pose_processing_subdirectory
+            columns=columns,
+            keypoint_dtype=keypoint_dtype
         )
-        data_object_list.append(data_object_time_segment)
-    data_object = pd.concat(data_object_list)
-    if sort_field is not None:
-        data_object.sort_values(sort_field, inplace=True)
-    return data_object
+    if not segment_cache_settings['enabled'] or object_type == 'dict':
+        return read_function()
+    # Packed segments are cached by pack path and offset and validated against
+    # the pack the entry was found in
+    pack = pack_entry[0]
+    return read_data_cached(
+        source_key=(pack['pack_file_path'], pack_entry[1]),
+        file_key=pack['cache_key'],
+        read_function=read_function,
+        columns=columns,
+        keypoint_dtype=keypoint_dtype
+    )
 
-def fetch_data_local(
-    base_dir,
-    pipeline_stage,
-    environment_id,
-    filename_stem,
-    inference_ids,
-    data_ids=None,
-    sort_field=None,
-    time_segment_start=None,
-    object_type='dataframe',
-    pose_processing_subdirectory='pose_processing'
+def read_data_cached(
+    source_key,
+    file_key,
+    read_function,
+    columns=None,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE
 ):
-    if isinstance(inference_ids, str):
+    cache_key = (
+        source_key,
+        tuple(columns) if columns is not None else None,
+        keypoint_dtype
+    )
+    with segment_cache_lock:
+        cached = segment_cache.get(cache_key)
+        if cached is not None and cached[0] == file_key:
+            segment_cache.move_to_end(cache_key)
+            segment_cache_stats['hits'] += 1
+            return cached[1].copy(deep=False)
+        segment_cache_stats['misses'] += 1
+    data_object = read_function()
+    num_bytes = data_object_num_bytes(data_object)
+    with segment_cache_lock:
+        if num_bytes <= segment_cache_settings['max_bytes']:
+            previous = segment_cache.pop(cache_key, None)
+            if previous is not None:
+                segment_cache_stats['num_bytes'] -= previous[2]
+            segment_cache[cache_key] = (file_key, data_object, num_bytes)
+            segment_cache_stats['num_bytes'] += num_bytes
+            while segment_cache_stats['num_bytes'] > segment_cache_settings['max_bytes']:
+                evicted_key, evicted = segment_cache.popitem(last=False)
+                segment_cache_stats['num_bytes'] -= evicted[2]
+                segment_cache_stats['evictions'] += 1
+    # Callers may add or reorder columns, so hand out a shallow copy
+    return data_object.copy(deep=False)
+
+def data_object_num_bytes(data_object):
+    # In-memory size of a dataframe. Keypoint arrays are usually views into
+    # one stacked array, which memory_usage(deep=True) counts only as array
+    # headers, so their data is added separately
+    num_bytes = int(data_object.memory_usage(index=True, deep=True).sum())
+    for column_name in data_object.columns:
+        if data_object[column_name].dtype != 'object':
+            continue
+        for value in data_object[column_name].values:
+            if isinstance(value, np.ndarray) and value.base is not None:
+                num_bytes += value.nbytes
+    return num_bytes
+
+def enable_segment_cache(max_bytes=process_pose_data.shared_constants.DEFAULT_SEGMENT_CACHE_MAX_BYTES):
+    with segment_cache_lock:
+        segment_cache_settings['enabled'] = True
+        segment_cache_settings['max_bytes'] = max_bytes
+        while segment_cache_stats['num_bytes'] > max_bytes:
+            evicted_key, evicted = segment_cache.popitem(last=False)
+            segment_cache_stats['num_bytes'] -= evicted[2]
+            segment_cache_stats['evictions'] += 1
+
+def disable_segment_cache():
+    with segment_cache_lock:
+        segment_cache_settings['enabled'] = False
+    clear_segment_cache()
+
+def clear_segment_cache():
+    with segment_cache_lock:
+        segment_cache.clear()
+        segment_cache_stats['hits'] = 0
+        segment_cache_stats['misses'] = 0
+        segment_cache_stats['evictions'] = 0
+        segment_cache_stats['num_bytes'] = 0
+
+def fetch_segment_cache_stats():
+    with segment_cache_lock:
+        stats = dict(segment_cache_stats)
+        stats['num_entries'] = len(segment_cache)
+        stats['max_bytes'] = segment_cache_settings['max_bytes']
+        stats['enabled'] = segment_cache_settings['enabled']
+    return stats
+
+def invalidate_segment_cache(path):
+    # Drops cached data for a file, or for all files under a directory
+    path_prefix = os.path.join(path, '')
+    with segment_cache_lock:
+        if len(segment_cache) == 0:
+            return
+        for cache_key in list(segment_cache.keys()):
+            # Packed segments are keyed by (pack path, offset)
+            source_path = cache_key[0][0] if isinstance(cache_key[0], tuple) else cache_key[0]
+            if source_path == path or source_path.startswith(path_prefix):
+                evicted = segment_cache.pop(cache_key)
+                segment_cache_stats['num_bytes'] -= evicted[2]
+
+def read_data_buffer(
+    fp,
+    extension,
+    object_type='dataframe',
+    columns=None,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE
+):
+    # Compressed files are recognized by their leading bytes, so no codec
+    # needs to be specified on read
+    leading_bytes = fp.read(8)
+    fp.seek(0)
+    codec = detect_codec(leading_bytes)
+    if codec is not None:
+        fp = io.BytesIO(decompress_bytes(
+            data_bytes=fp.read(),
+            codec=codec
+        ))
+    # Dataframes may have been stored in either pickled or columnar form, so
+    # we go by the file extension rather than the requested object type.
+    # Columnar files only load the arrays for the requested columns; pickled
+    # dataframes have to be read in full and are then projected
+    if extension == 'npz':
+        if object_type == 'dict':
+            raise ValueError('Columnar files can only be read as dataframes')
+        with np.load(fp, allow_pickle=True) as arrays:
+            data_object = convert_columnar_to_dataframe(
+                arrays,
+                columns=columns,
+                keypoint_dtype=keypoint_dtype
+            )
+    elif object_type in ['dataframe', 'columnar']:
+        data_object = pd.read_pickle(fp)
+        if columns is not None:
+            data_object = data_object[[column for column in columns if column in data_object.columns]]
+        if keypoint_dtype is not None:
+            data_object = convert_keypoint_dtype(
+                data_object=data_object,
+                keypoint_dtype=keypoint_dtype
+            )
+    elif object_type == 'dict':
+        data_object = pickle.load(fp)
+    else:
+        raise ValueError('Only allowed object types are {}'.format(
+            process_pose_data.shared_constants.SUPPORTED_OBJECT_TYPES
+        ))
+    return data_object
+
+def serialize_data_object(
+    data_object,
+    object_type='dataframe',
+    keypoint_dtype=None
+):
+    if object_type == 'dataframe':
+        return pickle.dumps(data_object, protocol=pickle.HIGHEST_PROTOCOL)
+    if object_type == 'dict':
+        return pickle.dumps(data_object)
+    if object_type == 'columnar':
+        buffer = io.BytesIO()
+        np.savez(buffer, **convert_dataframe_to_columnar(
+            data_object,
+            keypoint_dtype=keypoint_dtype
+        ))
+        return buffer.getvalue()
+    raise ValueError('Only allowed object types are {}'.format(
+        process_pose_data.shared_constants.SUPPORTED_OBJECT_TYPES
+    ))
+
+def compress_bytes(
+    data_bytes,
+    codec
+):
+    if codec == 'gzip':
+        return gzip.compress(data_bytes)
+    if codec == 'bz2':
+        return bz2.compress(data_bytes)
+    if codec == 'lzma':
+        return lzma.compress(data_bytes)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError('Codec \'zstd\' requires the zstandard package')
+        return zstandard.ZstdCompressor().compress(data_bytes)
+    if codec == 'lz4':
+        if lz4 is None:
+            raise ValueError('Codec \'lz4\' requires the lz4 package')
+        return lz4.frame.compress(data_bytes)
+    raise ValueError('Only supported codecs are {}'.format(
+        process_pose_data.shared_constants.SUPPORTED_STORAGE_CODECS
+    ))
+
+def decompress_bytes(
+    data_bytes,
+    codec
+):
+    if codec == 'gzip':
+        return gzip.decompress(data_bytes)
+    if codec == 'bz2':
+        return bz2.decompress(data_bytes)
+    if codec == 'lzma':
+        return lzma.decompress(data_bytes)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError('Reading zstd-compressed data requires the zstandard package')
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data_bytes)
+    if codec == 'lz4':
+        if lz4 is None:
+            raise ValueError('Reading lz4-compressed data requires the lz4 package')
+        return lz4.frame.decompress(data_bytes)
+    raise ValueError('Only supported codecs are {}'.format(
+        process_pose_data.shared_constants.SUPPORTED_STORAGE_CODECS
+    ))
+
+def detect_codec(leading_bytes):
+    # Uncompressed data is either a pickle (starts with the pickle protocol
+    # opcode) or an npz (zip) archive, neither of which collides with these
+    for codec, magic_bytes in CODEC_MAGIC_BYTES.items():
+        if leading_bytes.startswith(magic_bytes):
+            return codec
+    return None
+
+def detect_quantized_keypoints(file_path):
+    if not file_path.endswith('.npz'):
+        return False
+    with open(file_path, 'rb') as fp:
+        data_bytes = fp.read()
+    return detect_quantized_keypoints_bytes(
+        data_bytes=data_bytes,
+        extension='npz'
+    )
+
+def detect_quantized_keypoints_bytes(
+    data_bytes,
+    extension
+):
+    if extension != 'npz':
+        return False
+    codec = detect_codec(data_bytes[:8])
+    if codec is not None:
+        data_bytes = decompress_bytes(
+            data_bytes=data_bytes,
+            codec=codec
+        )
+    with np.load(io.BytesIO(data_bytes), allow_pickle=True) as arrays:
+        metadata = json.loads(str(arrays['__metadata__']))
+    return any(column_info['encoding'] == 'quantized' for column_info in metadata['columns'])
+
+def detect_file_codec(file_path):
+    with open(file_path, 'rb') as fp:
+        return detect_codec(fp.read(8))
+
+def benchmark_storage_codecs(
+    data_object,
+    codecs=None,
+    object_types=['dataframe', 'columnar'],
+    num_repeats=3
+):
+    # Writes and reads data_object (e.g., a representative segment of 2D or
+    # 3D poses) with each codec and storage format and reports size and
+    # throughput. Codecs whose packages are not installed are skipped
+    if codecs is None:
+        codecs = process_pose_data.shared_constants.SUPPORTED_STORAGE_CODECS
+    results = list()
+    with tempfile.TemporaryDirectory() as directory_path:
+        for object_type in object_types:
+            file_path = os.path.join(
+                directory_path,
+                'benchmark.{}'.format(process_pose_data.shared_constants.DATA_FILE_EXTENSIONS[object_type])
+            )
+            uncompressed_num_bytes = None
+            for codec in codecs:
+                if (codec == 'zstd' and zstandard is None) or (codec == 'lz4' and lz4 is None):
+                    logger.info('Package for codec \'{}\' not installed. Skipping'.format(codec))
+                    continue
+                write_times = list()
+                read_times = list()
+                for repeat_index in range(num_repeats):
+                    write_start = time.perf_counter()
+                    write_data_file(
+                        data_object=data_object,
+                        file_path=file_path,
+                        object_type=object_type,
+                        codec=codec
+                    )
+                    write_times.append(time.perf_counter() - write_start)
+                    read_start = time.perf_counter()
+                    with open(file_path, 'rb') as fp:
+                        read_data_buffer(
+                            fp=fp,
+                            extension=os.path.splitext(file_path)[1].lstrip('.'),
+                            object_type=object_type
+                        )
+                    read_times.append(time.perf_counter() - read_start)
+                num_bytes = os.path.getsize(file_path)
+                if uncompressed_num_bytes is None:
+                    uncompressed_num_bytes = len(serialize_data_object(
+                        data_object=data_object,
+                        object_type=object_type
+                    ))
+                write_time = min(write_times)
+                read_time = min(read_times)
+                results.append(OrderedDict([
+                    ('object_type', object_type),
+                    ('codec', codec if codec is not None else 'none'),
+                    ('num_bytes', num_bytes),
+                    ('compression_ratio', uncompressed_num_bytes/num_bytes),
+                    ('write_time', write_time),
+                    ('read_time', read_time),
+                    ('write_throughput_mb_per_second', uncompressed_num_bytes/write_time/1e6),
+                    ('read_throughput_mb_per_second', uncompressed_num_bytes/read_time/1e6)
+                ]))
+    return pd.DataFrame(results)
+
+def convert_dataframe_to_columnar(
+    data_object,
+    keypoint_dtype=None
+):
+    # Each column is stored as a single contiguous array. Columns whose values
+    # are equal-shaped numeric arrays (e.g., keypoint coordinates) are stacked
+    # into one (N, ...) array, datetimes are stored as int64 nanoseconds, and
+    # only columns that can't be represented natively fall back to pickled
+    # object arrays.
+    arrays = dict()
+    column_info_list = list()
+    columns = [('__index__', data_object.index)] + [
+        (column_name, data_object[column_name])
+        for column_name in data_object.columns
+    ]
+    for column_number, (column_name, column) in enumerate(columns):
+        key = 'column_{}'.format(column_number)
+        if keypoint_dtype is not None and column_name in process_pose_data.shared_constants.KEYPOINT_COLUMN_NAMES:
+            encoding, array, column_info = encode_keypoint_array(
+                column,
+                keypoint_dtype=keypoint_dtype,
+                quantize=column_name in process_pose_data.shared_constants.QUANTIZABLE_KEYPOINT_COLUMN_NAMES
+            )
+        elif isinstance(column.dtype, pd.CategoricalDtype):
+            # Categorical columns are stored as integer codes plus an array of
+            # categories
+            column = pd.Series(column)
+            categories_key = '{}_categories'.format(key)
+            categories_encoding, categories_array, categories_info = encode_columnar_array(
+                pd.Series(column.cat.categories)
+            )
+            arrays[categories_key] = categories_array
+            categories_info['encoding'] = categories_encoding
+            encoding = 'categorical'
+            array = column.cat.codes.to_numpy()
+            column_info = {
+                'categories_key': categories_key,
+                'categories': categories_info
+            }
+        else:
+            encoding, array, column_info = encode_columnar_array(column)
+        arrays[key] = array
+        column_info.update({
+            'name': column_name,
+            'key': key,
+            'encoding': encoding
+        })
+        column_info_list.append(column_info)
+    metadata = {
+        'num_rows': len(data_object),
+        'index_name': data_object.index.name,
+        'columns': column_info_list
+    }
+    arrays['__metadata__'] = np.array(json.dumps(metadata))
+    return arrays
+
+def encode_columnar_array(column):
+    column_info = dict()
+    if isinstance(column.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(column.dtype):
+        column = pd.Series(column)
+        if column.dt.tz is not None:
+            column_info['tz'] = str(column.dt.tz)
+            column = column.dt.tz_convert(None)
+        array = column.to_numpy(dtype='datetime64[ns]').view('int64')
+        return 'datetime', array, column_info
+    if pd.api.types.is_numeric_dtype(column.dtype) or pd.api.types.is_bool_dtype(column.dtype):
+        array = np.asarray(column)
+        return 'native', array, column_info
+    values = np.asarray(column, dtype='object')
+    if len(values) > 0:
+        if all(isinstance(value, np.ndarray) for value in values):
+            shapes = set(value.shape for value in values)
+            if len(shapes) == 1 and all(value.dtype.kind in 'fiub' for value in values):
+                array = np.stack(values)
+                return 'stacked', array, column_info
+        elif all(isinstance(value, str) for value in values):
+            array = values.astype('str')
+            return 'string', array, column_info
+    return 'object', values, column_info
+
+def encode_keypoint_array(
+    column,
+    keypoint_dtype,
+    quantize=False
+):
+    encoding, array, column_info = encode_columnar_array(column)
+    if encoding != 'stacked' or keypoint_dtype == 'float64':
+        return encoding, array, column_info
+    if keypoint_dtype == 'float32' or not quantize:
+        return encoding, array.astype('float32'), column_info
+    if keypoint_dtype == 'int16':
+        # Missing keypoints are stored as the minimum int16 value so that they
+        # come back as NaN
+        scale = process_pose_data.shared_constants.KEYPOINT_INT16_SCALE
+        int16_info = np.iinfo('int16')
+        # Coordinates beyond the int16 range at the default scale (e.g., from
+        # very large images or bad detections) would otherwise be clipped, so
+        # the scale is reduced for the whole column to fit them. The scale is
+        # stored with the column, so readers recover the values either way
+        finite_array = array[np.isfinite(array)]
+        max_abs_value = float(np.max(np.abs(finite_array))) if finite_array.size > 0 else 0.0
+        if max_abs_value*scale > int16_info.max:
+            scale = int16_info.max/max_abs_value
+            logger.warning('Keypoint coordinates up to {:.1f} exceed the int16 range at a scale of {}. Quantizing with a scale of {:.4f} instead'.format(
+                max_abs_value,
+                process_pose_data.shared_constants.KEYPOINT_INT16_SCALE,
+                scale
+            ))
+        scaled_array = np.clip(
+            np.round(array*scale),
+            int16_info.min + 1,
+            int16_info.max
+        )
+        quantized_array = np.where(
+            np.isfinite(array),
+            scaled_array,
+            int16_info.min
+        ).astype('int16')
+        column_info['scale'] = scale
+        return 'quantized', quantized_array, column_info
+    raise ValueError('Only supported keypoint dtypes are {}'.format(
+        process_pose_data.shared_constants.SUPPORTED_KEYPOINT_DTYPES
+    ))
+
+def dequantize_keypoint_array(array, column_info):
+    dequantized_array = array.astype('float32')/np.float32(column_info['scale'])
+    dequantized_array[array == np.iinfo('int16').min] = np.nan
+    return dequantized_array
+
+def convert_keypoint_dtype(
+    data_object,
+    keypoint_dtype
+):
+    # Casts the per-row keypoint arrays of a dataframe to the specified
+    # precision. Rows that don't hold arrays (e.g., missing poses) are left
+    # as they are
+    if keypoint_dtype not in ['float64', 'float32']:
+        raise ValueError('Keypoint arrays in dataframes can only be cast to float64 or float32')
+    keypoint_column_names = [
+        column_name for column_name in process_pose_data.shared_constants.KEYPOINT_COLUMN_NAMES
+        if column_name in data_object.columns
+    ]
+    if len(keypoint_column_names) == 0 or len(data_object) == 0:
+        return data_object
+    data_object = data_object.copy(deep=False)
+    for column_name in keypoint_column_names:
+        values = np.asarray(data_object[column_name], dtype='object')
+        if all(
+            not isinstance(value, np.ndarray) or value.dtype == keypoint_dtype
+            for value in values
+        ):
+            continue
+        data_object[column_name] = [
+            value.astype(keypoint_dtype) if isinstance(value, np.ndarray) else value
+            for value in values
+        ]
+    return data_object
+
+def convert_columnar_to_dataframe(
+    arrays,
+    columns=None,
+    keypoint_dtype=None
+):
+    metadata = json.loads(str(arrays['__metadata__']))
+    column_info_list = metadata['columns']
+    index_info = column_info_list[0]
+    if index_info['encoding'] == 'categorical':
+        index = pd.CategoricalIndex(
+            decode_categorical_array(arrays, index_info),
+            name=metadata['index_name']
+        )
+    else:
+        index = pd.Index(
+            decode_columnar_array(arrays[index_info['key']], index_info),
+            name=metadata['index_name']
+        )
+    data = dict()
+    for column_info in column_info_list[1:]:
+        if columns is not None and column_info['name'] not in columns:
+            continue
+        if column_info['encoding'] == 'categorical':
+            data[column_info['name']] = pd.Series(
+                decode_categorical_array(arrays, column_info),
+                index=index
+            )
+            continue
+        array = arrays[column_info['key']]
+        if column_info['encoding'] == 'quantized':
+            array = dequantize_keypoint_array(array, column_info)
+            column_info = dict(column_info, encoding='stacked')
+        if (
+            keypoint_dtype is not None and
+            column_info['encoding'] == 'stacked' and
+            column_info['name'] in process_pose_data.shared_constants.KEYPOINT_COLUMN_NAMES
+        ):
+            array = array.astype(keypoint_dtype, copy=False)
+        data[column_info['name']] = pd.Series(
+            decode_columnar_array(array, column_info),
+            index=index
+        )
+    data_object = pd.DataFrame(data, index=index)
+    return data_object
+
+def decode_categorical_array(arrays, column_info):
+    categories = decode_columnar_array(
+        arrays[column_info['categories_key']],
+        column_info['categories']
+    )
+    return pd.Categorical.from_codes(
+        arrays[column_info['key']],
+        categories=pd.Index(categories)
+    )
+
+def decode_columnar_array(array, column_info):
+    encoding = column_info['encoding']
+    if encoding == 'datetime':
+        values = pd.to_datetime(array.view('datetime64[ns]'))
+        if 'tz' in column_info:
+            values = values.tz_localize('UTC').tz_convert(column_info['tz'])
+        return values
+    if encoding == 'native':
+        return array
+    if encoding == 'stacked':
+        # Rows are views into the contiguous stacked array rather than copies
+        values = np.empty(array.shape[0], dtype='object')
+        for row_number in range(array.shape[0]):
+            values[row_number] = array[row_number]
+        return values
+    if encoding in ['string', 'object']:
+        return array.astype('object')
+    raise ValueError('Columnar encoding \'{}\' not recognized'.format(encoding))
+
+def compact_data_local_by_time_segment(
+    start,
+    end,
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    sort_field=None,
+    pose_processing_subdirectory='pose_processing'
+):
+    time_segment_start_list = generate_time_segment_start_list(
+        start,
+        end
+    )
+    num_compacted_files = 0
+    for time_segment_start in time_segment_start_list:
+        compacted = compact_data_local(
+            base_dir=base_dir,
+            pipeline_stage=pipeline_stage,
+            environment_id=environment_id,
+            filename_stem=filename_stem,
+            inference_id=inference_id,
+            time_segment_start=time_segment_start,
+            sort_field=sort_field,
+            pose_processing_subdirectory=pose_processing_subdirectory
+        )
+        if compacted:
+            num_compacted_files += 1
+    return num_compacted_files
+
+def compact_data_local(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    time_segment_start=None,
+    sort_field=None,
+    pose_processing_subdirectory='pose_processing'
+):
+    directory_path, filename = data_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        time_segment_start=time_segment_start,
+        object_type='dataframe',
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    compacted = compact_data_directory(
+        directory_path=directory_path,
+        filename=filename,
+        sort_field=sort_field
+    )
+    return compacted
+
+def compact_data_directory(
+    directory_path,
+    filename,
+    sort_field=None
+):
+    segment_sources = fetch_segment_sources(
+        directory_path=directory_path,
+        filename=filename
+    )
+    existing_file_path, pack_entry, part_file_paths = segment_sources
+    if len(part_file_paths) == 0:
+        return False
+    # Compacted file keeps the storage format, codec, and keypoint
+    # quantization of the existing data (whether in its own file or in a
+    # pack) or, failing that, of the latest part
+    if existing_file_path is not None:
+        file_path = existing_file_path
+        codec = detect_file_codec(existing_file_path)
+        quantized = detect_quantized_keypoints(existing_file_path)
+    elif pack_entry is not None:
+        file_path = os.path.join(
+            directory_path,
+            '{}.{}'.format(
+                os.path.splitext(filename)[0],
+                pack_entry[3]
+            )
+        )
+        packed_data_bytes = read_pack_entry_bytes(pack_entry)
+        codec = detect_codec(packed_data_bytes[:8])
+        quantized = detect_quantized_keypoints_bytes(
+            data_bytes=packed_data_bytes,
+            extension=pack_entry[3]
+        )
+    else:
+        file_path = os.path.join(
+            directory_path,
+            '{}{}'.format(
+                os.path.splitext(filename)[0],
+                os.path.splitext(part_file_paths[-1])[1]
+            )
+        )
+        codec = detect_file_codec(part_file_paths[-1])
+        quantized = detect_quantized_keypoints(part_file_paths[-1])
+    logger.debug('Compacting {} parts into file \'{}\''.format(
+        len(part_file_paths),
+        file_path
+    ))
+    data_object_list = list()
+    # Read at the stored precision so that compaction doesn't upcast
+    main_data_object = read_main_data(
+        directory_path=directory_path,
+        filename=filename,
+        keypoint_dtype=None,
+        segment_sources=segment_sources
+    )
+    if main_data_object is not None:
+        data_object_list.append(main_data_object)
+    for part_file_path in part_file_paths:
+        data_object_list.append(read_data_file(
+            part_file_path,
+            keypoint_dtype=None
+        ))
+    data_object = concat_data_objects(data_object_list)
+    if sort_field is not None:
+        data_object.sort_values(sort_field, inplace=True)
+    write_data_file(
+        data_object=data_object,
+        file_path=file_path,
+        object_type='columnar' if file_path.endswith('.npz') else 'dataframe',
+        codec=codec,
+        keypoint_dtype='int16' if quantized else None
+    )
+    # Only remove the parts we folded in, in case another writer appended
+    # while we were compacting
+    for part_file_path in part_file_paths:
+        os.remove(part_file_path)
+        invalidate_segment_cache(part_file_path)
+    try:
+        os.rmdir(data_parts_directory_path(
+            directory_path=directory_path,
+            filename=filename
+        ))
+    except OSError:
+        pass
+    return True
+
+def fetch_data_local_by_time_segment(
+    start,
+    end,
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_ids,
+    data_ids=None,
+    sort_field=None,
+    object_type='dataframe',
+    pose_processing_subdirectory='pose_processing',
+    prefetch=process_pose_data.shared_constants.DEFAULT_PREFETCH_NUM_SEGMENTS,
+    max_prefetch_bytes=process_pose_data.shared_constants.DEFAULT_PREFETCH_MAX_BYTES,
+    columns=None,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE
+):
+    if object_type not in ['dataframe', 'columnar']:
+        raise ValueError('Fetching data by time segment only available for dataframe and columnar objects')
+    read_columns = projection_read_columns(
+        columns=columns,
+        sort_field=sort_field
+    )
+    time_segment_start_list = generate_time_segment_start_list(
+        start,
+        end
+    )
+    # Load the manifests once for the whole span and skip segments that they
+    # show to be absent or empty
+    manifests = fetch_manifests_local(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_ids=inference_ids,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    time_segment_start_list = filter_time_segment_start_list_by_manifests(
+        time_segment_start_list=time_segment_start_list,
+        manifests=manifests
+    )
+    if len(time_segment_start_list) == 0:
+        return pd.DataFrame()
+    fetch_data_local_partial = functools.partial(
+        fetch_data_local,
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_ids=inference_ids,
+        data_ids=data_ids,
+        sort_field=sort_field,
+        object_type=object_type,
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        manifests=manifests,
+        columns=read_columns,
+        keypoint_dtype=keypoint_dtype
+    )
+    data_object_list = list()
+    for time_segment_start, data_object_time_segment in fetch_time_segments_prefetched(
+        time_segment_start_list=time_segment_start_list,
+        fetch_function=fetch_data_local_partial,
+        prefetch=prefetch,
+        max_prefetch_bytes=max_prefetch_bytes,
+        manifests=manifests
+    ):
+        data_object_list.append(data_object_time_segment)
+    data_object = concat_data_objects(data_object_list)
+    if sort_field is not None:
+        data_object.sort_values(sort_field, inplace=True)
+    if read_columns is not None and read_columns != columns and len(data_object) > 0:
+        data_object = data_object[[column for column in columns if column in data_object.columns]]
+    return data_object
+
+def iter_segments(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_ids,
+    start,
+    end,
+    columns=None,
+    data_ids=None,
+    sort_field=None,
+    object_type='dataframe',
+    pose_processing_subdirectory='pose_processing',
+    prefetch=process_pose_data.shared_constants.DEFAULT_PREFETCH_NUM_SEGMENTS,
+    max_prefetch_bytes=process_pose_data.shared_constants.DEFAULT_PREFETCH_MAX_BYTES,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE
+):
+    # Lazily yields (time segment start, dataframe) for each time segment in
+    # the span that contains data, in time order, reading up to prefetch
+    # time segments ahead
+    if object_type not in ['dataframe', 'columnar']:
+        raise ValueError('Fetching data by time segment only available for dataframe and columnar objects')
+    time_segment_start_list = generate_time_segment_start_list(
+        start,
+        end
+    )
+    manifests = fetch_manifests_local(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_ids=inference_ids,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    time_segment_start_list = filter_time_segment_start_list_by_manifests(
+        time_segment_start_list=time_segment_start_list,
+        manifests=manifests
+    )
+    fetch_data_local_partial = functools.partial(
+        fetch_data_local,
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_ids=inference_ids,
+        data_ids=data_ids,
+        sort_field=sort_field,
+        object_type=object_type,
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        manifests=manifests,
+        columns=columns,
+        keypoint_dtype=keypoint_dtype
+    )
+    for time_segment_start, data_object_time_segment in fetch_time_segments_prefetched(
+        time_segment_start_list=time_segment_start_list,
+        fetch_function=fetch_data_local_partial,
+        prefetch=prefetch,
+        max_prefetch_bytes=max_prefetch_bytes,
+        manifests=manifests
+    ):
+        if len(data_object_time_segment) == 0:
+            continue
+        yield time_segment_start, data_object_time_segment
+
+def fetch_time_segments_prefetched(
+    time_segment_start_list,
+    fetch_function,
+    prefetch=process_pose_data.shared_constants.DEFAULT_PREFETCH_NUM_SEGMENTS,
+    max_prefetch_bytes=process_pose_data.shared_constants.DEFAULT_PREFETCH_MAX_BYTES,
+    manifests=None
+):
+    # Yields (time segment start, fetch_function(time_segment_start=...)) in
+    # order, reading up to prefetch time segments ahead on a thread pool.
+    # Reads are mostly waiting on storage, so threads are enough. If the
+    # manifests are available, also stops reading ahead once the expected
+    # size of the time segments in flight reaches max_prefetch_bytes
+    if prefetch is None or prefetch <= 1 or len(time_segment_start_list) <= 1:
+        for time_segment_start in time_segment_start_list:
+            yield time_segment_start, fetch_function(time_segment_start=time_segment_start)
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=prefetch) as executor:
+        in_flight = deque()
+        in_flight_bytes = 0
+        time_segment_start_iterator = iter(time_segment_start_list)
+        next_time_segment_start = next(time_segment_start_iterator, None)
+        while next_time_segment_start is not None or len(in_flight) > 0:
+            while next_time_segment_start is not None and len(in_flight) < prefetch:
+                num_bytes = manifest_num_bytes(
+                    manifests=manifests,
+                    time_segment_start=next_time_segment_start
+                )
+                if (
+                    len(in_flight) > 0 and
+                    max_prefetch_bytes is not None and
+                    in_flight_bytes + num_bytes > max_prefetch_bytes
+                ):
+                    break
+                in_flight.append((
+                    next_time_segment_start,
+                    num_bytes,
+                    executor.submit(fetch_function, time_segment_start=next_time_segment_start)
+                ))
+                in_flight_bytes += num_bytes
+                next_time_segment_start = next(time_segment_start_iterator, None)
+            time_segment_start, num_bytes, future = in_flight.popleft()
+            in_flight_bytes -= num_bytes
+            yield time_segment_start, future.result()
+
+def manifest_num_bytes(
+    manifests,
+    time_segment_start
+):
+    if manifests is None:
+        return 0
+    manifest_entries = [
+        manifest_segment_entry(
+            manifest=manifest,
+            time_segment_start=time_segment_start
+        )
+        for manifest in manifests.values()
+    ]
+    return sum([
+        manifest_entry['num_bytes'] for manifest_entry in manifest_entries
+        if manifest_entry is not None
+    ])
+
+def manifest_num_rows(
+    manifests,
+    time_segment_start
+):
+    # Returns None if there are no manifests or if the size of the segment is
+    # unknown to any of them (see manifest_segment_entry())
+    if manifests is None:
+        return None
+    manifest_entries = [
+        manifest_segment_entry(
+            manifest=manifest,
+            time_segment_start=time_segment_start
+        )
+        for manifest in manifests.values()
+    ]
+    if any([manifest_entry is None for manifest_entry in manifest_entries]):
+        return None
+    return sum([manifest_entry['num_rows'] for manifest_entry in manifest_entries])
+
+def fetch_data_local(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_ids,
+    data_ids=None,
+    sort_field=None,
+    time_segment_start=None,
+    object_type='dataframe',
+    pose_processing_subdirectory='pose_processing',
+    manifests=None,
+    columns=None,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE
+):
+    if isinstance(inference_ids, str):
+        inference_ids = [inference_ids]
+    elif isinstance(inference_ids, (list, tuple, set)):
+        pass
+    else:
+        raise ValueError('Specified inference IDs must be of type str, list, tuple, or set')
+    if len(inference_ids) == 0:
+        raise ValueError('Must specify at least one inference ID')
+    read_columns = projection_read_columns(
+        columns=columns,
+        sort_field=sort_field
+    )
+    data_object_list = list()
+    for inference_id in inference_ids:
+        if time_segment_start is not None and object_type in ['dataframe', 'columnar']:
+            if manifests is not None:
+                manifest = manifests.get(inference_id)
+            else:
+                manifest = fetch_manifest_local(
+                    base_dir=base_dir,
+                    pipeline_stage=pipeline_stage,
+                    environment_id=environment_id,
+                    filename_stem=filename_stem,
+                    inference_id=inference_id,
+                    pose_processing_subdirectory=pose_processing_subdirectory
+                )
+            # A segment is skipped without touching the filesystem if the
+            # manifest lists it as empty, or doesn't list it and is marked
+            # complete. Otherwise (e.g., for data written before the manifest
+            # existed, or by a run that didn't finish) it is looked for on disk
+            if manifest is not None:
+                manifest_entry = manifest_segment_entry(
+                    manifest=manifest,
+                    time_segment_start=time_segment_start
+                )
+                if manifest_entry is not None and manifest_entry['num_rows'] == 0:
+                    data_object_list.append(pd.DataFrame())
+                    continue
+        directory_path, filename = data_file_path(
+            base_dir=base_dir,
+            pipeline_stage=pipeline_stage,
+            environment_id=environment_id,
+            filename_stem=filename_stem,
+            inference_id=inference_id,
+            time_segment_start=time_segment_start,
+            object_type=object_type,
+            pose_processing_subdirectory=pose_processing_subdirectory
+        )
+        file_path = os.path.join(
+            directory_path,
+            filename
+        )
+        if object_type in ['dataframe', 'columnar']:
+            data_object_item_list = list()
+            segment_sources = fetch_segment_sources(
+                directory_path=directory_path,
+                filename=filename
+            )
+            main_data_object = read_main_data(
+                directory_path=directory_path,
+                filename=filename,
+                object_type=object_type,
+                columns=read_columns,
+                keypoint_dtype=keypoint_dtype,
+                segment_sources=segment_sources
+            )
+            if main_data_object is not None:
+                data_object_item_list.append(main_data_object)
+            for part_file_path in segment_sources[2]:
+                data_object_item_list.append(read_data_file(
+                    part_file_path,
+                    columns=read_columns,
+                    keypoint_dtype=keypoint_dtype
+                ))
+            if len(data_object_item_list) == 0:
+                data_object_item = pd.DataFrame()
+            elif len(data_object_item_list) == 1:
+                data_object_item = data_object_item_list[0]
+            else:
+                data_object_item = concat_data_objects(data_object_item_list)
+                if sort_field is not None:
+                    data_object_item.sort_values(sort_field, inplace=True)
+            if data_ids is not None and len(data_object_item_list) > 0:
+                data_object_item = data_object_item.reindex(
+                    data_object_item.index.intersection(data_ids)
+                )
+        elif object_type == 'dict':
+            if os.path.exists(file_path):
+                with open(file_path, 'rb') as fp:
+                    data_object_item = pickle.load(fp)
+                if data_ids is not None:
+                    raise ValueError('Specification of data IDs is only available for dataframe objects')
+            else:
+                data_object_item = dict()
+        else:
+            raise ValueError('Only allowed object types are {}'.format(
+                process_pose_data.shared_constants.SUPPORTED_OBJECT_TYPES
+            ))
+        data_object_list.append(data_object_item)
+    if len(data_object_list) == 1:
+        data_object = data_object_list[0]
+    else:
+        if object_type not in ['dataframe', 'columnar']:
+            raise ValueError('Specification of multiple inference IDs is only available for dataframe and columnar objects')
+        data_object = concat_data_objects(data_object_list)
+        if sort_field is not None:
+            data_object.sort_values(sort_field, inplace=True)
+    if read_columns is not None and read_columns != columns and len(data_object) > 0:
+        data_object = data_object[[column for column in columns if column in data_object.columns]]
+    return data_object
+
+def encode_id_columns(data_object):
+    # Stores each repeated ID column as a categorical, so that every row
+    # holds an integer code into a single sorted list of distinct IDs
+    id_column_names = [
+        column_name for column_name in process_pose_data.shared_constants.ID_COLUMN_NAMES
+        if column_name in data_object.columns and not isinstance(data_object[column_name].dtype, pd.CategoricalDtype)
+    ]
+    if len(id_column_names) == 0:
+        return data_object
+    data_object = data_object.copy(deep=False)
+    for column_name in id_column_names:
+        data_object[column_name] = data_object[column_name].astype('category')
+    return data_object
+
+def decode_id_columns(data_object):
+    # Converts categorical ID columns back to plain values. Meant for export
+    # boundaries (JSON output, external libraries); internally the codes can
+    # be used directly
+    id_column_names = [
+        column_name for column_name in process_pose_data.shared_constants.ID_COLUMN_NAMES
+        if column_name in data_object.columns and isinstance(data_object[column_name].dtype, pd.CategoricalDtype)
+    ]
+    if len(id_column_names) == 0:
+        return data_object
+    data_object = data_object.copy(deep=False)
+    for column_name in id_column_names:
+        data_object[column_name] = np.asarray(data_object[column_name], dtype='object')
+    return data_object
+
+def concat_data_objects(data_object_list):
+    # Categorical columns only survive a concat if their categories match, so
+    # recode each to the sorted union of categories first
+    categorical_column_names = set()
+    for data_object in data_object_list:
+        for column_name, dtype in data_object.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                categorical_column_names.add(column_name)
+    if len(categorical_column_names) == 0:
+        return pd.concat(data_object_list)
+    data_object_list = list(data_object_list)
+    for column_name in categorical_column_names:
+        categories_list = [
+            data_object[column_name].cat.categories
+            for data_object in data_object_list
+            if column_name in data_object.columns and isinstance(data_object[column_name].dtype, pd.CategoricalDtype)
+        ]
+        if all(categories.equals(categories_list[0]) for categories in categories_list[1:]):
+            continue
+        categories = categories_list[0].append(categories_list[1:]).unique().sort_values()
+        for data_object_index, data_object in enumerate(data_object_list):
+            if column_name not in data_object.columns:
+                continue
+            data_object = data_object.copy(deep=False)
+            if isinstance(data_object[column_name].dtype, pd.CategoricalDtype):
+                data_object[column_name] = data_object[column_name].cat.set_categories(categories)
+            else:
+                data_object[column_name] = pd.Categorical(data_object[column_name], categories=categories)
+            data_object_list[data_object_index] = data_object
+    return pd.concat(data_object_list)
+
+def join_pose_tracks_3d(
+    poses_3d_df,
+    pose_3d_ids_with_tracks_df
+):
+    # Inner join of 3D poses with their pose track IDs. The pose ID lookup is
+    # done once per pose, after which the track IDs are gathered by position
+    # (for categorical track IDs, as integer codes)
+    if len(poses_3d_df) == 0 or not pose_3d_ids_with_tracks_df.index.is_unique:
+        return poses_3d_df.join(pose_3d_ids_with_tracks_df, how='inner')
+    positions = pose_3d_ids_with_tracks_df.index.get_indexer(poses_3d_df.index)
+    matched = positions >= 0
+    poses_3d_with_tracks_df = poses_3d_df.loc[matched].copy()
+    for column_name in pose_3d_ids_with_tracks_df.columns:
+        poses_3d_with_tracks_df[column_name] = pose_3d_ids_with_tracks_df[column_name].iloc[positions[matched]].values
+    return poses_3d_with_tracks_df
+
+def projection_read_columns(
+    columns,
+    sort_field=None
+):
+    # Columns to read for a projection onto columns, including any columns
+    # needed for sorting
+    if columns is None:
+        return None
+    read_columns = list(columns)
+    if sort_field is not None:
+        for sort_column in ([sort_field] if isinstance(sort_field, str) else sort_field):
+            if sort_column not in read_columns:
+                read_columns.append(sort_column)
+    return read_columns
+
+def fetch_columnar_arrays_local(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    time_segment_start=None,
+    columns=None,
+    pose_processing_subdirectory='pose_processing'
+):
+    # Returns the raw column arrays (with keypoint columns as stacked (N, ...)
+    # arrays) without building a dataframe. The index is returned under the
+    # key '__index__'.
+    directory_path, filename = data_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        time_segment_start=time_segment_start,
+        object_type='columnar',
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    existing_file_path, pack_entry, file_paths = fetch_segment_sources(
+        directory_path=directory_path,
+        filename=filename
+    )
+    sources = list()
+    if existing_file_path is not None:
+        with open(existing_file_path, 'rb') as fp:
+            sources.append((fp.read(), os.path.splitext(existing_file_path)[1].lstrip('.')))
+    elif pack_entry is not None:
+        sources.append((read_pack_entry_bytes(pack_entry), pack_entry[3]))
+    for file_path in file_paths:
+        with open(file_path, 'rb') as fp:
+            sources.append((fp.read(), os.path.splitext(file_path)[1].lstrip('.')))
+    arrays_list = list()
+    for data_bytes, extension in sources:
+        codec = detect_codec(data_bytes[:8])
+        if codec is not None:
+            data_bytes = decompress_bytes(
+                data_bytes=data_bytes,
+                codec=codec
+            )
+        if extension == 'npz':
+            with np.load(io.BytesIO(data_bytes), allow_pickle=True) as columnar_file:
+                arrays = decode_columnar_arrays(
+                    columnar_arrays=columnar_file,
+                    columns=columns
+                )
+        else:
+            arrays = decode_columnar_arrays(
+                columnar_arrays=convert_dataframe_to_columnar(read_data_buffer(
+                    fp=io.BytesIO(data_bytes),
+                    extension=extension,
+                    keypoint_dtype=None
+                )),
+                columns=columns
+            )
+        if len(arrays['__index__']) > 0:
+            arrays_list.append(arrays)
+    if len(arrays_list) == 0:
+        return OrderedDict()
+    if len(arrays_list) == 1:
+        return arrays_list[0]
+    arrays = OrderedDict([
+        (key, np.concatenate([arrays_item[key] for arrays_item in arrays_list]))
+        for key in arrays_list[0].keys()
+    ])
+    return arrays
+
+def decode_columnar_arrays(
+    columnar_arrays,
+    columns=None
+):
+    metadata = json.loads(str(columnar_arrays['__metadata__']))
+    arrays = OrderedDict()
+    for column_number, column_info in enumerate(metadata['columns']):
+        if column_number == 0:
+            key = '__index__'
+        elif columns is not None and column_info['name'] not in columns:
+            continue
+        else:
+            key = column_info['name']
+        array = columnar_arrays[column_info['key']]
+        if column_info['encoding'] == 'datetime':
+            array = array.view('datetime64[ns]')
+        elif column_info['encoding'] == 'string':
+            array = array.astype('object')
+        elif column_info['encoding'] == 'quantized':
+            array = dequantize_keypoint_array(array, column_info)
+        elif column_info['encoding'] == 'categorical':
+            array = np.asarray(decode_categorical_array(columnar_arrays, column_info), dtype='object')
+        arrays[key] = array
+    return arrays
+
+def delete_data_local(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_ids,
+    time_segment_start=None,
+    object_type='dataframe',
+    pose_processing_subdirectory='pose_processing'
+):
+    if isinstance(inference_ids, str):
+        inference_ids = [inference_ids]
+    elif isinstance(inference_ids, (list, tuple, set)):
+        pass
+    else:
+        raise ValueError('Specified inference IDs must be of type str, list, tuple, or set')
+    for inference_id in inference_ids:
+        directory_path, filename = data_file_path(
+            base_dir=base_dir,
+            pipeline_stage=pipeline_stage,
+            environment_id=environment_id,
+            filename_stem=filename_stem,
+            inference_id=inference_id,
+            time_segment_start=time_segment_start,
+            object_type=object_type,
+            pose_processing_subdirectory=pose_processing_subdirectory
+        )
+        file_path = os.path.join(
+            directory_path,
+            filename
+        )
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            invalidate_segment_cache(file_path)
+        remove_superseded_data_files(
+            directory_path=directory_path,
+            filename=filename
+        )
+        if time_segment_start is not None and object_type != 'dict':
+            remove_packed_data(
+                directory_path=directory_path,
+                filename=filename
+            )
+            if os.path.exists(manifest_file_path(
+                base_dir=base_dir,
+                pipeline_stage=pipeline_stage,
+                environment_id=environment_id,
+                filename_stem=filename_stem,
+                inference_id=inference_id,
+                pose_processing_subdirectory=pose_processing_subdirectory
+            )):
+                append_manifest_entry(
+                    base_dir=base_dir,
+                    pipeline_stage=pipeline_stage,
+                    environment_id=environment_id,
+                    filename_stem=filename_stem,
+                    inference_id=inference_id,
+                    time_segment_start=time_segment_start,
+                    mode='delete',
+                    pose_processing_subdirectory=pose_processing_subdirectory
+                )
+            if os.path.exists(id_index_file_path(
+                base_dir=base_dir,
+                pipeline_stage=pipeline_stage,
+                environment_id=environment_id,
+                filename_stem=filename_stem,
+                inference_id=inference_id,
+                pose_processing_subdirectory=pose_processing_subdirectory
+            )):
+                append_id_index_entry(
+                    base_dir=base_dir,
+                    pipeline_stage=pipeline_stage,
+                    environment_id=environment_id,
+                    filename_stem=filename_stem,
+                    inference_id=inference_id,
+                    time_segment_start=time_segment_start,
+                    mode='delete',
+                    pose_processing_subdirectory=pose_processing_subdirectory
+                )
+        parts_directory_path = data_parts_directory_path(
+            directory_path=directory_path,
+            filename=filename
+        )
+        if os.path.isdir(parts_directory_path):
+            shutil.rmtree(parts_directory_path, ignore_errors=True)
+            invalidate_segment_cache(parts_directory_path)
+
+def data_file_path(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    time_segment_start=None,
+    object_type='dataframe',
+    pose_processing_subdirectory='pose_processing'
+):
+    directory_path = os.path.join(
+        base_dir,
+        pose_processing_subdirectory,
+        pipeline_stage,
+        environment_id
+    )
+    if time_segment_start is not None:
+        time_segment_start_utc = time_segment_start.astimezone(datetime.timezone.utc)
+        directory_path = os.path.join(
+            directory_path,
+            '{:04d}'.format(time_segment_start_utc.year),
+            '{:02d}'.format(time_segment_start_utc.month),
+            '{:02d}'.format(time_segment_start_utc.day),
+            '{:02d}-{:02d}-{:02d}'.format(
+                time_segment_start_utc.hour,
+                time_segment_start_utc.minute,
+                time_segment_start_utc.second,
+            )
+        )
+    if object_type not in process_pose_data.shared_constants.DATA_FILE_EXTENSIONS.keys():
+        raise ValueError('Only allowed object types are {}'.format(
+            process_pose_data.shared_constants.SUPPORTED_OBJECT_TYPES
+        ))
+    filename = '{}_{}.{}'.format(
+        filename_stem,
+        inference_id,
+        process_pose_data.shared_constants.DATA_FILE_EXTENSIONS[object_type]
+    )
+    return directory_path, filename
+
+def existing_data_file_path(
+    directory_path,
+    filename
+):
+    filename_stem = os.path.splitext(filename)[0]
+    for extension in data_file_extensions(filename):
+        file_path = os.path.join(
+            directory_path,
+            '{}.{}'.format(filename_stem, extension)
+        )
+        if os.path.exists(file_path):
+            return file_path
+    return None
+
+def data_file_extensions(filename):
+    # Dataframes may be stored in either pickled or columnar form, so look for
+    # the requested form first and then the other
+    extension = os.path.splitext(filename)[1].lstrip('.')
+    return [extension] + sorted(
+        other_extension
+        for other_extension in set(process_pose_data.shared_constants.DATA_FILE_EXTENSIONS.values())
+        if other_extension != extension
+    )
+
+def remove_superseded_data_files(
+    directory_path,
+    filename
+):
+    filename_stem, filename_extension = os.path.splitext(filename)
+    for extension in set(process_pose_data.shared_constants.DATA_FILE_EXTENSIONS.values()):
+        if '.{}'.format(extension) == filename_extension:
+            continue
+        file_path = os.path.join(
+            directory_path,
+            '{}.{}'.format(filename_stem, extension)
+        )
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            invalidate_segment_cache(file_path)
+
+def summarize_data_local(
+    start,
+    end,
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_ids,
+    pose_processing_subdirectory='pose_processing'
+):
+    manifests = fetch_manifests_local(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_ids=inference_ids,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    if manifests is None:
+        return None
+    time_segment_start_list = generate_time_segment_start_list(
+        start,
+        end
+    )
+    summary = {
+        'num_time_segments': len(time_segment_start_list),
+        'num_time_segments_with_data': 0,
+        'num_rows': 0,
+        'num_bytes': 0
+    }
+    for time_segment_start in time_segment_start_list:
+        manifest_entries = [
+            manifest_segment_entry(
+                manifest=manifest,
+                time_segment_start=time_segment_start
+            )
+            for manifest in manifests.values()
+        ]
+        manifest_entries = [
+            manifest_entry for manifest_entry in manifest_entries
+            if manifest_entry is not None
+        ]
+        num_rows = sum([manifest_entry['num_rows'] for manifest_entry in manifest_entries])
+        if num_rows > 0:
+            summary['num_time_segments_with_data'] += 1
+        summary['num_rows'] += num_rows
+        summary['num_bytes'] += sum([manifest_entry['num_bytes'] for manifest_entry in manifest_entries])
+    return summary
+
+def filter_time_segment_start_list_by_manifests(
+    time_segment_start_list,
+    manifests
+):
+    # Drops the time segments that every manifest shows to be empty or
+    # absent. Segments whose contents a manifest can't vouch for are kept and
+    # looked for on disk
+    if manifests is None:
+        return time_segment_start_list
+    time_segment_start_list_filtered = list()
+    for time_segment_start in time_segment_start_list:
+        for manifest in manifests.values():
+            manifest_entry = manifest_segment_entry(
+                manifest=manifest,
+                time_segment_start=time_segment_start
+            )
+            if manifest_entry is None or manifest_entry['num_rows'] > 0:
+                time_segment_start_list_filtered.append(time_segment_start)
+                break
+    return time_segment_start_list_filtered
+
+def manifest_segment_entry(
+    manifest,
+    time_segment_start
+):
+    # Returns the manifest's entry for a time segment. A segment that isn't
+    # listed in a manifest marked complete (see mark_manifest_complete()) is
+    # known to have no data. Otherwise (e.g., for manifests written before
+    # completion was recorded) returns None
+    manifest_entry = manifest['segments'].get(manifest_key(time_segment_start))
+    if manifest_entry is not None:
+        return manifest_entry
+    if manifest['complete']:
+        return {'num_rows': 0, 'num_bytes': 0}
+    return None
+
+def fetch_manifests_local(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_ids,
+    pose_processing_subdirectory='pose_processing'
+):
+    # Returns None unless every inference ID has a readable manifest (data
+    # written before manifests were introduced has to be found by probing the
+    # files)
+    if isinstance(inference_ids, str):
+        inference_ids = [inference_ids]
+    manifests = dict()
+    for inference_id in inference_ids:
+        manifest = fetch_manifest_local(
+            base_dir=base_dir,
+            pipeline_stage=pipeline_stage,
+            environment_id=environment_id,
+            filename_stem=filename_stem,
+            inference_id=inference_id,
+            pose_processing_subdirectory=pose_processing_subdirectory
+        )
+        if manifest is None:
+            return None
+        manifests[inference_id] = manifest
+    return manifests
+
+def fetch_manifest_local(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    pose_processing_subdirectory='pose_processing'
+):
+    file_path = manifest_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
+        manifest_cache.pop(file_path, None)
+        return None
+    cache_key = (stat_result.st_mtime_ns, stat_result.st_size)
+    cached = manifest_cache.get(file_path)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    # Manifests hold entries for the segments written (keyed by
+    # manifest_key()) and whether the writer finished
+    manifest = {
+        'segments': dict(),
+        'complete': False
+    }
+    with open(file_path, 'r') as fp:
+        for line_number, line in enumerate(fp, start=1):
+            try:
+                manifest_entry = json.loads(line)
+                mode = manifest_entry['mode']
+                if mode == 'complete':
+                    manifest['complete'] = True
+                    continue
+                key = manifest_entry['time_segment_start']
+                num_rows = manifest_entry['num_rows']
+                num_bytes = manifest_entry['num_bytes']
+            except (ValueError, KeyError, TypeError):
+                # A torn or lost line could hide data for a segment, so rather
+                # than skip it we stop trusting this manifest and let readers
+                # look for every segment on disk
+                logger.warning('Unreadable entry at line {} of manifest file \'{}\'. Ignoring manifest'.format(
+                    line_number,
+                    file_path
+                ))
+                manifest = None
+                break
+            if mode == 'write':
+                manifest['segments'][key] = {
+                    'num_rows': num_rows,
+                    'num_bytes': num_bytes
+                }
+            elif mode == 'append':
+                existing_manifest_entry = manifest['segments'].get(key, {'num_rows': 0, 'num_bytes': 0})
+                manifest['segments'][key] = {
+                    'num_rows': existing_manifest_entry['num_rows'] + num_rows,
+                    'num_bytes': existing_manifest_entry['num_bytes'] + num_bytes
+                }
+            elif mode == 'delete':
+                manifest['segments'].pop(key, None)
+    manifest_cache[file_path] = (cache_key, manifest)
+    return manifest
+
+def append_manifest_entry(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    time_segment_start,
+    mode,
+    num_rows=0,
+    num_bytes=0,
+    pose_processing_subdirectory='pose_processing'
+):
+    file_path = manifest_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    line = json.dumps({
+        'time_segment_start': manifest_key(time_segment_start),
+        'mode': mode,
+        'num_rows': int(num_rows),
+        'num_bytes': int(num_bytes)
+    }) + '\n'
+    append_line(
+        file_path=file_path,
+        line=line
+    )
+
+def mark_manifest_complete(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    pose_processing_subdirectory='pose_processing'
+):
+    # Records that every segment with data for this inference has its own
+    # manifest entry. Stages call this once they have written all of their
+    # output, which lets readers skip segments the manifest doesn't list
+    # without looking for them on disk. Entries appended later (and the
+    # segment entries of a run that never gets this far) are still honored
+    file_path = manifest_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    append_line(
+        file_path=file_path,
+        line=json.dumps({'mode': 'complete'}) + '\n'
+    )
+
+def append_line(
+    file_path,
+    line
+):
+    # A single write to a file opened for appending keeps lines from
+    # concurrent writers intact on local filesystems. That isn't guaranteed
+    # over NFS, so readers treat an unreadable line as a sign that the file
+    # can't be trusted, and a short write is reported rather than ignored
+    line_bytes = line.encode('utf-8')
+    fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        num_bytes_written = os.write(fd, line_bytes)
+    finally:
+        os.close(fd)
+    if num_bytes_written != len(line_bytes):
+        raise OSError('Wrote {} of {} bytes of line to \'{}\''.format(
+            num_bytes_written,
+            len(line_bytes),
+            file_path
+        ))
+
+def manifest_file_path(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    pose_processing_subdirectory='pose_processing'
+):
+    directory_path, filename = data_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        time_segment_start=None,
+        object_type='dataframe',
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    return os.path.join(
+        directory_path,
+        '{}_manifest.jsonl'.format(os.path.splitext(filename)[0])
+    )
+
+def manifest_key(time_segment_start):
+    return time_segment_start.astimezone(datetime.timezone.utc).isoformat()
+
+def fetch_poses_by_id(
+    pose_ids,
+    base_dir,
+    environment_id,
+    inference_ids,
+    pipeline_stage='pose_reconstruction_3d',
+    filename_stem='poses_3d',
+    start=None,
+    end=None,
+    pose_processing_subdirectory='pose_processing'
+):
+    # Uses the ID index written alongside the pose data to read only the
+    # segments that contain the requested poses, each one once. Falls back on
+    # scanning the segments between start and end for inferences written
+    # without an ID index, and for any poses the ID index didn't lead to
+    if isinstance(inference_ids, str):
         inference_ids = [inference_ids]
-    elif isinstance(inference_ids, (list, tuple, set)):
-        pass
-    else:
-        raise ValueError('Specified inference IDs must be of type str, list, tuple, or set')
-    if len(inference_ids) == 0:
-        raise ValueError('Must specify at least one inference ID')
-    data_object_list = list()
+    pose_ids = list(pose_ids)
+    poses_df_list = list()
+    indexed_inference_ids = list()
     for inference_id in inference_ids:
-        directory_path, filename = data_file_path(
+        id_index = fetch_id_index_local(
             base_dir=base_dir,
             pipeline_stage=pipeline_stage,
             environment_id=environment_id,
             filename_stem=filename_stem,
             inference_id=inference_id,
-            time_segment_start=time_segment_start,
-            object_type=object_type,
             pose_processing_subdirectory=pose_processing_subdirectory
         )
-        file_path = os.path.join(
-            directory_path,
-            filename
-        )
-        if object_type == 'dataframe':
-            if os.path.exists(file_path):
-                data_object_item = pd.read_pickle(file_path)
-                if data_ids is not None:
-                    data_object_item = data_object_item.reindex(
-                        data_object_item.index.intersection(data_ids)
-                    )
-            else:
-                data_object_item = pd.DataFrame()
-        elif object_type == 'dict':
-            if os.path.exists(file_path):
-                with open(file_path, 'rb') as fp:
-                    data_object_item = pickle.load(fp)
-                if data_ids is not None:
-                    raise ValueError('Specification of data IDs is only available for dataframe objects')
+        if id_index is None:
+            if start is None or end is None:
+                raise ValueError('No ID index found for inference ID {}. Must specify start and end'.format(
+                    inference_id
+                ))
+            poses_df_list.append(fetch_data_local_by_time_segment(
+                start=start,
+                end=end,
+                base_dir=base_dir,
+                pipeline_stage=pipeline_stage,
+                environment_id=environment_id,
+                filename_stem=filename_stem,
+                inference_ids=inference_id,
+                data_ids=pose_ids,
+                sort_field=None,
+                object_type='dataframe',
+                pose_processing_subdirectory=pose_processing_subdirectory
+            ))
+            continue
+        indexed_inference_ids.append(inference_id)
+        pose_ids_by_segment = dict()
+        for pose_id, key in zip(pose_ids, lookup_id_index(id_index, pose_ids)):
+            if key is None:
+                continue
+            pose_ids_by_segment.setdefault(key, list()).append(pose_id)
+        for key in sorted(pose_ids_by_segment.keys()):
+            poses_df_list.append(fetch_data_local(
+                base_dir=base_dir,
+                pipeline_stage=pipeline_stage,
+                environment_id=environment_id,
+                filename_stem=filename_stem,
+                inference_ids=inference_id,
+                data_ids=pose_ids_by_segment[key],
+                sort_field=None,
+                time_segment_start=datetime.datetime.fromisoformat(key),
+                object_type='dataframe',
+                pose_processing_subdirectory=pose_processing_subdirectory
+            ))
+    poses_df_list = [poses_df for poses_df in poses_df_list if len(poses_df) > 0]
+    if len(indexed_inference_ids) > 0:
+        found_pose_ids = set()
+        for poses_df in poses_df_list:
+            found_pose_ids.update(poses_df.index)
+        missing_pose_ids = [pose_id for pose_id in pose_ids if pose_id not in found_pose_ids]
+        if len(missing_pose_ids) > 0:
+            if start is None or end is None:
+                logger.warning('{} of the requested pose IDs were not found through the ID index. Specify start and end to scan for them'.format(
+                    len(missing_pose_ids)
+                ))
             else:
-                data_object_item = dict()
-        else:
-            raise ValueError('Only allowed object types are \'dataframe\' and \'dict\'')
-        data_object_list.append(data_object_item)
-    if len(data_object_list) == 1:
-        data_object = data_object_list[0]
-        return data_object
-    else:
-        if object_type != 'dataframe':
-            raise ValueError('Specification of multiple inference IDs is only available for dataframe objects')
-        data_object = pd.concat(data_object_list)
-        if sort_field is not None:
-            data_object.sort_values(sort_field, inplace=True)
-    return data_object
+                logger.info('{} of the requested pose IDs were not found through the ID index. Scanning time segments for them'.format(
+                    len(missing_pose_ids)
+                ))
+                poses_df = fetch_data_local_by_time_segment(
+                    start=start,
+                    end=end,
+                    base_dir=base_dir,
+                    pipeline_stage=pipeline_stage,
+                    environment_id=environment_id,
+                    filename_stem=filename_stem,
+                    inference_ids=indexed_inference_ids,
+                    data_ids=missing_pose_ids,
+                    sort_field=None,
+                    object_type='dataframe',
+                    pose_processing_subdirectory=pose_processing_subdirectory
+                )
+                if len(poses_df) > 0:
+                    poses_df_list.append(poses_df)
+    if len(poses_df_list) == 0:
+        return pd.DataFrame()
+    poses_df = pd.concat(poses_df_list)
+    return poses_df
 
-def delete_data_local(
+def fetch_id_index_local(
     base_dir,
     pipeline_stage,
     environment_id,
     filename_stem,
-    inference_ids,
-    time_segment_start=None,
-    object_type='dataframe',
+    inference_id,
     pose_processing_subdirectory='pose_processing'
 ):
-    if isinstance(inference_ids, str):
-        inference_ids = [inference_ids]
-    elif isinstance(inference_ids, (list, tuple, set)):
-        pass
-    else:
-        raise ValueError('Specified inference IDs must be of type str, list, tuple, or set')
-    for inference_id in inference_ids:
-        directory_path, filename = data_file_path(
-            base_dir=base_dir,
-            pipeline_stage=pipeline_stage,
-            environment_id=environment_id,
-            filename_stem=filename_stem,
-            inference_id=inference_id,
-            time_segment_start=time_segment_start,
+    file_path = id_index_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
+        id_index_cache.pop(file_path, None)
+        return None
+    cache_key = (stat_result.st_mtime_ns, stat_result.st_size)
+    cached = id_index_cache.get(file_path)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    data_ids_by_segment = dict()
+    with open(file_path, 'r') as fp:
+        for line_number, line in enumerate(fp, start=1):
+            try:
+                id_index_entry = json.loads(line)
+                key = id_index_entry['time_segment_start']
+                mode = id_index_entry['mode']
+                data_ids = id_index_entry['data_ids']
+            except (ValueError, KeyError, TypeError):
+                # A torn or lost line could hide poses, so rather than skip it
+                # we stop trusting this index and fall back on scanning
+                logger.warning('Unreadable entry at line {} of ID index file \'{}\'. Ignoring ID index'.format(
+                    line_number,
+                    file_path
+                ))
+                id_index_cache[file_path] = (cache_key, None)
+                return None
+            if mode == 'write':
+                data_ids_by_segment[key] = list(data_ids)
+            elif mode == 'append':
+                data_ids_by_segment.setdefault(key, list()).extend(data_ids)
+            elif mode == 'delete':
+                data_ids_by_segment.pop(key, None)
+    # Stored as a sorted array of encoded IDs with a segment number for each,
+    # which takes a fraction of the memory of a dict entry per pose
+    keys = sorted(data_ids_by_segment.keys())
+    data_ids = np.array(
+        [data_id.encode('utf-8') for key in keys for data_id in data_ids_by_segment[key]],
+        dtype='S'
+    )
+    segment_numbers = np.repeat(
+        np.arange(len(keys), dtype='int32'),
+        [len(data_ids_by_segment[key]) for key in keys]
+    )
+    sort_order = np.argsort(data_ids, kind='stable')
+    id_index = {
+        'keys': keys,
+        'data_ids': data_ids[sort_order],
+        'segment_numbers': segment_numbers[sort_order]
+    }
+    id_index_cache[file_path] = (cache_key, id_index)
+    return id_index
+
+def lookup_id_index(
+    id_index,
+    data_ids
+):
+    # Returns the time segment key for each data ID (None if not indexed). If
+    # an ID was written more than once, its latest segment wins
+    if len(data_ids) == 0 or len(id_index['data_ids']) == 0:
+        return [None]*len(data_ids)
+    query_data_ids = np.array(
+        [str(data_id).encode('utf-8') for data_id in data_ids],
+        dtype='S'
+    )
+    positions = np.searchsorted(id_index['data_ids'], query_data_ids, side='right') - 1
+    positions_clipped = np.clip(positions, 0, None)
+    found = (positions >= 0) & (id_index['data_ids'][positions_clipped] == query_data_ids)
+    return [
+        id_index['keys'][id_index['segment_numbers'][position]] if is_found else None
+        for position, is_found in zip(positions_clipped, found)
+    ]
+
+def append_id_index_entry(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    time_segment_start,
+    mode,
+    data_ids=None,
+    pose_processing_subdirectory='pose_processing'
+):
+    file_path = id_index_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    if data_ids is None:
+        data_ids = list()
+    line = json.dumps({
+        'time_segment_start': manifest_key(time_segment_start),
+        'mode': mode,
+        'data_ids': [str(data_id) for data_id in data_ids]
+    }) + '\n'
+    append_line(
+        file_path=file_path,
+        line=line
+    )
+
+def id_index_file_path(
+    base_dir,
+    pipeline_stage,
+    environment_id,
+    filename_stem,
+    inference_id,
+    pose_processing_subdirectory='pose_processing'
+):
+    directory_path, filename = data_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        time_segment_start=None,
+        object_type='dataframe',
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    return os.path.join(
+        directory_path,
+        '{}_id_index.jsonl'.format(os.path.splitext(filename)[0])
+    )
+
+def read_main_data(
+    directory_path,
+    filename,
+    object_type='dataframe',
+    columns=None,
+    keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE,
+    segment_sources=None
+):
+    # The main data for a segment comes from its own file if there is one and
+    # otherwise from an hour or day pack (see pack_time_segments_local())
+    if segment_sources is None:
+        segment_sources = fetch_segment_sources(
+            directory_path=directory_path,
+            filename=filename
+        )
+    existing_file_path, pack_entry, part_file_paths = segment_sources
+    if existing_file_path is not None:
+        return read_data_file(
+            file_path=existing_file_path,
             object_type=object_type,
-            pose_processing_subdirectory=pose_processing_subdirectory
+            columns=columns,
+            keypoint_dtype=keypoint_dtype
         )
-        file_path = os.path.join(
-            directory_path,
-            filename
+    if pack_entry is not None:
+        return read_pack_entry(
+            pack_entry=pack_entry,
+            object_type=object_type,
+            columns=columns,
+            keypoint_dtype=keypoint_dtype
         )
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    return None
 
-def data_file_path(
+def fetch_segment_sources(
+    directory_path,
+    filename
+):
+    # Returns (main file path, pack entry, part file paths) for a segment. The
+    # pack indexes are cached, so they are checked first, and the segment
+    # directory is then listed once (it usually no longer exists once the
+    # segment has been packed) rather than probing each file it might hold
+    pack_entry = fetch_pack_entry(
+        directory_path=directory_path,
+        filename=filename
+    )
+    try:
+        directory_entry_names = set(os.listdir(directory_path))
+    except (FileNotFoundError, NotADirectoryError):
+        return None, pack_entry, list()
+    filename_stem = os.path.splitext(filename)[0]
+    existing_file_path = None
+    for extension in data_file_extensions(filename):
+        if '{}.{}'.format(filename_stem, extension) in directory_entry_names:
+            existing_file_path = os.path.join(
+                directory_path,
+                '{}.{}'.format(filename_stem, extension)
+            )
+            break
+    parts_directory_path = data_parts_directory_path(
+        directory_path=directory_path,
+        filename=filename
+    )
+    if os.path.basename(parts_directory_path) in directory_entry_names:
+        part_file_paths = data_part_file_paths(
+            directory_path=directory_path,
+            filename=filename
+        )
+    else:
+        part_file_paths = list()
+    return existing_file_path, pack_entry, part_file_paths
+
+def pack_time_segments_local(
+    period_start,
     base_dir,
     pipeline_stage,
     environment_id,
     filename_stem,
     inference_id,
-    time_segment_start=None,
-    object_type='dataframe',
+    period='day',
+    delete_segment_files=True,
     pose_processing_subdirectory='pose_processing'
 ):
-    directory_path = os.path.join(
-        base_dir,
-        pose_processing_subdirectory,
-        pipeline_stage,
-        environment_id
+    segment_directory_path, filename = data_file_path(
+        base_dir=base_dir,
+        pipeline_stage=pipeline_stage,
+        environment_id=environment_id,
+        filename_stem=filename_stem,
+        inference_id=inference_id,
+        time_segment_start=period_start,
+        object_type='dataframe',
+        pose_processing_subdirectory=pose_processing_subdirectory
     )
-    if time_segment_start is not None:
-        time_segment_start_utc = time_segment_start.astimezone(datetime.timezone.utc)
-        directory_path = os.path.join(
-            directory_path,
-            '{:04d}'.format(time_segment_start_utc.year),
-            '{:02d}'.format(time_segment_start_utc.month),
-            '{:02d}'.format(time_segment_start_utc.day),
-            '{:02d}-{:02d}-{:02d}'.format(
-                time_segment_start_utc.hour,
-                time_segment_start_utc.minute,
-                time_segment_start_utc.second,
+    day_directory_path, first_segment_directory_name = os.path.split(segment_directory_path)
+    hour_string = first_segment_directory_name[:2]
+    if period == 'day':
+        pack_file_path = day_pack_file_path(
+            day_directory_path=day_directory_path,
+            filename=filename
+        )
+    elif period == 'hour':
+        pack_file_path = hour_pack_file_path(
+            day_directory_path=day_directory_path,
+            filename=filename,
+            hour_string=hour_string
+        )
+    else:
+        raise ValueError('Pack period must be \'day\' or \'hour\'')
+    if not os.path.isdir(day_directory_path):
+        return 0
+    segment_directory_names = set(
+        directory_name for directory_name in os.listdir(day_directory_path)
+        if segment_directory_re.fullmatch(directory_name) is not None
+        and (period == 'day' or directory_name.startswith(hour_string))
+    )
+    # Segments already packed at this level (or, when packing a day, in any of
+    # its hour packs) are carried over into the new pack
+    source_pack_file_paths = [pack_file_path]
+    if period == 'day':
+        source_pack_file_paths.extend(
+            hour_pack_file_path(
+                day_directory_path=day_directory_path,
+                filename=filename,
+                hour_string='{:02d}'.format(hour)
             )
+            for hour in range(24)
         )
-    filename = '{}_{}.pkl'.format(
-        filename_stem,
-        inference_id
+    for source_pack_file_path in source_pack_file_paths:
+        pack_index = fetch_pack_index(source_pack_file_path)
+        if pack_index is not None:
+            segment_directory_names.update(pack_index.keys())
+    packed_segment_directory_names = list()
+    packed_file_keys = dict()
+    def generate_pack_entries():
+        for segment_directory_name in sorted(segment_directory_names):
+            directory_path = os.path.join(day_directory_path, segment_directory_name)
+            # Fold any appended parts into the segment file first
+            compact_data_directory(
+                directory_path=directory_path,
+                filename=filename
+            )
+            existing_file_path = existing_data_file_path(
+                directory_path=directory_path,
+                filename=filename
+            )
+            if existing_file_path is not None:
+                with open(existing_file_path, 'rb') as fp:
+                    # Remember which version of the file was packed, so that a
+                    # file rewritten by another writer in the meantime isn't
+                    # deleted below
+                    packed_file_keys[existing_file_path] = file_identity(os.fstat(fp.fileno()))
+                    data_bytes = fp.read()
+                extension = os.path.splitext(existing_file_path)[1].lstrip('.')
+            else:
+                packed_data = read_packed_data_bytes(
+                    directory_path=directory_path,
+                    filename=filename
+                )
+                if packed_data is None:
+                    continue
+                data_bytes, extension = packed_data
+            packed_segment_directory_names.append(segment_directory_name)
+            yield segment_directory_name, extension, data_bytes
+    write_pack_file(
+        pack_file_path=pack_file_path,
+        pack_entries=generate_pack_entries()
     )
-    return directory_path, filename
+    if period == 'day':
+        for source_pack_file_path in source_pack_file_paths[1:]:
+            if os.path.exists(source_pack_file_path):
+                os.remove(source_pack_file_path)
+    if delete_segment_files:
+        # Only the segment files whose contents went into the pack are removed.
+        # Parts appended since compaction are left alone (readers merge them
+        # with the packed data), as are files written since they were packed
+        for segment_directory_name in packed_segment_directory_names:
+            directory_path = os.path.join(day_directory_path, segment_directory_name)
+            for extension in set(process_pose_data.shared_constants.DATA_FILE_EXTENSIONS.values()):
+                file_path = os.path.join(
+                    directory_path,
+                    '{}.{}'.format(os.path.splitext(filename)[0], extension)
+                )
+                if file_path not in packed_file_keys:
+                    continue
+                try:
+                    stat_result = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                if file_identity(stat_result) != packed_file_keys[file_path]:
+                    logger.warning('File \'{}\' changed after it was packed. Leaving it in place'.format(
+                        file_path
+                    ))
+                    continue
+                os.remove(file_path)
+                invalidate_segment_cache(file_path)
+            try:
+                os.rmdir(directory_path)
+            except OSError:
+                pass
+    return len(packed_segment_directory_names)
+
+def write_pack_file(
+    pack_file_path,
+    pack_entries
+):
+    # Pack layout: the serialized segment files back to back, followed by a
+    # pickled index of {SEGMENT_DIRECTORY_NAME: (OFFSET, LENGTH, EXTENSION)},
+    # the index length as an unsigned 64-bit integer, and a magic string
+    temp_file_path = '{}.{}.tmp'.format(
+        pack_file_path,
+        uuid4().hex
+    )
+    try:
+        pack_index = OrderedDict()
+        with open(temp_file_path, 'wb') as fp:
+            for segment_directory_name, extension, data_bytes in pack_entries:
+                pack_index[segment_directory_name] = (fp.tell(), len(data_bytes), extension)
+                fp.write(data_bytes)
+            pack_index_bytes = pickle.dumps(pack_index)
+            fp.write(pack_index_bytes)
+            fp.write(struct.pack('<Q', len(pack_index_bytes)))
+            fp.write(PACK_FILE_MAGIC)
+        if len(pack_index) > 0:
+            os.replace(temp_file_path, pack_file_path)
+        elif os.path.exists(pack_file_path):
+            os.remove(pack_file_path)
+    finally:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        invalidate_segment_cache(pack_file_path)
+
+def fetch_pack_index(pack_file_path):
+    pack = fetch_pack(pack_file_path)
+    if pack is None:
+        return None
+    return pack['pack_index']
+
+def fetch_pack(pack_file_path):
+    # Returns the parsed index of a pack along with a handle that stays open
+    # for reads until the pack is replaced or removed or falls out of the
+    # cache (which holds up to MAX_OPEN_PACK_FILES packs)
+    try:
+        stat_result = os.stat(pack_file_path)
+    except FileNotFoundError:
+        with pack_index_cache_lock:
+            pack_index_cache.pop(pack_file_path, None)
+        return None
+    cache_key = (stat_result.st_mtime_ns, stat_result.st_size)
+    with pack_index_cache_lock:
+        cached = pack_index_cache.get(pack_file_path)
+        if cached is not None and cached[0] == cache_key:
+            pack_index_cache.move_to_end(pack_file_path)
+            return cached[1]
+    footer_length = 8 + len(PACK_FILE_MAGIC)
+    fp = open(pack_file_path, 'rb')
+    try:
+        file_size = os.fstat(fp.fileno()).st_size
+        fp.seek(file_size - footer_length)
+        footer = fp.read(footer_length)
+        if footer[8:] != PACK_FILE_MAGIC:
+            raise ValueError('File \'{}\' is not a valid pack file'.format(pack_file_path))
+        pack_index_length = struct.unpack('<Q', footer[:8])[0]
+        fp.seek(file_size - footer_length - pack_index_length)
+        pack_index = pickle.loads(fp.read(pack_index_length))
+    except Exception:
+        fp.close()
+        raise
+    pack = {
+        'pack_file_path': pack_file_path,
+        'pack_index': pack_index,
+        'fp': fp,
+        'cache_key': cache_key
+    }
+    # Readers may still hold the handle of a pack this replaces or evicts, so
+    # those are left to be closed when they are garbage collected
+    with pack_index_cache_lock:
+        pack_index_cache[pack_file_path] = (cache_key, pack)
+        pack_index_cache.move_to_end(pack_file_path)
+        while len(pack_index_cache) > process_pose_data.shared_constants.MAX_OPEN_PACK_FILES:
+            pack_index_cache.popitem(last=False)
+    return pack
+
+def close_pack_files():
+    # Closes the handles of all cached packs. Only safe when no reads are in
+    # flight; packs are reopened as needed
+    with pack_index_cache_lock:
+        packs = [pack for cache_key, pack in pack_index_cache.values()]
+        pack_index_cache.clear()
+        pack_file_names_cache.clear()
+    for pack in packs:
+        pack['fp'].close()
+
+def fetch_pack_file_names(day_directory_path):
+    # Returns the names of the pack files in a day directory. Creating,
+    # replacing, or removing a pack changes the directory's modification
+    # time, so one stat of the directory per lookup keeps this current
+    try:
+        stat_result = os.stat(day_directory_path)
+    except (FileNotFoundError, NotADirectoryError):
+        with pack_index_cache_lock:
+            pack_file_names_cache.pop(day_directory_path, None)
+        return set()
+    cache_key = (stat_result.st_mtime_ns, stat_result.st_size)
+    with pack_index_cache_lock:
+        cached = pack_file_names_cache.get(day_directory_path)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    pack_file_names = set(
+        directory_entry_name for directory_entry_name in os.listdir(day_directory_path)
+        if directory_entry_name.endswith('.pack')
+    )
+    # A directory changed within the last couple of seconds could change
+    # again without its (possibly coarse) modification time moving, so that
+    # listing isn't cached
+    if time.time() - stat_result.st_mtime > 2:
+        with pack_index_cache_lock:
+            pack_file_names_cache[day_directory_path] = (cache_key, pack_file_names)
+    return pack_file_names
+
+def fetch_pack_entry(
+    directory_path,
+    filename
+):
+    # Returns (pack, offset, length, extension) for a packed segment
+    day_directory_path, segment_directory_name = os.path.split(directory_path)
+    if segment_directory_re.fullmatch(segment_directory_name) is None:
+        return None
+    pack_file_names = fetch_pack_file_names(day_directory_path)
+    if len(pack_file_names) == 0:
+        return None
+    for pack_file_path in [
+        hour_pack_file_path(
+            day_directory_path=day_directory_path,
+            filename=filename,
+            hour_string=segment_directory_name[:2]
+        ),
+        day_pack_file_path(
+            day_directory_path=day_directory_path,
+            filename=filename
+        )
+    ]:
+        if os.path.basename(pack_file_path) not in pack_file_names:
+            continue
+        pack = fetch_pack(pack_file_path)
+        if pack is None or segment_directory_name not in pack['pack_index']:
+            continue
+        offset, length, extension = pack['pack_index'][segment_directory_name]
+        return pack, offset, length, extension
+    return None
+
+def read_pack_entry_bytes(pack_entry):
+    pack, offset, length, extension = pack_entry
+    fd = pack['fp'].fileno()
+    # Positional reads leave the shared handle's file offset alone, so
+    # threads can read from the same pack at once
+    chunks = list()
+    while length > 0:
+        chunk = os.pread(fd, length, offset)
+        if len(chunk) == 0:
+            raise ValueError('Pack file \'{}\' ended before the end of an entry'.format(pack['pack_file_path']))
+        chunks.append(chunk)
+        offset += len(chunk)
+        length -= len(chunk)
+    return b''.join(chunks)
+
+def read_packed_data_bytes(
+    directory_path,
+    filename
+):
+    pack_entry = fetch_pack_entry(
+        directory_path=directory_path,
+        filename=filename
+    )
+    if pack_entry is None:
+        return None
+    return read_pack_entry_bytes(pack_entry), pack_entry[3]
+
+def remove_packed_data(
+    directory_path,
+    filename
+):
+    day_directory_path, segment_directory_name = os.path.split(directory_path)
+    if segment_directory_re.fullmatch(segment_directory_name) is None:
+        return
+    for pack_file_path in [
+        hour_pack_file_path(
+            day_directory_path=day_directory_path,
+            filename=filename,
+            hour_string=segment_directory_name[:2]
+        ),
+        day_pack_file_path(
+            day_directory_path=day_directory_path,
+            filename=filename
+        )
+    ]:
+        pack_index = fetch_pack_index(pack_file_path)
+        if pack_index is None or segment_directory_name not in pack_index:
+            continue
+        def generate_pack_entries():
+            with open(pack_file_path, 'rb') as fp:
+                for pack_segment_directory_name, (offset, length, extension) in pack_index.items():
+                    if pack_segment_directory_name == segment_directory_name:
+                        continue
+                    fp.seek(offset)
+                    yield pack_segment_directory_name, extension, fp.read(length)
+        write_pack_file(
+            pack_file_path=pack_file_path,
+            pack_entries=generate_pack_entries()
+        )
+
+def file_identity(stat_result):
+    return (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+def day_pack_file_path(
+    day_directory_path,
+    filename
+):
+    return os.path.join(
+        day_directory_path,
+        '{}.pack'.format(os.path.splitext(filename)[0])
+    )
+
+def hour_pack_file_path(
+    day_directory_path,
+    filename,
+    hour_string
+):
+    return os.path.join(
+        day_directory_path,
+        '{}_{}.pack'.format(
+            os.path.splitext(filename)[0],
+            hour_string
+        )
+    )
+
+def data_parts_directory_path(
+    directory_path,
+    filename
+):
+    parts_directory_path = os.path.join(
+        directory_path,
+        '{}_parts'.format(os.path.splitext(filename)[0])
+    )
+    return parts_directory_path
+
+def data_part_file_paths(
+    directory_path,
+    filename
+):
+    parts_directory_path = data_parts_directory_path(
+        directory_path=directory_path,
+        filename=filename
+    )
+    try:
+        part_filenames = os.listdir(parts_directory_path)
+    except FileNotFoundError:
+        return list()
+    # Part filenames start with a zero-padded write time, so sorting by name
+    # recovers write order
+    part_file_paths = [
+        os.path.join(parts_directory_path, part_filename)
+        for part_filename in sorted(part_filenames)
+        if os.path.splitext(part_filename)[1].lstrip('.') in process_pose_data.shared_constants.DATA_FILE_EXTENSIONS.values()
+    ]
+    return part_file_paths
 
 def convert_pose_tracks_3d_to_df(
-    pose_tracks_3d
+    pose_tracks_3d,
+    encode_ids=False
 ):
-    pose_3d_ids_with_tracks_df_list = list()
-    for pose_track_3d_id, pose_track_3d in pose_tracks_3d.items():
-        pose_3d_ids_with_tracks_single_track_df = pd.DataFrame(
-            {'pose_track_3d_id': pose_track_3d_id},
-            index=pose_track_3d['pose_3d_ids']
+    # Build the pose ID and track ID columns directly rather than one small
+    # dataframe per track. With encode_ids, track IDs are categorical, with
+    # codes assigned by track position
+    pose_track_3d_ids = list(pose_tracks_3d.keys())
+    pose_3d_ids_list = [pose_tracks_3d[pose_track_3d_id]['pose_3d_ids'] for pose_track_3d_id in pose_track_3d_ids]
+    num_poses = np.array([len(pose_3d_ids) for pose_3d_ids in pose_3d_ids_list], dtype='int64')
+    pose_3d_ids = pd.Index(
+        [pose_3d_id for track_pose_3d_ids in pose_3d_ids_list for pose_3d_id in track_pose_3d_ids],
+        name='pose_3d_id'
+    )
+    if encode_ids:
+        sort_order = np.argsort(np.asarray(pose_track_3d_ids, dtype='object'), kind='stable')
+        codes = np.empty(len(pose_track_3d_ids), dtype='int64')
+        codes[sort_order] = np.arange(len(pose_track_3d_ids))
+        pose_track_3d_id_column = pd.Categorical.from_codes(
+            np.repeat(codes, num_poses),
+            categories=pd.Index(np.asarray(pose_track_3d_ids, dtype='object')[sort_order])
         )
-        pose_3d_ids_with_tracks_single_track_df.index.name='pose_3d_id'
-        pose_3d_ids_with_tracks_df_list.append(pose_3d_ids_with_tracks_single_track_df)
-    pose_3d_ids_with_tracks_df = pd.concat(pose_3d_ids_with_tracks_df_list)
+    else:
+        pose_track_3d_id_column = np.repeat(np.asarray(pose_track_3d_ids, dtype='object'), num_poses)
+    pose_3d_ids_with_tracks_df = pd.DataFrame(
+        {'pose_track_3d_id': pose_track_3d_id_column},
+        index=pose_3d_ids
+    )
     return pose_3d_ids_with_tracks_df
 
 def add_short_track_labels(
@@ -1478,6 +4272,10 @@ def generate_alphapose_batch_directory_path(
     )
     return path
 
+segment_directory_re = re.compile(r'[0-9]{2}-[0-9]{2}-[0-9]{2}')
+
+alphapose_frame_filename_re = re.compile(r'poses-(?P<frame_number_string>[0-9]+)\.json')
+
 image_filename_re = re.compile(r'(?P<minute_string>[0-9]{2})-(?P<second_string>[0-9]{2})_(?P<frame_number_string>[0-9]{3})\.png')
 def parse_alphapose_image_filename(filename):
     m = image_filename_re.match(filename)
@@ -1488,6 +4286,81 @@ def parse_alphapose_image_filename(filename):
     frame_number = int(m.group('frame_number_string'))
     return minute, second, frame_number
 
+def generate_alphapose_file_index(
+    start,
+    end,
+    base_dir,
+    environment_id,
+    camera_assignment_ids=None,
+    alphapose_subdirectory='prepared',
+    tree_structure='file-per-frame'
+):
+    # Walks the Alphapose output tree once and returns a dict mapping each
+    # time segment start to a dict mapping each camera assignment ID to the
+    # sorted list of (frame number, path) tuples for that time segment
+    if tree_structure != 'file-per-frame':
+        raise NotImplementedError('Only \'file-per-frame\' tree structure currently supported')
+    time_segment_start_list = generate_time_segment_start_list(
+        start=start,
+        end=end
+    )
+    time_segment_start_set = set(time_segment_start_list)
+    environment_directory_path = os.path.join(
+        base_dir,
+        alphapose_subdirectory,
+        environment_id
+    )
+    if camera_assignment_ids is None:
+        if not os.path.isdir(environment_directory_path):
+            return dict()
+        camera_assignment_ids = sorted([
+            directory_entry.name for directory_entry in os.scandir(environment_directory_path)
+            if directory_entry.is_dir()
+        ])
+    dates = sorted(set([time_segment_start.date() for time_segment_start in time_segment_start_list]))
+    alphapose_file_index = dict()
+    for camera_assignment_id in camera_assignment_ids:
+        for date in dates:
+            day_directory_path = os.path.join(
+                environment_directory_path,
+                camera_assignment_id,
+                '{:04d}'.format(date.year),
+                '{:02d}'.format(date.month),
+                '{:02d}'.format(date.day)
+            )
+            if not os.path.isdir(day_directory_path):
+                continue
+            with os.scandir(day_directory_path) as segment_directory_entries:
+                for segment_directory_entry in segment_directory_entries:
+                    if segment_directory_re.fullmatch(segment_directory_entry.name) is None:
+                        continue
+                    hour_string, minute_string, second_string = segment_directory_entry.name.split('-')
+                    time_segment_start = datetime.datetime(
+                        date.year,
+                        date.month,
+                        date.day,
+                        int(hour_string),
+                        int(minute_string),
+                        int(second_string),
+                        tzinfo=datetime.timezone.utc
+                    )
+                    if time_segment_start not in time_segment_start_set:
+                        continue
+                    frame_files = list()
+                    with os.scandir(segment_directory_entry.path) as frame_file_entries:
+                        for frame_file_entry in frame_file_entries:
+                            m = alphapose_frame_filename_re.fullmatch(frame_file_entry.name)
+                            if m is None:
+                                continue
+                            frame_files.append((
+                                int(m.group('frame_number_string')),
+                                frame_file_entry.path
+                            ))
+                    if len(frame_files) == 0:
+                        continue
+                    alphapose_file_index.setdefault(time_segment_start, dict())[camera_assignment_id] = sorted(frame_files)
+    return alphapose_file_index
+
 def alphapose_data_file_glob_pattern(
     base_dir,
     environment_id=None,
@@ -1628,7 +4501,8 @@ def convert_assignment_ids_to_camera_device_ids(
             client_secret=client_secret
         )
     poses_2d_df = poses_2d_df.copy()
-    poses_2d_df['camera_id'] = poses_2d_df['assignment_id'].apply(lambda assignment_id: camera_device_id_lookup.get(assignment_id))
+    # For categorical assignment IDs, map() only looks up each distinct ID once
+    poses_2d_df['camera_id'] = poses_2d_df['assignment_id'].map(lambda assignment_id: camera_device_id_lookup.get(assignment_id))
     poses_2d_df.drop(columns='assignment_id', inplace=True)
     old_column_order = poses_2d_df.columns.tolist()
     new_column_order = [old_column_order[0], old_column_order[-1]] + old_column_order[1:-1]
@@ -1677,3 +4551,36 @@ def generate_time_segment_start_list(
         num_time_segments = math.ceil((end_utc - start_utc_floor).total_seconds()  / 10.0)
     time_segment_start_list = [start_utc_floor + i*datetime.timedelta(seconds=10) for i in range(num_time_segments)]
     return time_segment_start_list
+
+def generate_pack_period_start_list(
+    start,
+    end,
+    period='day'
+):
+    start_utc = start.astimezone(datetime.timezone.utc)
+    end_utc = end.astimezone(datetime.timezone.utc)
+    if period == 'day':
+        period_length = datetime.timedelta(days=1)
+        start_utc_floor = datetime.datetime(
+            year=start_utc.year,
+            month=start_utc.month,
+            day=start_utc.day,
+            tzinfo=start_utc.tzinfo
+        )
+    elif period == 'hour':
+        period_length = datetime.timedelta(hours=1)
+        start_utc_floor = datetime.datetime(
+            year=start_utc.year,
+            month=start_utc.month,
+            day=start_utc.day,
+            hour=start_utc.hour,
+            tzinfo=start_utc.tzinfo
+        )
+    else:
+        raise ValueError('Pack period must be \'day\' or \'hour\'')
+    if end_utc == start_utc_floor:
+        num_periods = 1
+    else:
+        num_periods = math.ceil((end_utc - start_utc_floor)/period_length)
+    period_start_list = [start_utc_floor + i*period_length for i in range(num_periods)]
+    return period_start_list
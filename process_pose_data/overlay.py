@@ -137,17 +137,21 @@ def overlay_poses(
     else:
         draw_keypoint_connectors = False
     logger.info('Processing video metadata')
+    poses_df = process_pose_data.local_io.sort_by_timestamp(poses_df)
     overlay_poses_video_args_list = list()
     for camera_id in camera_ids:
         logger.info('Processing video metadata for camera {}'.format(camera_name_dict[camera_id]))
         video_metadata_dict[camera_id] = OrderedDict(sorted(video_metadata_dict[camera_id].items()))
-        video_timestamps = video_metadata_dict[camera_id].keys()
-        for video_timestamp in video_timestamps:
-            # Add an extra second to capture extra frames in video
-            poses_time_segment_df = poses_df.loc[
-                (poses_df['timestamp'] >= video_timestamp ) &
-                (poses_df['timestamp'] < video_timestamp + datetime.timedelta(seconds=11))
-            ].copy()
+        video_timestamps = list(video_metadata_dict[camera_id].keys())
+        # Add an extra second to capture extra frames in video
+        poses_time_segment_df_list = process_pose_data.local_io.split_data_by_time_windows(
+            data_object=poses_df,
+            window_start_list=video_timestamps,
+            window_duration=datetime.timedelta(seconds=11),
+            presorted=True
+        )
+        for video_timestamp, poses_time_segment_df in zip(video_timestamps, poses_time_segment_df_list):
+            poses_time_segment_df = poses_time_segment_df.copy()
             video_metadata_dict[camera_id][video_timestamp]['video_output_path'] = os.path.join(
                 output_directory,
                 '{}_{}_{}.{}'.format(
@@ -536,21 +540,20 @@ def visualize_3d_pose_reconstruction(
         if (
             base_dir is None or
             environment_id is None or
-            pose_reconstruction_3d_inference_id is None or
-            pose_3d_timestamp is None
+            pose_reconstruction_3d_inference_id is None
         ):
-            raise ValueError('If poses_3d_df not supplied, must specify base_dir, and environment_id, pose_reconstruction_3d_inference_id, and pose_3d_timestamp')
-        poses_3d_df = process_pose_data.local_io.fetch_data_local_by_time_segment(
-            start=pose_3d_timestamp,
-            end=pose_3d_timestamp,
+            raise ValueError('If poses_3d_df not supplied, must specify base_dir, and environment_id, and pose_reconstruction_3d_inference_id')
+        # 3D pose timestamp is only needed for 3D pose data written without an
+        # ID index
+        poses_3d_df = process_pose_data.local_io.fetch_poses_by_id(
+            pose_ids=[pose_3d_id],
             base_dir=base_dir,
-            pipeline_stage='pose_reconstruction_3d',
             environment_id=environment_id,
-            filename_stem='poses_3d',
             inference_ids=pose_reconstruction_3d_inference_id,
-            data_ids=[pose_3d_id],
-            sort_field=None,
-            object_type='dataframe',
+            pipeline_stage='pose_reconstruction_3d',
+            filename_stem='poses_3d',
+            start=pose_3d_timestamp,
+            end=pose_3d_timestamp,
             pose_processing_subdirectory=pose_processing_subdirectory
         )
     # Extract 3D pose
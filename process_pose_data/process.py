@@ -1,6 +1,7 @@
 import process_pose_data.local_io
 import process_pose_data.overlay
 import process_pose_data.shared_constants
+import process_pose_data.reconstruct
 import poseconnect.reconstruct
 import poseconnect.track
 import poseconnect.identify
@@ -8,11 +9,13 @@ import pose_db_io
 import honeycomb_io
 import video_io
 import pandas as pd
+import numpy as np
 import tqdm
 import dateutil
 from uuid import uuid4
 import multiprocessing
 import functools
+import threading
 import logging
 import datetime
 import time
@@ -37,6 +40,9 @@ def extract_poses_2d_local(
     audience=None,
     client_id=None,
     client_secret=None,
+    compact_output=True,
+    parallel=False,
+    num_parallel_processes=None,
     task_progress_bar=False,
     notebook=False
 ):
@@ -72,6 +78,9 @@ def extract_poses_2d_local(
         audience (str): Honeycomb audience (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         client_id (str): Honeycomb client ID (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         client_secret (str): Honeycomb client secret (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
+        compact_output (bool): Boolean indicating whether appended output parts should be folded into a single file per segment at the end of the run (default is True)
+        parallel (bool): Boolean indicating whether to use multiple parallel processes (one for each camera) (default is False)
+        num_parallel_processes (int): Number of parallel processes in pool (otherwise defaults to the smaller of number of cores - 1 and number of cameras) (default is None)
         task_progress_bar (bool): Boolean indicating whether script should display a progress bar (default is False)
         notebook (bool): Boolean indicating whether script is being run in a Jupyter notebook (for progress bar display) (default is False)
 
@@ -164,27 +173,152 @@ def extract_poses_2d_local(
         pose_processing_subdirectory=pose_processing_subdirectory
     )
     # Extract 2D pose data and write processed data to local disk
-    for camera_id in camera_ids:
-        if pose_detection_2d_output_structure == 'gamma':
-            process_pose_data.local_io.extract_poses_2d_gamma(
+    if pose_detection_2d_output_structure not in process_pose_data.shared_constants.SUPPORTED_POSE_DETECTION_2D_OUTPUT_STRUCTURES:
+        raise ValueError('Only 2D pose detection output structures currently supported are {}'.format(
+            process_pose_data.shared_constants.SUPPORTED_POSE_DETECTION_2D_OUTPUT_STRUCTURES
+        ))
+    extracting_start = time.time()
+    if parallel:
+        # Each camera's batches are independent and appended output is
+        # written as separate part files, so cameras can run concurrently
+        extract_poses_2d_local_camera_partial = functools.partial(
+            extract_poses_2d_local_camera,
+            start=start,
+            end=end,
+            environment_id=environment_id,
+            inference_id=inference_id,
+            adjust_timestamps=adjust_timestamps,
+            base_dir=base_dir,
+            pose_detection_2d_subdirectory=pose_detection_2d_subdirectory,
+            pose_detection_2d_output_structure=pose_detection_2d_output_structure,
+            pose_processing_subdirectory=pose_processing_subdirectory,
+            task_progress_bar=False,
+            notebook=notebook
+        )
+        logger.info('Attempting to launch parallel processes')
+        if num_parallel_processes is None:
+            num_cpus=multiprocessing.cpu_count()
+            num_processes = max(1, min(num_cpus - 1, len(camera_ids)))
+            logger.info('Number of parallel processes not specified. {} CPUs detected. Launching {} processes'.format(
+                num_cpus,
+                num_processes
+            ))
+        else:
+            num_processes = num_parallel_processes
+        with multiprocessing.Pool(num_processes) as p:
+            if task_progress_bar:
+                if notebook:
+                    camera_timing_list = list(tqdm.notebook.tqdm(
+                        p.imap_unordered(
+                            extract_poses_2d_local_camera_partial,
+                            camera_ids
+                        ),
+                        total=len(camera_ids)
+                    ))
+                else:
+                    camera_timing_list = list(tqdm.tqdm(
+                        p.imap_unordered(
+                            extract_poses_2d_local_camera_partial,
+                            camera_ids
+                        ),
+                        total=len(camera_ids)
+                    ))
+            else:
+                camera_timing_list = list(
+                    p.imap_unordered(
+                        extract_poses_2d_local_camera_partial,
+                        camera_ids
+                    )
+                )
+    else:
+        camera_timing_list = list()
+        for camera_id in camera_ids:
+            camera_timing = extract_poses_2d_local_camera(
+                camera_id=camera_id,
                 start=start,
                 end=end,
                 environment_id=environment_id,
-                camera_id=camera_id,
                 inference_id=inference_id,
                 adjust_timestamps=adjust_timestamps,
                 base_dir=base_dir,
                 pose_detection_2d_subdirectory=pose_detection_2d_subdirectory,
+                pose_detection_2d_output_structure=pose_detection_2d_output_structure,
                 pose_processing_subdirectory=pose_processing_subdirectory,
                 task_progress_bar=task_progress_bar,
                 notebook=notebook
             )
-        else:
-            raise ValueError('Only 2D pose detection output structures currently supported are {}'.format(
-                process_pose_data.shared_constants.SUPPORTED_POSE_DETECTION_2D_OUTPUT_STRUCTURES
-            ))
+            camera_timing_list.append(camera_timing)
+    extracting_time = time.time() - extracting_start
+    total_camera_minutes = sum([camera_timing['num_minutes'] for camera_timing in camera_timing_list])
+    total_camera_extracting_time = sum([camera_timing['extracting_time'] for camera_timing in camera_timing_list])
+    logger.info('Extracted {:.3f} camera-minutes of 2D pose data from {} cameras in {:.3f} minutes ({:.3f} minutes of per-camera processing time)'.format(
+        total_camera_minutes,
+        len(camera_timing_list),
+        extracting_time/60,
+        total_camera_extracting_time/60
+    ))
+    if compact_output:
+        logger.info('Compacting appended 2D pose data')
+        batch_start_list = process_pose_data.local_io.generate_batch_start_list(
+            start=start,
+            end=end
+        )
+        process_pose_data.local_io.compact_data_local_by_time_segment(
+            start=batch_start_list[0],
+            end=batch_start_list[-1] + datetime.timedelta(minutes=process_pose_data.shared_constants.DEFAULT_BATCH_LENGTH_MINUTES),
+            base_dir=base_dir,
+            pipeline_stage='pose_extraction_2d',
+            environment_id=environment_id,
+            filename_stem='poses_2d',
+            inference_id=inference_id,
+            sort_field='timestamp',
+            pose_processing_subdirectory=pose_processing_subdirectory
+        )
+    # All output is written, so segments missing from the manifest have no data
+    process_pose_data.local_io.mark_manifest_complete(
+        base_dir=base_dir,
+        pipeline_stage='pose_extraction_2d',
+        environment_id=environment_id,
+        filename_stem='poses_2d',
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
     return inference_id
 
+def extract_poses_2d_local_camera(
+    camera_id,
+    start,
+    end,
+    environment_id,
+    inference_id,
+    adjust_timestamps=process_pose_data.shared_constants.DEFAULT_ADJUST_TIMESTAMPS,
+    base_dir=process_pose_data.shared_constants.DEFAULT_BASE_DATA_DIRECTORY,
+    pose_detection_2d_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_DETECTION_2D_OUTPUT_SUBDIRECTORY,
+    pose_detection_2d_output_structure=process_pose_data.shared_constants.DEFAULT_POSE_DETECTION_2D_OUTPUT_STRUCTURE,
+    pose_processing_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_PROCESSING_SUBDIRECTORY,
+    task_progress_bar=False,
+    notebook=False
+):
+    if pose_detection_2d_output_structure == 'gamma':
+        camera_timing = process_pose_data.local_io.extract_poses_2d_gamma(
+            start=start,
+            end=end,
+            environment_id=environment_id,
+            camera_id=camera_id,
+            inference_id=inference_id,
+            adjust_timestamps=adjust_timestamps,
+            base_dir=base_dir,
+            pose_detection_2d_subdirectory=pose_detection_2d_subdirectory,
+            pose_processing_subdirectory=pose_processing_subdirectory,
+            task_progress_bar=task_progress_bar,
+            notebook=notebook
+        )
+    else:
+        raise ValueError('Only 2D pose detection output structures currently supported are {}'.format(
+            process_pose_data.shared_constants.SUPPORTED_POSE_DETECTION_2D_OUTPUT_STRUCTURES
+        ))
+    return camera_timing
+
 def calculate_frame_counts_local(
     start,
     end,
@@ -201,6 +335,8 @@ def calculate_frame_counts_local(
     audience=None,
     client_id=None,
     client_secret=None,
+    parallel=False,
+    num_parallel_processes=None,
     task_progress_bar=False,
     notebook=False
 ):
@@ -263,27 +399,67 @@ def calculate_frame_counts_local(
             raise ValueError('Camera identification must be \'device_id\' or \'assignment_id\'')
     if camera_ids is None or len(camera_ids) == 0:
         raise ValueError('No cameras found for specified start, end, and environment')
-    # Calculate frame counts
-    frame_counts_list = list()
-    for camera_id in camera_ids:
-        if pose_detection_2d_output_structure == 'gamma':
-            frame_counts_camera = process_pose_data.local_io.calculate_frame_counts_gamma(
-                start=start,
-                end=end,
-                environment_id=environment_id,
-                camera_id=camera_id,
-                base_dir=base_dir,
-                pose_detection_2d_subdirectory=pose_detection_2d_subdirectory,
-                task_progress_bar=task_progress_bar,
-                notebook=notebook
-            )
-        else:
-            raise ValueError('Only 2D pose detection output structures currently supported are {}'.format(
-                process_pose_data.shared_constants.SUPPORTED_POSE_DETECTION_2D_OUTPUT_STRUCTURES
+    if pose_detection_2d_output_structure not in process_pose_data.shared_constants.SUPPORTED_POSE_DETECTION_2D_OUTPUT_STRUCTURES:
+        raise ValueError('Only 2D pose detection output structures currently supported are {}'.format(
+            process_pose_data.shared_constants.SUPPORTED_POSE_DETECTION_2D_OUTPUT_STRUCTURES
+        ))
+    # Calculate frame counts (frame counts for each image directory are stored
+    # under the pose processing subdirectory, so repeated runs only rescan
+    # directories that have changed)
+    calculate_frame_counts_local_camera_partial = functools.partial(
+        calculate_frame_counts_local_camera,
+        start=start,
+        end=end,
+        environment_id=environment_id,
+        base_dir=base_dir,
+        pose_detection_2d_subdirectory=pose_detection_2d_subdirectory,
+        pose_detection_2d_output_structure=pose_detection_2d_output_structure,
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        task_progress_bar=task_progress_bar and not parallel,
+        notebook=notebook
+    )
+    if parallel:
+        logger.info('Attempting to launch parallel processes')
+        if num_parallel_processes is None:
+            num_cpus=multiprocessing.cpu_count()
+            num_processes = max(1, min(num_cpus - 1, len(camera_ids)))
+            logger.info('Number of parallel processes not specified. {} CPUs detected. Launching {} processes'.format(
+                num_cpus,
+                num_processes
             ))
-        if len(frame_counts_camera) > 0:
-            frame_counts_camera['camera_id'] = camera_id
-            frame_counts_list.append(frame_counts_camera)
+        else:
+            num_processes = num_parallel_processes
+        with multiprocessing.Pool(num_processes) as p:
+            if task_progress_bar:
+                if notebook:
+                    frame_counts_list = list(tqdm.notebook.tqdm(
+                        p.imap_unordered(
+                            calculate_frame_counts_local_camera_partial,
+                            camera_ids
+                        ),
+                        total=len(camera_ids)
+                    ))
+                else:
+                    frame_counts_list = list(tqdm.tqdm(
+                        p.imap_unordered(
+                            calculate_frame_counts_local_camera_partial,
+                            camera_ids
+                        ),
+                        total=len(camera_ids)
+                    ))
+            else:
+                frame_counts_list = list(
+                    p.imap_unordered(
+                        calculate_frame_counts_local_camera_partial,
+                        camera_ids
+                    )
+                )
+    else:
+        frame_counts_list = list(map(
+            calculate_frame_counts_local_camera_partial,
+            camera_ids
+        ))
+    frame_counts_list = [frame_counts_camera for frame_counts_camera in frame_counts_list if len(frame_counts_camera) > 0]
     frame_counts = (
         pd.concat(frame_counts_list)
         .reset_index()
@@ -295,6 +471,38 @@ def calculate_frame_counts_local(
     )
     return frame_counts
 
+def calculate_frame_counts_local_camera(
+    camera_id,
+    start,
+    end,
+    environment_id,
+    base_dir=process_pose_data.shared_constants.DEFAULT_BASE_DATA_DIRECTORY,
+    pose_detection_2d_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_DETECTION_2D_OUTPUT_SUBDIRECTORY,
+    pose_detection_2d_output_structure=process_pose_data.shared_constants.DEFAULT_POSE_DETECTION_2D_OUTPUT_STRUCTURE,
+    pose_processing_subdirectory=process_pose_data.shared_constants.DEFAULT_POSE_PROCESSING_SUBDIRECTORY,
+    task_progress_bar=False,
+    notebook=False
+):
+    if pose_detection_2d_output_structure == 'gamma':
+        frame_counts_camera = process_pose_data.local_io.calculate_frame_counts_gamma(
+            start=start,
+            end=end,
+            environment_id=environment_id,
+            camera_id=camera_id,
+            base_dir=base_dir,
+            pose_detection_2d_subdirectory=pose_detection_2d_subdirectory,
+            pose_processing_subdirectory=pose_processing_subdirectory,
+            task_progress_bar=task_progress_bar,
+            notebook=notebook
+        )
+    else:
+        raise ValueError('Only 2D pose detection output structures currently supported are {}'.format(
+            process_pose_data.shared_constants.SUPPORTED_POSE_DETECTION_2D_OUTPUT_STRUCTURES
+        ))
+    if len(frame_counts_camera) > 0:
+        frame_counts_camera['camera_id'] = camera_id
+    return frame_counts_camera
+
 def extract_poses_2d_alphapose_local_by_time_segment(
     start,
     end,
@@ -306,12 +514,18 @@ def extract_poses_2d_alphapose_local_by_time_segment(
     poses_2d_filename='alphapose-results.json',
     poses_2d_json_format='cmu',
     pose_processing_subdirectory='pose_processing',
+    output_object_type=process_pose_data.shared_constants.DEFAULT_OUTPUT_OBJECT_TYPE,
+    output_codec=process_pose_data.shared_constants.DEFAULT_STORAGE_CODEC,
+    output_keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE,
+    output_encode_ids=False,
     client=None,
     uri=None,
     token_uri=None,
     audience=None,
     client_id=None,
     client_secret=None,
+    parallel=False,
+    num_parallel_processes=None,
     task_progress_bar=False,
     notebook=False
 ):
@@ -331,6 +545,11 @@ def extract_poses_2d_alphapose_local_by_time_segment(
     Output metadata is saved as
     \'BASE_DIR/POSE_PROCESSING_SUBDIRECTORY/pose_extraction_2d/ENVIRONMENT_ID/pose_extraction_2d_metadata_INFERENCE_ID.pkl\'
 
+    If parallel is True, the per-frame JSON files for each time segment are
+    parsed in a pool of parallel processes and the results are stitched
+    together (carryover frames and timestamps) in time segment order in the
+    main process.
+
     Args:
         start (datetime): Start of period to be analyzed
         end (datetime): End of period to be analyzed
@@ -341,12 +560,18 @@ def extract_poses_2d_alphapose_local_by_time_segment(
         poses_2d_filename: Filename for Alphapose data in each directory (default is \'alphapose-results.json\')
         poses_2d_json_format: Format of Alphapose results files (default is\'cmu\')
         pose_processing_subdirectory (str): subdirectory (under base directory) for all pose processing data (default is \'pose_processing\')
+        output_object_type (str): Storage format for output data (\'dataframe\' for pickled dataframes or \'columnar\' for contiguous keypoint arrays) (default is \'dataframe\')
+        output_codec (str): Compression codec for output data (\'gzip\', \'bz2\', \'lzma\', \'zstd\', \'lz4\', or None for uncompressed; detected automatically on read) (default is None)
+        output_keypoint_dtype (str): Storage precision for keypoint arrays in output data (\'float64\', \'float32\', or \'int16\' for quantized 2D pixel coordinates with columnar output; upcast to float64 on read) (default is \'float64\')
+        output_encode_ids (bool): Boolean indicating whether to store assignment IDs in output data as categoricals (default is False)
         client (MinimalHoneycombClient): Honeycomb client (otherwise generates one) (default is None)
         uri (str): Honeycomb URI (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         token_uri (str): Honeycomb token URI (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         audience (str): Honeycomb audience (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         client_id (str): Honeycomb client ID (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         client_secret (str): Honeycomb client secret (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
+        parallel (bool): Boolean indicating whether to parse time segments in multiple parallel processes (default is False)
+        num_parallel_processes (int): Number of parallel processes in pool (otherwise defaults to number of cores - 1) (default is None)
         task_progress_bar (bool): Boolean indicating whether script should display a progress bar (default is False)
         notebook (bool): Boolean indicating whether script is being run in a Jupyter notebook (for progress bar display) (default is False)
 
@@ -426,7 +651,64 @@ def extract_poses_2d_alphapose_local_by_time_segment(
         time_segment_start_list[0].isoformat(),
         time_segment_start_list[-1].isoformat()
     ))
+    logger.info('Indexing Alphapose output files')
+    alphapose_file_index = process_pose_data.local_io.generate_alphapose_file_index(
+        start=start,
+        end=end,
+        base_dir=base_dir,
+        environment_id=environment_id,
+        camera_assignment_ids=camera_assignment_ids,
+        alphapose_subdirectory=alphapose_subdirectory,
+        tree_structure=tree_structure
+    )
+    time_segment_frame_files_list = [
+        (time_segment_start, alphapose_file_index.get(time_segment_start, dict()))
+        for time_segment_start in time_segment_start_list
+    ]
+    parse_2d_pose_data_alphapose_local_time_segment_partial = functools.partial(
+        process_pose_data.local_io.parse_2d_pose_data_alphapose_local_time_segment_indexed,
+        environment_id=environment_id,
+        camera_assignment_ids=camera_assignment_ids,
+        json_format=poses_2d_json_format
+    )
     processing_start = time.time()
+    pool = None
+    if parallel:
+        logger.info('Attempting to launch parallel processes')
+        if num_parallel_processes is None:
+            num_cpus=multiprocessing.cpu_count()
+            num_processes = max(1, num_cpus - 1)
+            logger.info('Number of parallel processes not specified. {} CPUs detected. Launching {} processes'.format(
+                num_cpus,
+                num_processes
+            ))
+        else:
+            num_processes = num_parallel_processes
+        pool = multiprocessing.Pool(num_processes)
+        # Results come back in time segment order, so carryover can be
+        # stitched while later time segments are still being parsed. Pool.imap()
+        # would otherwise dispatch every time segment up front and let parsed
+        # results pile up behind a slow write, so each task waits for a free
+        # slot, which is released as its result is consumed
+        task_slots = threading.Semaphore(
+            num_processes + process_pose_data.shared_constants.DEFAULT_PIPELINE_READ_QUEUE_DEPTH
+        )
+        stop_dispatch = threading.Event()
+        def generate_tasks():
+            for time_segment_frame_files in time_segment_frame_files_list:
+                task_slots.acquire()
+                if stop_dispatch.is_set():
+                    return
+                yield time_segment_frame_files
+        parsed_frames_iterator = pool.imap(
+            parse_2d_pose_data_alphapose_local_time_segment_partial,
+            generate_tasks()
+        )
+    else:
+        parsed_frames_iterator = map(
+            parse_2d_pose_data_alphapose_local_time_segment_partial,
+            time_segment_frame_files_list
+        )
     if task_progress_bar:
         if notebook:
             time_segment_start_iterator = tqdm.notebook.tqdm(time_segment_start_list)
@@ -434,43 +716,58 @@ def extract_poses_2d_alphapose_local_by_time_segment(
             time_segment_start_iterator = tqdm.tqdm(time_segment_start_list)
     else:
         time_segment_start_iterator = time_segment_start_list
-    previous_carryover_poses = None
-    for time_segment_start in time_segment_start_iterator:
-        current_poses, carryover_poses = process_pose_data.local_io.fetch_2d_pose_data_alphapose_local_time_segment(
-            base_dir=base_dir,
-            environment_id=environment_id,
-            time_segment_start=time_segment_start,
-            camera_assignment_ids=camera_assignment_ids,
-            carryover_poses = previous_carryover_poses,
-            alphapose_subdirectory=alphapose_subdirectory,
-            tree_structure=tree_structure,
-            filename=poses_2d_filename,
-            json_format=poses_2d_json_format
-        )
-        if previous_carryover_poses is not None and len(previous_carryover_poses) > 0:
-            poses_2d_df_time_segment = (
-                pd.concat((
-                    previous_carryover_poses,
-                    current_poses
-                ))
-                .sort_values(['timestamp', 'assignment_id'])
+    try:
+        previous_carryover_poses = None
+        for time_segment_start, parsed_frames in zip(time_segment_start_iterator, parsed_frames_iterator):
+            current_poses, carryover_poses = process_pose_data.local_io.stitch_2d_pose_data_alphapose_time_segment(
+                time_segment_start=time_segment_start,
+                parsed_frames=parsed_frames,
+                carryover_poses=previous_carryover_poses
             )
-        else:
-            poses_2d_df_time_segment=current_poses
-        process_pose_data.local_io.write_data_local(
-            data_object=poses_2d_df_time_segment,
-            base_dir=base_dir,
-            pipeline_stage='pose_extraction_2d',
-            environment_id=environment_id,
-            filename_stem='poses_2d',
-            inference_id=inference_id,
-            time_segment_start=time_segment_start,
-            object_type='dataframe',
-            append=False,
-            sort_field=None,
-            pose_processing_subdirectory=pose_processing_subdirectory
-        )
-        previous_carryover_poses = carryover_poses
+            if pool is not None:
+                task_slots.release()
+            if previous_carryover_poses is not None and len(previous_carryover_poses) > 0:
+                poses_2d_df_time_segment = (
+                    pd.concat((
+                        previous_carryover_poses,
+                        current_poses
+                    ))
+                    .sort_values(['timestamp', 'assignment_id'])
+                )
+            else:
+                poses_2d_df_time_segment=current_poses
+            process_pose_data.local_io.write_data_local(
+                data_object=poses_2d_df_time_segment,
+                base_dir=base_dir,
+                pipeline_stage='pose_extraction_2d',
+                environment_id=environment_id,
+                filename_stem='poses_2d',
+                inference_id=inference_id,
+                time_segment_start=time_segment_start,
+                object_type=output_object_type,
+                append=False,
+                sort_field=None,
+                pose_processing_subdirectory=pose_processing_subdirectory,
+                codec=output_codec,
+                keypoint_dtype=output_keypoint_dtype,
+                encode_ids=output_encode_ids
+            )
+            previous_carryover_poses = carryover_poses
+    finally:
+        if pool is not None:
+            # Unblock the task dispatcher so the pool can shut down
+            stop_dispatch.set()
+            task_slots.release()
+            pool.terminate()
+    # All output is written, so segments missing from the manifest have no data
+    process_pose_data.local_io.mark_manifest_complete(
+        base_dir=base_dir,
+        pipeline_stage='pose_extraction_2d',
+        environment_id=environment_id,
+        filename_stem='poses_2d',
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
     processing_time = time.time() - processing_start
     logger.info('Extracted {:.3f} minutes of 2D poses in {:.3f} minutes (ratio of {:.3f})'.format(
         num_minutes,
@@ -602,6 +899,15 @@ def extract_poses_2d_alphapose_local_by_time_segment_legacy(
             sort_field=None,
             pose_processing_subdirectory=pose_processing_subdirectory
         )
+    # All output is written, so segments missing from the manifest have no data
+    process_pose_data.local_io.mark_manifest_complete(
+        base_dir=base_dir,
+        pipeline_stage='pose_extraction_2d',
+        environment_id=environment_id,
+        filename_stem='poses_2d',
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
     processing_time = time.time() - processing_start
     logger.info('Extracted {:.3f} minutes of 2D poses in {:.3f} minutes (ratio of {:.3f})'.format(
         num_minutes,
@@ -610,6 +916,40 @@ def extract_poses_2d_alphapose_local_by_time_segment_legacy(
     ))
     return inference_id
 
+def fetch_pose_2d_counts_by_time_segment_pose_db(
+    time_segment_starts,
+    environment_id,
+    camera_ids=None,
+    pose_db_uri=None,
+):
+    # Count 2D poses per 10-second time segment on the database side, keyed by
+    # milliseconds since the first time segment start
+    overall_start = min(time_segment_starts)
+    overall_end = max(time_segment_starts) + datetime.timedelta(seconds=10)
+    overall_start_ms = round(overall_start.timestamp()*1000)
+    handle=pose_db_io.PoseHandle(pose_db_uri)
+    timestamp_ms = {'$toLong': '$timestamp'}
+    results = handle.poses_2d_collection.aggregate([
+        {'$match': pose_db_io.PoseHandle.generate_pose_2d_query_dict(
+            environment_id=environment_id,
+            camera_ids=camera_ids,
+            start=overall_start,
+            end=overall_end
+        )},
+        {'$group': {
+            '_id': {'$subtract': [
+                timestamp_ms,
+                {'$mod': [{'$subtract': [timestamp_ms, overall_start_ms]}, 10000]}
+            ]},
+            'count': {'$sum': 1}
+        }}
+    ])
+    counts = {int(result['_id']): int(result['count']) for result in results}
+    return {
+        time_segment_start: counts.get(round(time_segment_start.timestamp()*1000), 0)
+        for time_segment_start in time_segment_starts
+    }
+
 def reconstruct_poses_3d_pose_db_time_segments(
     time_segment_starts,
     environment_id=None,
@@ -644,8 +984,10 @@ def reconstruct_poses_3d_pose_db_time_segments(
     pose_3d_graph_initial_edge_threshold=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_INITIAL_EDGE_THRESHOLD,
     pose_3d_graph_max_dispersion=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_MAX_DISPERSION,
     include_track_labels=poseconnect.defaults.RECONSTRUCTION_INCLUDE_TRACK_LABELS,
+    reconstruction_backend=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BACKEND,
     parallel=poseconnect.defaults.RECONSTRUCTION_PARALLEL,
     num_parallel_processes=poseconnect.defaults.RECONSTRUCTION_NUM_PARALLEL_PROCESSES,
+    time_segment_pose_counts=None,
     overall_progress_bar=True,
     segment_progress_bar=False,
     notebook=False,
@@ -792,8 +1134,7 @@ def reconstruct_poses_3d_pose_db_time_segments(
     logger.info(f"Inference ID is {inference_id}")
     inference_run_created_at = datetime.datetime.now(tz=datetime.timezone.utc)
     logger.info(f"Inference run created at {inference_run_created_at.isoformat()}")
-    reconstruct_poses_3d_pose_db_time_segment_partial = functools.partial(
-        reconstruct_poses_3d_pose_db_time_segment,
+    reconstruct_poses_3d_pose_db_time_segment_kwargs = dict(
         inference_id=inference_id,
         inference_run_created_at=inference_run_created_at,
         environment_id=environment_id,
@@ -813,46 +1154,71 @@ def reconstruct_poses_3d_pose_db_time_segments(
         pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
         pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
         include_track_labels=include_track_labels,
+        reconstruction_backend=reconstruction_backend,
         progress_bar=segment_progress_bar,
         notebook=notebook,
         pose_db_uri=pose_db_uri,
     )
+    reconstruct_poses_3d_pose_db_time_segment_partial = functools.partial(
+        reconstruct_poses_3d_pose_db_time_segment,
+        **reconstruct_poses_3d_pose_db_time_segment_kwargs
+    )
     if (overall_progress_bar or segment_progress_bar) and parallel and not notebook:
         logger.warning('Progress bars may not display properly with parallel processing enabled outside of a notebook')
     total_minutes = num_time_segments*10/60
     logger.info(f"Processing {num_time_segments} time segments spanning {total_minutes:.2f} minutes")
+    if time_segment_pose_counts is None:
+        logger.info('2D pose counts by time segment not specified. Counting 2D poses in pose DB')
+        try:
+            time_segment_pose_counts = fetch_pose_2d_counts_by_time_segment_pose_db(
+                time_segment_starts=time_segment_starts,
+                environment_id=environment_id,
+                camera_ids=camera_ids,
+                pose_db_uri=pose_db_uri
+            )
+        except Exception as e:
+            logger.warning('Failed to count 2D poses in pose DB ({}). Processing all time segments in chronological order'.format(e))
+    if time_segment_pose_counts is not None:
+        # Counts of 2D poses by time segment start let us skip empty time
+        # segments and schedule the rest by expected cost. Time segments
+        # without a count are kept
+        time_segment_starts = [
+            time_segment_start for time_segment_start in time_segment_starts
+            if time_segment_pose_counts.get(time_segment_start) is None or time_segment_pose_counts[time_segment_start] > 0
+        ]
+        logger.info(f"{len(time_segment_starts)} of these time segments may contain 2D poses")
     processing_start = time.time()
     if parallel:
         logger.info('Attempting to launch parallel processes')
         if num_parallel_processes is None:
             num_cpus=multiprocessing.cpu_count()
-            num_processes = num_cpus - 1
+            num_processes = max(1, num_cpus - 1)
             logger.info(f"Number of parallel processes not specified. {num_cpus} CPUs detected. Launching {num_processes} processes")
-        with multiprocessing.Pool(num_processes) as p:
-            if overall_progress_bar:
-                if notebook:
-                    list(tqdm.notebook.tqdm(
-                        p.imap_unordered(
-                            reconstruct_poses_3d_pose_db_time_segment_partial,
-                            time_segment_starts
-                        ),
-                        total=num_time_segments
-                    ))
-                else:
-                    list(tqdm.tqdm(
-                        p.imap_unordered(
-                            reconstruct_poses_3d_pose_db_time_segment_partial,
-                            time_segment_starts
-                        ),
-                        total=num_time_segments
-                    ))
-            else:
-                list(
-                    p.imap_unordered(
-                        reconstruct_poses_3d_pose_db_time_segment_partial,
-                        time_segment_starts
-                    )
-                )
+        else:
+            num_processes = num_parallel_processes
+        # Static inputs go to each worker once (along with the camera pair
+        # overlap and epipolar geometry used by the batched backend); tasks
+        # carry only time segment starts
+        with multiprocessing.Pool(
+            num_processes,
+            initializer=process_pose_data.reconstruct.initialize_worker_context,
+            initargs=(
+                reconstruct_poses_3d_pose_db_time_segment,
+                reconstruct_poses_3d_pose_db_time_segment_kwargs,
+                camera_calibrations,
+                pose_3d_limits if reconstruction_backend == 'batched' else None
+            )
+        ) as p:
+            process_pose_data.reconstruct.run_time_segment_tasks(
+                pool=p,
+                time_segment_tasks=process_pose_data.reconstruct.schedule_time_segments(
+                    time_segment_start_list=time_segment_starts,
+                    time_segment_costs=time_segment_pose_counts,
+                    num_processes=num_processes
+                ),
+                progress_bar=overall_progress_bar,
+                notebook=notebook
+            )
     else:
         if overall_progress_bar:
             if notebook:
@@ -889,6 +1255,7 @@ def reconstruct_poses_3d_pose_db_time_segment(
     pose_3d_graph_initial_edge_threshold=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_INITIAL_EDGE_THRESHOLD,
     pose_3d_graph_max_dispersion=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_MAX_DISPERSION,
     include_track_labels=poseconnect.defaults.RECONSTRUCTION_INCLUDE_TRACK_LABELS,
+    reconstruction_backend=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BACKEND,
     progress_bar=False,
     notebook=False,
     pose_db_uri=None,
@@ -911,7 +1278,7 @@ def reconstruct_poses_3d_pose_db_time_segment(
         return
     logger.info('Fetched 2D pose data for time segment starting at {}'.format(time_segment_start.isoformat()))
     logger.info('Reconstructing 3D poses for time segment starting at {}'.format(time_segment_start.isoformat()))
-    poses_3d_df = poseconnect.reconstruct.reconstruct_poses_3d(
+    poses_3d_df = process_pose_data.reconstruct.reconstruct_poses_3d(
         poses_2d=poses_2d_df_time_segment,
         camera_calibrations=camera_calibrations,
         pose_3d_limits=pose_3d_limits,
@@ -924,7 +1291,7 @@ def reconstruct_poses_3d_pose_db_time_segment(
         pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
         pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
         include_track_labels=include_track_labels,
-        parallel=False,
+        reconstruction_backend=reconstruction_backend,
         progress_bar=progress_bar,
         notebook=notebook,
     )
@@ -969,6 +1336,9 @@ def reconstruct_poses_3d_local_by_time_segment(
     client_id=None,
     client_secret=None,
     pose_processing_subdirectory='pose_processing',
+    output_object_type=process_pose_data.shared_constants.DEFAULT_OUTPUT_OBJECT_TYPE,
+    output_codec=process_pose_data.shared_constants.DEFAULT_STORAGE_CODEC,
+    output_keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE,
     pose_3d_limits=None,
     room_x_limits=None,
     room_y_limits=None,
@@ -992,8 +1362,12 @@ def reconstruct_poses_3d_local_by_time_segment(
     pose_3d_graph_initial_edge_threshold=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_INITIAL_EDGE_THRESHOLD,
     pose_3d_graph_max_dispersion=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_MAX_DISPERSION,
     include_track_labels=poseconnect.defaults.RECONSTRUCTION_INCLUDE_TRACK_LABELS,
+    reconstruction_backend=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BACKEND,
     parallel=False,
     num_parallel_processes=None,
+    pipelined=False,
+    read_queue_depth=process_pose_data.shared_constants.DEFAULT_PIPELINE_READ_QUEUE_DEPTH,
+    write_queue_depth=process_pose_data.shared_constants.DEFAULT_PIPELINE_WRITE_QUEUE_DEPTH,
     task_progress_bar=False,
     segment_progress_bar=False,
     notebook=False
@@ -1054,6 +1428,9 @@ def reconstruct_poses_3d_local_by_time_segment(
         client_id (str): Honeycomb client ID (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         client_secret (str): Honeycomb client secret (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         pose_processing_subdirectory (str): subdirectory (under base directory) for all pose processing data (default is \'pose_processing\')
+        output_object_type (str): Storage format for output data (\'dataframe\' for pickled dataframes or \'columnar\' for contiguous keypoint arrays) (default is \'dataframe\')
+        output_codec (str): Compression codec for output data (\'gzip\', \'bz2\', \'lzma\', \'zstd\', \'lz4\', or None for uncompressed; detected automatically on read) (default is None)
+        output_keypoint_dtype (str): Storage precision for keypoint arrays in output data (\'float64\', \'float32\', or \'int16\' for quantized 2D pixel coordinates with columnar output; upcast to float64 on read) (default is \'float64\')
         min_keypoint_quality (float): Minimum keypoint quality for keypoint to be included
         min_num_keypoints (float): Mininum number of keypoints (after keypoint quality filter) for 2D pose to be included
         min_pose_quality=None (float): Minimum pose quality for 2D pose to be included
@@ -1077,8 +1454,12 @@ def reconstruct_poses_3d_local_by_time_segment(
         pose_3d_graph_initial_edge_threshold (int): Minimum number of pose pairs in pose (edges in graph)
         pose_3d_graph_max_dispersion (float): Keypoint dispersion threshold for increasing required number of edges
         include_track_labels (bool): Boolean indicating whether to include source 2D track labels in 3D pose data
-        parallel (bool): Boolean indicating whether to use multiple parallel processes (one for each time segment) (default is False)
+        reconstruction_backend (str): Backend for triangulating and scoring candidate pose pairs (\'poseconnect\' for per-timestamp poseconnect reconstruction or \'batched\' for a single vectorized solve across each time segment) (default is \'poseconnect\')
+        parallel (bool): Boolean indicating whether to use multiple parallel processes (if source manifests are available, empty time segments are skipped and the rest are dispatched longest first by 2D pose count) (default is False)
         num_parallel_processes (int): Number of parallel processes in pool (otherwise defaults to number of cores - 1) (default is None)
+        pipelined (bool): Boolean indicating whether to overlap reading, reconstruction, and writing (a reader prefetches upcoming time segments and a writer thread saves finished ones, so reconstruction never waits on disk) (default is False)
+        read_queue_depth (int): Maximum number of time segments the reader fetches ahead of reconstruction when pipelined (default is 4)
+        write_queue_depth (int): Maximum number of reconstructed time segments waiting for the writer when pipelined (default is 4)
         task_progress_bar (bool): Boolean indicating whether script should display an overall progress bar (default is False)
         segment_progress_bar (bool): Boolean indicating whether script should display a progress bar for each time segment (default is False)
         notebook (bool): Boolean indicating whether script is being run in a Jupyter notebook (for progress bar display) (default is False)
@@ -1213,7 +1594,9 @@ def reconstruct_poses_3d_local_by_time_segment(
             'pose_pair_score_distance_method': pose_pair_score_distance_method,
             'pose_3d_graph_initial_edge_threshold': pose_3d_graph_initial_edge_threshold,
             'pose_3d_graph_max_dispersion': pose_3d_graph_max_dispersion,
-            'include_track_labels': include_track_labels
+            'include_track_labels': include_track_labels,
+            'reconstruction_backend': reconstruction_backend,
+            'pipelined': pipelined
         }
     )
     inference_id = pose_reconstruction_3d_metadata.get('inference_id')
@@ -1244,14 +1627,57 @@ def reconstruct_poses_3d_local_by_time_segment(
         time_segment_start_list[0].isoformat(),
         time_segment_start_list[-1].isoformat()
     ))
-    reconstruct_poses_3d_alphapose_local_time_segment_partial = functools.partial(
-        reconstruct_poses_3d_alphapose_local_time_segment,
+    source_data_summary = process_pose_data.local_io.summarize_data_local(
+        start=start,
+        end=end,
+        base_dir=base_dir,
+        pipeline_stage='pose_extraction_2d',
+        environment_id=environment_id,
+        filename_stem='poses_2d',
+        inference_ids=pose_extraction_2d_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    if source_data_summary is not None:
+        logger.info('Source data contains {} 2D poses ({:.3f} MB) in {} of these time segments'.format(
+            source_data_summary['num_rows'],
+            source_data_summary['num_bytes']/1e6,
+            source_data_summary['num_time_segments_with_data']
+        ))
+    # Use the 2D pose counts in the source manifests (if present) to skip
+    # empty time segments and to schedule the rest by expected cost. Time
+    # segments missing from a manifest are kept, with an unknown cost
+    manifests = process_pose_data.local_io.fetch_manifests_local(
+        base_dir=base_dir,
+        pipeline_stage='pose_extraction_2d',
+        environment_id=environment_id,
+        filename_stem='poses_2d',
+        inference_ids=pose_extraction_2d_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    time_segment_start_list = process_pose_data.local_io.filter_time_segment_start_list_by_manifests(
+        time_segment_start_list=time_segment_start_list,
+        manifests=manifests
+    )
+    if manifests is not None:
+        time_segment_costs = {
+            time_segment_start: process_pose_data.local_io.manifest_num_rows(
+                manifests=manifests,
+                time_segment_start=time_segment_start
+            )
+            for time_segment_start in time_segment_start_list
+        }
+    else:
+        time_segment_costs = None
+    reconstruct_poses_3d_alphapose_local_time_segment_kwargs = dict(
         base_dir=base_dir,
         environment_id=environment_id,
         pose_extraction_2d_inference_id=pose_extraction_2d_inference_id,
         pose_reconstruction_3d_inference_id=inference_id,
         pose_3d_limits=pose_3d_limits,
         pose_processing_subdirectory=pose_processing_subdirectory,
+        output_object_type=output_object_type,
+        output_codec=output_codec,
+        output_keypoint_dtype=output_keypoint_dtype,
         camera_device_id_lookup=camera_device_id_lookup,
         client=client,
         uri=uri,
@@ -1269,9 +1695,14 @@ def reconstruct_poses_3d_local_by_time_segment(
         pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
         pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
         include_track_labels=include_track_labels,
+        reconstruction_backend=reconstruction_backend,
         progress_bar=segment_progress_bar,
         notebook=notebook
     )
+    reconstruct_poses_3d_alphapose_local_time_segment_partial = functools.partial(
+        reconstruct_poses_3d_alphapose_local_time_segment,
+        **reconstruct_poses_3d_alphapose_local_time_segment_kwargs
+    )
     if (task_progress_bar or segment_progress_bar) and parallel and not notebook:
         logger.warning('Progress bars may not display properly with parallel processing enabled outside of a notebook')
     processing_start = time.time()
@@ -1279,36 +1710,99 @@ def reconstruct_poses_3d_local_by_time_segment(
         logger.info('Attempting to launch parallel processes')
         if num_parallel_processes is None:
             num_cpus=multiprocessing.cpu_count()
-            num_processes = num_cpus - 1
+            num_processes = max(1, num_cpus - 1)
             logger.info('Number of parallel processes not specified. {} CPUs detected. Launching {} processes'.format(
                 num_cpus,
                 num_processes
             ))
-        with multiprocessing.Pool(num_processes) as p:
-            if task_progress_bar:
-                if notebook:
-                    list(tqdm.notebook.tqdm(
-                        p.imap_unordered(
-                            reconstruct_poses_3d_alphapose_local_time_segment_partial,
-                            time_segment_start_list
-                        ),
-                        total=len(time_segment_start_list)
-                    ))
-                else:
-                    list(tqdm.tqdm(
-                        p.imap_unordered(
-                            reconstruct_poses_3d_alphapose_local_time_segment_partial,
-                            time_segment_start_list
-                        ),
-                        total=len(time_segment_start_list)
-                    ))
-            else:
-                list(
-                    p.imap_unordered(
-                        reconstruct_poses_3d_alphapose_local_time_segment_partial,
-                        time_segment_start_list
-                    )
-                )
+        else:
+            num_processes = num_parallel_processes
+    if pipelined:
+        logger.info('Pipelining reads, reconstruction, and writes (read queue depth {}, write queue depth {})'.format(
+            read_queue_depth,
+            write_queue_depth
+        ))
+        if parallel and time_segment_costs is not None:
+            time_segment_start_list = process_pose_data.reconstruct.sort_time_segments_by_cost(
+                time_segment_start_list=time_segment_start_list,
+                time_segment_costs=time_segment_costs
+            )
+        process_pose_data.reconstruct.process_time_segments_pipelined(
+            time_segment_start_list=time_segment_start_list,
+            fetch_function=functools.partial(
+                fetch_poses_2d_alphapose_local_time_segment,
+                base_dir=base_dir,
+                environment_id=environment_id,
+                pose_extraction_2d_inference_id=pose_extraction_2d_inference_id,
+                pose_processing_subdirectory=pose_processing_subdirectory,
+                camera_device_id_lookup=camera_device_id_lookup,
+                client=client,
+                uri=uri,
+                token_uri=token_uri,
+                audience=audience,
+                client_id=client_id,
+                client_secret=client_secret
+            ),
+            compute_function=reconstruct_poses_3d_time_segment,
+            compute_kwargs=dict(
+                camera_calibrations=camera_calibrations,
+                pose_3d_limits=pose_3d_limits,
+                min_keypoint_quality=min_keypoint_quality,
+                min_num_keypoints=min_num_keypoints,
+                min_pose_quality=min_pose_quality,
+                min_pose_pair_score=min_pose_pair_score,
+                max_pose_pair_score=max_pose_pair_score,
+                pose_pair_score_distance_method=pose_pair_score_distance_method,
+                pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
+                pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
+                include_track_labels=include_track_labels,
+                reconstruction_backend=reconstruction_backend,
+                progress_bar=segment_progress_bar,
+                notebook=notebook
+            ),
+            write_function=functools.partial(
+                write_poses_3d_local_time_segment,
+                base_dir=base_dir,
+                environment_id=environment_id,
+                pose_reconstruction_3d_inference_id=inference_id,
+                pose_processing_subdirectory=pose_processing_subdirectory,
+                output_object_type=output_object_type,
+                output_codec=output_codec,
+                output_keypoint_dtype=output_keypoint_dtype
+            ),
+            num_processes=num_processes if parallel else None,
+            camera_calibrations=camera_calibrations,
+            pose_3d_limits=pose_3d_limits if reconstruction_backend == 'batched' else None,
+            manifests=manifests,
+            read_queue_depth=read_queue_depth,
+            write_queue_depth=write_queue_depth,
+            progress_bar=task_progress_bar,
+            notebook=notebook
+        )
+    elif parallel:
+        # Static inputs go to each worker once (along with the camera pair
+        # overlap and epipolar geometry used by the batched backend); tasks
+        # carry only time segment starts
+        with multiprocessing.Pool(
+            num_processes,
+            initializer=process_pose_data.reconstruct.initialize_worker_context,
+            initargs=(
+                reconstruct_poses_3d_alphapose_local_time_segment,
+                reconstruct_poses_3d_alphapose_local_time_segment_kwargs,
+                camera_calibrations,
+                pose_3d_limits if reconstruction_backend == 'batched' else None
+            )
+        ) as p:
+            process_pose_data.reconstruct.run_time_segment_tasks(
+                pool=p,
+                time_segment_tasks=process_pose_data.reconstruct.schedule_time_segments(
+                    time_segment_start_list=time_segment_start_list,
+                    time_segment_costs=time_segment_costs,
+                    num_processes=num_processes
+                ),
+                progress_bar=task_progress_bar,
+                notebook=notebook
+            )
     else:
         if task_progress_bar:
             if notebook:
@@ -1317,6 +1811,15 @@ def reconstruct_poses_3d_local_by_time_segment(
                 list(map(reconstruct_poses_3d_alphapose_local_time_segment_partial, tqdm.tqdm(time_segment_start_list)))
         else:
             list(map(reconstruct_poses_3d_alphapose_local_time_segment_partial, time_segment_start_list))
+    # All output is written, so segments missing from the manifest have no data
+    process_pose_data.local_io.mark_manifest_complete(
+        base_dir=base_dir,
+        pipeline_stage='pose_reconstruction_3d',
+        environment_id=environment_id,
+        filename_stem='poses_3d',
+        inference_id=inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
     processing_time = time.time() - processing_start
     logger.info('Processed {:.3f} minutes of 2D poses in {:.3f} minutes (ratio of {:.3f})'.format(
         num_minutes,
@@ -1365,6 +1868,7 @@ def reconstruct_poses_3d_local_timestamp(
     pose_3d_graph_initial_edge_threshold=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_INITIAL_EDGE_THRESHOLD,
     pose_3d_graph_max_dispersion=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_MAX_DISPERSION,
     include_track_labels=poseconnect.defaults.RECONSTRUCTION_INCLUDE_TRACK_LABELS,
+    reconstruction_backend=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BACKEND,
     return_diagnostics=False
 ):
     if timestamp.tzinfo is None:
@@ -1499,6 +2003,28 @@ def reconstruct_poses_3d_local_timestamp(
                 break
     if len(missing_cameras) > 0:
         poses_2d_df_timestamp = poses_2d_df_timestamp.loc[~poses_2d_df_timestamp['camera_id'].isin(missing_cameras)]
+    if reconstruction_backend == 'batched':
+        if return_diagnostics:
+            raise ValueError('Diagnostics are only available from the poseconnect reconstruction backend')
+        poses_3d_df_timestamp = process_pose_data.reconstruct.reconstruct_poses_3d_batched(
+            poses_2d=poses_2d_df_timestamp,
+            camera_calibrations=camera_calibrations,
+            pose_3d_limits=pose_3d_limits,
+            min_keypoint_quality=min_keypoint_quality,
+            min_num_keypoints=min_num_keypoints,
+            min_pose_quality=min_pose_quality,
+            min_pose_pair_score=min_pose_pair_score,
+            max_pose_pair_score=max_pose_pair_score,
+            pose_pair_score_distance_method=pose_pair_score_distance_method,
+            pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
+            pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
+            include_track_labels=include_track_labels
+        )
+        return poses_3d_df_timestamp
+    if reconstruction_backend != 'poseconnect':
+        raise ValueError('Only allowed reconstruction backends are {}'.format(
+            process_pose_data.shared_constants.SUPPORTED_RECONSTRUCTION_BACKENDS
+        ))
     poses_3d_df_timestamp = poseconnect.reconstruct.reconstruct_poses_3d_timestamp(
         poses_2d_timestamp=poses_2d_df_timestamp,
         camera_calibrations=camera_calibrations,
@@ -1524,6 +2050,9 @@ def reconstruct_poses_3d_alphapose_local_time_segment(
     pose_reconstruction_3d_inference_id,
     pose_3d_limits,
     pose_processing_subdirectory='pose_processing',
+    output_object_type=process_pose_data.shared_constants.DEFAULT_OUTPUT_OBJECT_TYPE,
+    output_codec=process_pose_data.shared_constants.DEFAULT_STORAGE_CODEC,
+    output_keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE,
     camera_device_id_lookup=None,
     client=None,
     uri=None,
@@ -1541,8 +2070,69 @@ def reconstruct_poses_3d_alphapose_local_time_segment(
     pose_3d_graph_initial_edge_threshold=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_INITIAL_EDGE_THRESHOLD,
     pose_3d_graph_max_dispersion=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_MAX_DISPERSION,
     include_track_labels=poseconnect.defaults.RECONSTRUCTION_INCLUDE_TRACK_LABELS,
+    reconstruction_backend=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BACKEND,
     progress_bar=False,
     notebook=False
+):
+    poses_2d_df_time_segment = fetch_poses_2d_alphapose_local_time_segment(
+        time_segment_start=time_segment_start,
+        base_dir=base_dir,
+        environment_id=environment_id,
+        pose_extraction_2d_inference_id=pose_extraction_2d_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        camera_device_id_lookup=camera_device_id_lookup,
+        client=client,
+        uri=uri,
+        token_uri=token_uri,
+        audience=audience,
+        client_id=client_id,
+        client_secret=client_secret
+    )
+    if len(poses_2d_df_time_segment) == 0:
+        return
+    poses_3d_df = reconstruct_poses_3d_time_segment(
+        time_segment_start,
+        poses_2d_df_time_segment,
+        camera_calibrations=camera_calibrations,
+        pose_3d_limits=pose_3d_limits,
+        min_keypoint_quality=min_keypoint_quality,
+        min_num_keypoints=min_num_keypoints,
+        min_pose_quality=min_pose_quality,
+        min_pose_pair_score=min_pose_pair_score,
+        max_pose_pair_score=max_pose_pair_score,
+        pose_pair_score_distance_method=pose_pair_score_distance_method,
+        pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
+        pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
+        include_track_labels=include_track_labels,
+        reconstruction_backend=reconstruction_backend,
+        progress_bar=progress_bar,
+        notebook=notebook
+    )
+    write_poses_3d_local_time_segment(
+        time_segment_start,
+        poses_3d_df,
+        base_dir=base_dir,
+        environment_id=environment_id,
+        pose_reconstruction_3d_inference_id=pose_reconstruction_3d_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        output_object_type=output_object_type,
+        output_codec=output_codec,
+        output_keypoint_dtype=output_keypoint_dtype
+    )
+
+def fetch_poses_2d_alphapose_local_time_segment(
+    time_segment_start,
+    base_dir,
+    environment_id,
+    pose_extraction_2d_inference_id,
+    pose_processing_subdirectory='pose_processing',
+    camera_device_id_lookup=None,
+    client=None,
+    uri=None,
+    token_uri=None,
+    audience=None,
+    client_id=None,
+    client_secret=None
 ):
     logger.info('Processing 2D poses from local Alphapose output files for time segment starting at {}'.format(time_segment_start.isoformat()))
     logger.info('Fetching 2D pose data for time segment starting at {}'.format(time_segment_start.isoformat()))
@@ -1560,7 +2150,7 @@ def reconstruct_poses_3d_alphapose_local_time_segment(
     )
     if len(poses_2d_df_time_segment) == 0:
         logger.info('No 2D poses found for time segment starting at %s', time_segment_start.isoformat())
-        return
+        return poses_2d_df_time_segment
     logger.info('Fetched 2D pose data for time segment starting at {}'.format(time_segment_start.isoformat()))
     if poses_2d_df_time_segment['timestamp'].min() < time_segment_start:
         raise ValueError('First timestamp in 2D pose data for time segment starting at {} is {}, which is before start of time segment'.format(
@@ -1584,8 +2174,29 @@ def reconstruct_poses_3d_alphapose_local_time_segment(
         client_secret=client_secret
     )
     logger.info('Converted camera assignment IDs to camera device IDs for time segment starting at {}'.format(time_segment_start.isoformat()))
+    poses_2d_df_time_segment = process_pose_data.local_io.decode_id_columns(poses_2d_df_time_segment)
+    return poses_2d_df_time_segment
+
+def reconstruct_poses_3d_time_segment(
+    time_segment_start,
+    poses_2d_df_time_segment,
+    camera_calibrations,
+    pose_3d_limits,
+    min_keypoint_quality=poseconnect.defaults.RECONSTRUCTION_MIN_KEYPOINT_QUALITY,
+    min_num_keypoints=poseconnect.defaults.RECONSTRUCTION_MIN_NUM_KEYPOINTS,
+    min_pose_quality=poseconnect.defaults.RECONSTRUCTION_MIN_POSE_QUALITY,
+    min_pose_pair_score=poseconnect.defaults.RECONSTRUCTION_MIN_POSE_PAIR_SCORE,
+    max_pose_pair_score=poseconnect.defaults.RECONSTRUCTION_MAX_POSE_PAIR_SCORE,
+    pose_pair_score_distance_method=poseconnect.defaults.RECONSTRUCTION_POSE_PAIR_SCORE_DISTANCE_METHOD,
+    pose_3d_graph_initial_edge_threshold=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_INITIAL_EDGE_THRESHOLD,
+    pose_3d_graph_max_dispersion=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_MAX_DISPERSION,
+    include_track_labels=poseconnect.defaults.RECONSTRUCTION_INCLUDE_TRACK_LABELS,
+    reconstruction_backend=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BACKEND,
+    progress_bar=False,
+    notebook=False
+):
     logger.info('Reconstructing 3D poses for time segment starting at {}'.format(time_segment_start.isoformat()))
-    poses_3d_df = poseconnect.reconstruct.reconstruct_poses_3d(
+    poses_3d_df = process_pose_data.reconstruct.reconstruct_poses_3d(
         poses_2d=poses_2d_df_time_segment,
         camera_calibrations=camera_calibrations,
         pose_3d_limits=pose_3d_limits,
@@ -1598,10 +2209,24 @@ def reconstruct_poses_3d_alphapose_local_time_segment(
         pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
         pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
         include_track_labels=include_track_labels,
+        reconstruction_backend=reconstruction_backend,
         progress_bar=progress_bar,
         notebook=notebook
     )
     logger.info('Reconstructed 3D poses for time segment starting at {}'.format(time_segment_start.isoformat()))
+    return poses_3d_df
+
+def write_poses_3d_local_time_segment(
+    time_segment_start,
+    poses_3d_df,
+    base_dir,
+    environment_id,
+    pose_reconstruction_3d_inference_id,
+    pose_processing_subdirectory='pose_processing',
+    output_object_type=process_pose_data.shared_constants.DEFAULT_OUTPUT_OBJECT_TYPE,
+    output_codec=process_pose_data.shared_constants.DEFAULT_STORAGE_CODEC,
+    output_keypoint_dtype=process_pose_data.shared_constants.DEFAULT_KEYPOINT_DTYPE
+):
     logger.info('Writing 3D poses to disk for time segment starting at {}'.format(time_segment_start.isoformat()))
     process_pose_data.local_io.write_data_local(
         data_object=poses_3d_df,
@@ -1611,10 +2236,13 @@ def reconstruct_poses_3d_alphapose_local_time_segment(
         filename_stem='poses_3d',
         inference_id=pose_reconstruction_3d_inference_id,
         time_segment_start=time_segment_start,
-        object_type='dataframe',
+        object_type=output_object_type,
         append=False,
         sort_field=None,
-        pose_processing_subdirectory=pose_processing_subdirectory
+        pose_processing_subdirectory=pose_processing_subdirectory,
+        index_data_ids=True,
+        codec=output_codec,
+        keypoint_dtype=output_keypoint_dtype
     )
 
 def generate_pose_tracks_pose_db_by_batch(
@@ -1962,70 +2590,289 @@ def generate_pose_tracks_3d_local_by_time_segment(
         time_segment_start_list[0].isoformat(),
         time_segment_start_list[-1].isoformat()
     ))
+    manifests = process_pose_data.local_io.fetch_manifests_local(
+        base_dir=base_dir,
+        pipeline_stage='pose_reconstruction_3d',
+        environment_id=environment_id,
+        filename_stem='poses_3d',
+        inference_ids=pose_reconstruction_3d_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    time_segment_start_list = process_pose_data.local_io.filter_time_segment_start_list_by_manifests(
+        time_segment_start_list=time_segment_start_list,
+        manifests=manifests
+    )
+    if manifests is not None:
+        logger.info('{} of these time segments may contain 3D poses'.format(
+            len(time_segment_start_list)
+        ))
+    processing_start = time.time()
+    pose_tracks_3d = None
+    if task_progress_bar:
+        if notebook:
+            time_segment_start_iterator = tqdm.notebook.tqdm(time_segment_start_list)
+        else:
+            time_segment_start_iterator = tqdm.tqdm(time_segment_start_list)
+    else:
+        time_segment_start_iterator = time_segment_start_list
+    for time_segment_start in time_segment_start_iterator:
+        poses_3d_df = process_pose_data.local_io.fetch_data_local(
+            base_dir=base_dir,
+            pipeline_stage='pose_reconstruction_3d',
+            environment_id=environment_id,
+            filename_stem='poses_3d',
+            inference_ids=pose_reconstruction_3d_inference_id,
+            data_ids=None,
+            sort_field=None,
+            time_segment_start=time_segment_start,
+            object_type='dataframe',
+            pose_processing_subdirectory=pose_processing_subdirectory,
+            manifests=manifests
+        )
+        if len(poses_3d_df) == 0:
+            continue
+        pose_tracks_3d =  poseconnect.track.update_pose_tracks_3d(
+            poses_3d=poses_3d_df,
+            pose_tracks_3d=pose_tracks_3d,
+            max_match_distance=max_match_distance,
+            max_iterations_since_last_match=max_iterations_since_last_match,
+            centroid_position_initial_sd=centroid_position_initial_sd,
+            centroid_velocity_initial_sd=centroid_velocity_initial_sd,
+            reference_delta_t_seconds=reference_delta_t_seconds,
+            reference_velocity_drift=reference_velocity_drift,
+            position_observation_sd=position_observation_sd,
+            progress_bar=False,
+            notebook=False
+        )
+    if num_poses_per_track_min is not None:
+        pose_tracks_3d.filter(
+            num_poses_min=num_poses_per_track_min,
+            inplace=True
+        )
+    process_pose_data.local_io.write_data_local(
+        data_object=pose_tracks_3d.output(),
+        base_dir=base_dir,
+        pipeline_stage='pose_tracking_3d',
+        environment_id=environment_id,
+        filename_stem='pose_tracks_3d',
+        inference_id=pose_tracking_3d_inference_id,
+        time_segment_start=None,
+        object_type='dict',
+        append=False,
+        sort_field=None,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    processing_time = time.time() - processing_start
+    logger.info('Processed {:.3f} minutes of 3D poses in {:.3f} minutes (ratio of {:.3f})'.format(
+        num_minutes,
+        processing_time/60,
+        (processing_time/60)/num_minutes
+    ))
+    return pose_tracking_3d_inference_id
+
+def interpolate_pose_tracks_3d_local_by_pose_track(
+    base_dir,
+    environment_id,
+    pose_tracking_3d_inference_id,
+    pose_processing_subdirectory='pose_processing',
+    frames_per_second=10,
+    compact_output=True,
+    task_progress_bar=False,
+    notebook=False
+):
+    """
+    Fetches 3D pose and pose track data from local files, interpolates to fill gaps in the tracks, and writes output back to local files.
+
+    Input data is assumed to be organized as specified by output of
+    reconstruct_poses_3d_local_by_time_segment() and
+    generate_pose_tracks_3d_local_by_time_segment().
+
+    The script looks up the inference ID for the 3D poses in the tracks by
+    inspecting the metadata from the pose tracking run.
+
+    Output data is saved as
+    \'BASE_DIR/POSE_PROCESSING_SUBDIRECTORY/pose_reconstruction_3d/ENVIRONMENT_ID/YYYY/MM/DD/HH-MM-SS/poses_3d_INFERENCE_ID.pkl\'
+    (for new poses) and
+    \'BASE_DIR/POSE_PROCESSING_SUBDIRECTORY/pose_tracking_3d/ENVIRONMENT_ID/pose_tracks_3d_INFERENCE_ID.pkl\'
+    (for new pose track data).
+
+    Output metadata is saved as
+    \'BASE_DIR/POSE_PROCESSING_SUBDIRECTORY/pose_track_3d_interpolation/ENVIRONMENT_ID/pose_track_3d_interpolation_metadata_INFERENCE_ID.pkl\'
+
+    Args:
+        base_dir: Base directory for local data (e.g., \'/data\')
+        environment_id (str): Honeycomb environment ID for source environment
+        pose_tracking_3d_inference_id (str): Inference ID for source data
+        pose_processing_subdirectory (str): subdirectory (under base directory) for all pose processing data (default is \'pose_processing\')
+        frames_per_second (float): Frames per second in source video (default is 10)
+        compact_output (bool): Boolean indicating whether appended output parts should be folded into a single file per segment at the end of the run (default is True)
+        task_progress_bar (bool): Boolean indicating whether script should display an overall progress bar (default is False)
+        notebook (bool): Boolean indicating whether script is being run in a Jupyter notebook (for progress bar display) (default is False)
+
+    Returns:
+        (str) Locally-generated inference ID for this run (identifies output data)
+    """
+    pose_tracking_3d_metadata = process_pose_data.local_io.fetch_data_local(
+        base_dir=base_dir,
+        pipeline_stage='pose_tracking_3d',
+        environment_id=environment_id,
+        filename_stem='pose_tracking_3d_metadata',
+        inference_ids=pose_tracking_3d_inference_id,
+        data_ids=None,
+        sort_field=None,
+        time_segment_start=None,
+        object_type='dict',
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    start = pose_tracking_3d_metadata['parameters']['start']
+    end = pose_tracking_3d_metadata['parameters']['end']
+    pose_reconstruction_3d_inference_id = pose_tracking_3d_metadata['parameters']['pose_reconstruction_3d_inference_id']
+    logger.info('Interpolating 3D pose tracks from local 3D pose track data and local 3D pose data. Base directory: {}. Pose processing data subdirectory: {}. Environment ID: {}.'.format(
+        base_dir,
+        pose_processing_subdirectory,
+        environment_id
+    ))
+    logger.info('Generating metadata')
+    pose_track_3d_interpolation_metadata = generate_metadata(
+        environment_id=environment_id,
+        pipeline_stage='pose_track_3d_interpolation',
+        parameters={
+            'pose_reconstruction_3d_inference_id': pose_reconstruction_3d_inference_id,
+            'pose_tracking_3d_inference_id': pose_tracking_3d_inference_id,
+            'start': start,
+            'end': end
+        }
+    )
+    pose_track_3d_interpolation_inference_id = pose_track_3d_interpolation_metadata.get('inference_id')
+    logger.info('Writing inference metadata to local file')
+    process_pose_data.local_io.write_data_local(
+        data_object=pose_track_3d_interpolation_metadata,
+        base_dir=base_dir,
+        pipeline_stage='pose_track_3d_interpolation',
+        environment_id=environment_id,
+        filename_stem='pose_track_3d_interpolation_metadata',
+        inference_id=pose_track_3d_interpolation_metadata['inference_id'],
+        time_segment_start=None,
+        object_type='dict',
+        append=False,
+        sort_field=None,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    pose_tracks_3d = process_pose_data.local_io.fetch_data_local(
+        base_dir=base_dir,
+        pipeline_stage='pose_tracking_3d',
+        environment_id=environment_id,
+        filename_stem='pose_tracks_3d',
+        inference_ids=pose_tracking_3d_inference_id,
+        data_ids=None,
+        sort_field=None,
+        time_segment_start=None,
+        object_type='dict',
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    num_pose_tracks = len(pose_tracks_3d)
+    pose_tracks_start = min([pose_track_3d['start'] for pose_track_3d in pose_tracks_3d.values()])
+    pose_tracks_end = max([pose_track_3d['end'] for pose_track_3d in pose_tracks_3d.values()])
+    num_poses = sum([len(pose_track_3d['pose_3d_ids']) for pose_track_3d in pose_tracks_3d.values()])
+    num_minutes = (pose_tracks_end - pose_tracks_start).total_seconds()/60
+    logger.info('Interpolating {} 3D pose tracks spanning {} poses and {:.3f} minutes: {} to {}'.format(
+        num_pose_tracks,
+        num_poses,
+        num_minutes,
+        pose_tracks_start.isoformat(),
+        pose_tracks_end.isoformat()
+    ))
     processing_start = time.time()
-    pose_tracks_3d = None
     if task_progress_bar:
         if notebook:
-            time_segment_start_iterator = tqdm.notebook.tqdm(time_segment_start_list)
+            pose_track_iterator = tqdm.notebook.tqdm(pose_tracks_3d.items())
         else:
-            time_segment_start_iterator = tqdm.tqdm(time_segment_start_list)
+            pose_track_iterator = tqdm.tqdm(pose_tracks_3d.items())
     else:
-        time_segment_start_iterator = time_segment_start_list
-    for time_segment_start in time_segment_start_iterator:
-        poses_3d_df = process_pose_data.local_io.fetch_data_local(
+        pose_track_iterator = pose_tracks_3d.items()
+    pose_tracks_3d_new = dict()
+    for pose_track_3d_id, pose_track_3d in pose_track_iterator:
+        pose_track_start = pose_track_3d['start']
+        pose_track_end = pose_track_3d['end']
+        pose_3d_ids = pose_track_3d['pose_3d_ids']
+        poses_3d_in_track_df = process_pose_data.local_io.fetch_poses_by_id(
+            pose_ids=pose_3d_ids,
             base_dir=base_dir,
-            pipeline_stage='pose_reconstruction_3d',
             environment_id=environment_id,
-            filename_stem='poses_3d',
             inference_ids=pose_reconstruction_3d_inference_id,
-            data_ids=None,
-            sort_field=None,
-            time_segment_start=time_segment_start,
-            object_type='dataframe',
+            pipeline_stage='pose_reconstruction_3d',
+            filename_stem='poses_3d',
+            start=pose_track_start,
+            end=pose_track_end,
             pose_processing_subdirectory=pose_processing_subdirectory
         )
-        if len(poses_3d_df) == 0:
+        poses_3d_new_df = poseconnect.track.interpolate_pose_track(
+            pose_track_3d=poses_3d_in_track_df,
+            frames_per_second=frames_per_second
+        )
+        if len(poses_3d_new_df) == 0:
             continue
-        pose_tracks_3d =  poseconnect.track.update_pose_tracks_3d(
-            poses_3d=poses_3d_df,
-            pose_tracks_3d=pose_tracks_3d,
-            max_match_distance=max_match_distance,
-            max_iterations_since_last_match=max_iterations_since_last_match,
-            centroid_position_initial_sd=centroid_position_initial_sd,
-            centroid_velocity_initial_sd=centroid_velocity_initial_sd,
-            reference_delta_t_seconds=reference_delta_t_seconds,
-            reference_velocity_drift=reference_velocity_drift,
-            position_observation_sd=position_observation_sd,
-            progress_bar=False,
-            notebook=False
+        process_pose_data.local_io.write_data_local_by_time_segment(
+            data_object=poses_3d_new_df,
+            base_dir=base_dir,
+            pipeline_stage='pose_reconstruction_3d',
+            environment_id=environment_id,
+            filename_stem='poses_3d',
+            inference_id=pose_track_3d_interpolation_inference_id,
+            object_type='dataframe',
+            append=True,
+            sort_field=None,
+            pose_processing_subdirectory=pose_processing_subdirectory,
+            index_data_ids=True
         )
-    if num_poses_per_track_min is not None:
-        pose_tracks_3d.filter(
-            num_poses_min=num_poses_per_track_min,
-            inplace=True
+        pose_tracks_3d_new[pose_track_3d_id] = {
+            'start': pd.to_datetime(poses_3d_new_df['timestamp'].min()).to_pydatetime(),
+            'end': pd.to_datetime(poses_3d_new_df['timestamp'].max()).to_pydatetime(),
+            'pose_3d_ids': poses_3d_new_df.index.tolist()
+        }
+    if compact_output and len(pose_tracks_3d_new) > 0:
+        logger.info('Compacting appended 3D pose data')
+        process_pose_data.local_io.compact_data_local_by_time_segment(
+            start=min([pose_track_3d['start'] for pose_track_3d in pose_tracks_3d_new.values()]),
+            end=max([pose_track_3d['end'] for pose_track_3d in pose_tracks_3d_new.values()]),
+            base_dir=base_dir,
+            pipeline_stage='pose_reconstruction_3d',
+            environment_id=environment_id,
+            filename_stem='poses_3d',
+            inference_id=pose_track_3d_interpolation_inference_id,
+            sort_field=None,
+            pose_processing_subdirectory=pose_processing_subdirectory
         )
     process_pose_data.local_io.write_data_local(
-        data_object=pose_tracks_3d.output(),
+        data_object=pose_tracks_3d_new,
         base_dir=base_dir,
         pipeline_stage='pose_tracking_3d',
         environment_id=environment_id,
         filename_stem='pose_tracks_3d',
-        inference_id=pose_tracking_3d_inference_id,
+        inference_id=pose_track_3d_interpolation_inference_id,
         time_segment_start=None,
         object_type='dict',
         append=False,
         sort_field=None,
         pose_processing_subdirectory=pose_processing_subdirectory
     )
+    # All output is written, so segments missing from the manifest have no data
+    process_pose_data.local_io.mark_manifest_complete(
+        base_dir=base_dir,
+        pipeline_stage='pose_reconstruction_3d',
+        environment_id=environment_id,
+        filename_stem='poses_3d',
+        inference_id=pose_track_3d_interpolation_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
     processing_time = time.time() - processing_start
-    logger.info('Processed {:.3f} minutes of 3D poses in {:.3f} minutes (ratio of {:.3f})'.format(
-        num_minutes,
-        processing_time/60,
-        (processing_time/60)/num_minutes
+    logger.info('Processed {} 3D pose tracks in {:.3f} minutes'.format(
+        num_pose_tracks,
+        processing_time/60
     ))
-    return pose_tracking_3d_inference_id
+    return pose_track_3d_interpolation_inference_id
 
-def interpolate_pose_tracks_3d_local_by_pose_track(
+def interpolate_pose_tracks_3d_local_by_time_segment(
     base_dir,
     environment_id,
     pose_tracking_3d_inference_id,
@@ -2035,7 +2882,17 @@ def interpolate_pose_tracks_3d_local_by_pose_track(
     notebook=False
 ):
     """
-    Fetches 3D pose and pose track data from local files, interpolates to fill gaps in the tracks, and writes output back to local files.
+    Fetches 3D pose and pose track data from local files, interpolates to fill gaps in the tracks, and writes output back to local files, processing the data one time segment at a time.
+
+    Produces the same output as interpolate_pose_tracks_3d_local_by_pose_track()
+    but streams through the 3D pose data in time order, reading each source
+    segment once and writing each output segment once. Each keypoint
+    coordinate is interpolated between its neighboring finite values, so new
+    poses are emitted up to the last pose by which every coordinate seen so
+    far has a finite value (or the end of the track), and each active track
+    holds only the poses needed to interpolate the rest. The results match
+    interpolating the whole track at once. An output segment is written as
+    soon as no active track can add poses to it.
 
     Input data is assumed to be organized as specified by output of
     reconstruct_poses_3d_local_by_time_segment() and
@@ -2080,7 +2937,7 @@ def interpolate_pose_tracks_3d_local_by_pose_track(
     start = pose_tracking_3d_metadata['parameters']['start']
     end = pose_tracking_3d_metadata['parameters']['end']
     pose_reconstruction_3d_inference_id = pose_tracking_3d_metadata['parameters']['pose_reconstruction_3d_inference_id']
-    logger.info('Interpolating 3D pose tracks from local 3D pose track data and local 3D pose data. Base directory: {}. Pose processing data subdirectory: {}. Environment ID: {}.'.format(
+    logger.info('Interpolating 3D pose tracks from local 3D pose track data and local 3D pose data by time segment. Base directory: {}. Pose processing data subdirectory: {}. Environment ID: {}.'.format(
         base_dir,
         pose_processing_subdirectory,
         environment_id
@@ -2135,55 +2992,174 @@ def interpolate_pose_tracks_3d_local_by_pose_track(
         pose_tracks_start.isoformat(),
         pose_tracks_end.isoformat()
     ))
+    pose_track_3d_id_lookup = dict()
+    for pose_track_3d_id, pose_track_3d in pose_tracks_3d.items():
+        for pose_3d_id in pose_track_3d['pose_3d_ids']:
+            pose_track_3d_id_lookup[pose_3d_id] = pose_track_3d_id
+    time_segment_start_list = process_pose_data.local_io.generate_time_segment_start_list(
+        start=pose_tracks_start,
+        end=pose_tracks_end
+    )
+    manifests = process_pose_data.local_io.fetch_manifests_local(
+        base_dir=base_dir,
+        pipeline_stage='pose_reconstruction_3d',
+        environment_id=environment_id,
+        filename_stem='poses_3d',
+        inference_ids=pose_reconstruction_3d_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    time_segment_start_list = process_pose_data.local_io.filter_time_segment_start_list_by_manifests(
+        time_segment_start_list=time_segment_start_list,
+        manifests=manifests
+    )
     processing_start = time.time()
     if task_progress_bar:
         if notebook:
-            pose_track_iterator = tqdm.notebook.tqdm(pose_tracks_3d.items())
+            time_segment_start_iterator = tqdm.notebook.tqdm(time_segment_start_list)
         else:
-            pose_track_iterator = tqdm.tqdm(pose_tracks_3d.items())
+            time_segment_start_iterator = tqdm.tqdm(time_segment_start_list)
     else:
-        pose_track_iterator = pose_tracks_3d.items()
+        time_segment_start_iterator = time_segment_start_list
+    # For each active track, the poses still needed for interpolation and the
+    # timestamp up to which its new poses have been emitted
+    active_pose_track_poses = dict()
+    active_pose_track_emitted_through = dict()
+    # Interpolated poses waiting to be written, by output time segment
+    output_poses = dict()
     pose_tracks_3d_new = dict()
-    for pose_track_3d_id, pose_track_3d in pose_track_iterator:
-        pose_track_start = pose_track_3d['start']
-        pose_track_end = pose_track_3d['end']
-        pose_3d_ids = pose_track_3d['pose_3d_ids']
-        poses_3d_in_track_df = process_pose_data.local_io.fetch_data_local_by_time_segment(
-            start=pose_track_start,
-            end=pose_track_end,
-            base_dir=base_dir,
-            pipeline_stage='pose_reconstruction_3d',
-            environment_id=environment_id,
-            filename_stem='poses_3d',
-            inference_ids=pose_reconstruction_3d_inference_id,
-            data_ids=pose_3d_ids,
-            sort_field=None,
-            object_type='dataframe',
-            pose_processing_subdirectory=pose_processing_subdirectory
-        )
+    def add_interpolated_poses(pose_track_3d_id, poses_3d_track_df, after=None, before=None):
+        if len(poses_3d_track_df) < 2:
+            return
         poses_3d_new_df = poseconnect.track.interpolate_pose_track(
-            pose_track_3d=poses_3d_in_track_df,
+            pose_track_3d=poses_3d_track_df,
             frames_per_second=frames_per_second
         )
+        if after is not None:
+            poses_3d_new_df = poses_3d_new_df.loc[poses_3d_new_df['timestamp'] > after]
+        if before is not None:
+            poses_3d_new_df = poses_3d_new_df.loc[poses_3d_new_df['timestamp'] < before]
         if len(poses_3d_new_df) == 0:
-            continue
-        process_pose_data.local_io.write_data_local_by_time_segment(
-            data_object=poses_3d_new_df,
+            return
+        new_start = pd.to_datetime(poses_3d_new_df['timestamp'].min()).to_pydatetime()
+        new_end = pd.to_datetime(poses_3d_new_df['timestamp'].max()).to_pydatetime()
+        if pose_track_3d_id in pose_tracks_3d_new:
+            pose_track_3d_new = pose_tracks_3d_new[pose_track_3d_id]
+            pose_track_3d_new['start'] = min(pose_track_3d_new['start'], new_start)
+            pose_track_3d_new['end'] = max(pose_track_3d_new['end'], new_end)
+            pose_track_3d_new['pose_3d_ids'].extend(poses_3d_new_df.index.tolist())
+        else:
+            pose_tracks_3d_new[pose_track_3d_id] = {
+                'start': new_start,
+                'end': new_end,
+                'pose_3d_ids': poses_3d_new_df.index.tolist()
+            }
+        for output_time_segment_start, poses_3d_new_time_segment_df in poses_3d_new_df.groupby(
+            poses_3d_new_df['timestamp'].dt.floor('10s')
+        ):
+            output_poses.setdefault(
+                output_time_segment_start.to_pydatetime(),
+                list()
+            ).append(poses_3d_new_time_segment_df)
+    def write_output_poses(before=None):
+        for output_time_segment_start in sorted(output_poses.keys()):
+            if before is not None and output_time_segment_start + datetime.timedelta(seconds=10) > before:
+                break
+            process_pose_data.local_io.write_data_local(
+                data_object=pd.concat(output_poses.pop(output_time_segment_start)).sort_values('timestamp'),
+                base_dir=base_dir,
+                pipeline_stage='pose_reconstruction_3d',
+                environment_id=environment_id,
+                filename_stem='poses_3d',
+                inference_id=pose_track_3d_interpolation_inference_id,
+                time_segment_start=output_time_segment_start,
+                object_type='dataframe',
+                append=False,
+                sort_field=None,
+                pose_processing_subdirectory=pose_processing_subdirectory,
+                index_data_ids=True
+            )
+    for time_segment_start in time_segment_start_iterator:
+        time_segment_end = time_segment_start + datetime.timedelta(seconds=10)
+        poses_3d_df = process_pose_data.local_io.fetch_data_local(
             base_dir=base_dir,
             pipeline_stage='pose_reconstruction_3d',
             environment_id=environment_id,
             filename_stem='poses_3d',
-            inference_id=pose_track_3d_interpolation_inference_id,
-            object_type='dataframe',
-            append=True,
+            inference_ids=pose_reconstruction_3d_inference_id,
+            data_ids=None,
             sort_field=None,
-            pose_processing_subdirectory=pose_processing_subdirectory
+            time_segment_start=time_segment_start,
+            object_type='dataframe',
+            pose_processing_subdirectory=pose_processing_subdirectory,
+            manifests=manifests,
+            columns=['timestamp', 'keypoint_coordinates_3d']
         )
-        pose_tracks_3d_new[pose_track_3d_id] = {
-            'start': pd.to_datetime(poses_3d_new_df['timestamp'].min()).to_pydatetime(),
-            'end': pd.to_datetime(poses_3d_new_df['timestamp'].max()).to_pydatetime(),
-            'pose_3d_ids': poses_3d_new_df.index.tolist()
-        }
+        if len(poses_3d_df) > 0:
+            poses_3d_df = poses_3d_df.loc[poses_3d_df.index.isin(pose_track_3d_id_lookup.keys())]
+        if len(poses_3d_df) > 0:
+            pose_track_3d_ids = poses_3d_df.index.map(pose_track_3d_id_lookup)
+            for pose_track_3d_id, poses_3d_track_df in poses_3d_df.groupby(pose_track_3d_ids):
+                poses_3d_track_df = poses_3d_track_df.sort_values('timestamp')
+                if pose_track_3d_id in active_pose_track_poses:
+                    poses_3d_track_df = pd.concat((
+                        active_pose_track_poses[pose_track_3d_id],
+                        poses_3d_track_df
+                    ))
+                # A new pose depends on the neighboring finite values of each
+                # coordinate, so new poses up to the earliest last finite value
+                # (over coordinates seen so far) are final. Later new poses
+                # only need the poses from the earliest last finite value up
+                # to that point
+                finite = np.isfinite(
+                    np.stack(poses_3d_track_df['keypoint_coordinates_3d']).reshape((len(poses_3d_track_df), -1))
+                )
+                seen = finite.any(axis=0)
+                if seen.any():
+                    last_finite_positions = len(finite) - 1 - np.argmax(finite[::-1], axis=0)
+                    flush_position = np.min(last_finite_positions[seen])
+                    if flush_position > 0:
+                        flush_timestamp = pd.to_datetime(poses_3d_track_df['timestamp'].iloc[flush_position])
+                        add_interpolated_poses(
+                            pose_track_3d_id,
+                            poses_3d_track_df,
+                            after=active_pose_track_emitted_through.get(pose_track_3d_id),
+                            before=flush_timestamp
+                        )
+                        active_pose_track_emitted_through[pose_track_3d_id] = flush_timestamp
+                        finite_before_flush = finite[:(flush_position + 1)]
+                        seen_before_flush = finite_before_flush.any(axis=0)
+                        keep_position = np.min(
+                            flush_position - np.argmax(finite_before_flush[::-1], axis=0)[seen_before_flush]
+                        )
+                        poses_3d_track_df = poses_3d_track_df.iloc[keep_position:]
+                active_pose_track_poses[pose_track_3d_id] = poses_3d_track_df
+        # Close out tracks that end in this time segment
+        for pose_track_3d_id in list(active_pose_track_poses.keys()):
+            if pose_tracks_3d[pose_track_3d_id]['end'] < time_segment_end:
+                add_interpolated_poses(
+                    pose_track_3d_id,
+                    active_pose_track_poses.pop(pose_track_3d_id),
+                    after=active_pose_track_emitted_through.pop(pose_track_3d_id, None)
+                )
+        # Active tracks can only add poses after their earliest held pose and
+        # after the poses they have already emitted
+        write_before = time_segment_end
+        for pose_track_3d_id, poses_3d_track_df in active_pose_track_poses.items():
+            pose_track_write_before = pd.to_datetime(poses_3d_track_df['timestamp'].iloc[0])
+            if pose_track_3d_id in active_pose_track_emitted_through:
+                pose_track_write_before = max(
+                    pose_track_write_before,
+                    active_pose_track_emitted_through[pose_track_3d_id]
+                )
+            write_before = min(write_before, pose_track_write_before.to_pydatetime())
+        write_output_poses(before=write_before)
+    for pose_track_3d_id in list(active_pose_track_poses.keys()):
+        add_interpolated_poses(
+            pose_track_3d_id,
+            active_pose_track_poses.pop(pose_track_3d_id),
+            after=active_pose_track_emitted_through.pop(pose_track_3d_id, None)
+        )
+    write_output_poses()
     process_pose_data.local_io.write_data_local(
         data_object=pose_tracks_3d_new,
         base_dir=base_dir,
@@ -2197,6 +3173,15 @@ def interpolate_pose_tracks_3d_local_by_pose_track(
         sort_field=None,
         pose_processing_subdirectory=pose_processing_subdirectory
     )
+    # All output is written, so segments missing from the manifest have no data
+    process_pose_data.local_io.mark_manifest_complete(
+        base_dir=base_dir,
+        pipeline_stage='pose_reconstruction_3d',
+        environment_id=environment_id,
+        filename_stem='poses_3d',
+        inference_id=pose_track_3d_interpolation_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
     processing_time = time.time() - processing_start
     logger.info('Processed {} 3D pose tracks in {:.3f} minutes'.format(
         num_pose_tracks,
@@ -2214,6 +3199,7 @@ def download_position_data_by_datapoint(
     datapoint_timestamp_max=None,
     pose_processing_subdirectory='pose_processing',
     chunk_size=100,
+    compact_output=True,
     client=None,
     uri=None,
     token_uri=None,
@@ -2257,6 +3243,7 @@ def download_position_data_by_datapoint(
         source_objects (str): Source data in Honeycomb (either \'position_objects\' or \'datapoints\') (default is \'position_objects\')
         pose_processing_subdirectory (str): subdirectory (under base directory) for all pose processing data (default is \'pose_processing\')
         chunk_size (int): Maximum number of records to pull with Honeycomb request (default is 100)
+        compact_output (bool): Boolean indicating whether appended output parts (written when source is \'datapoints\') should be folded into a single file per segment at the end of the run (default is True)
         client (MinimalHoneycombClient): Honeycomb client (otherwise generates one) (default is None)
         uri (str): Honeycomb URI (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         token_uri (str): Honeycomb token URI (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
@@ -2495,11 +3482,13 @@ def download_position_data_by_datapoint(
                 uwb_data_df=position_data_df,
                 person_tag_info_df=person_tag_info_df
             )
-            for time_segment_start in time_segment_start_list:
-                position_data_time_segment_df = position_data_df.loc[
-                    (position_data_df['timestamp'] >= time_segment_start) &
-                    (position_data_df['timestamp'] < time_segment_start + datetime.timedelta(seconds=10))
-                ].reset_index(drop=True)
+            position_data_time_segment_df_list = process_pose_data.local_io.split_data_by_time_windows(
+                data_object=position_data_df,
+                window_start_list=time_segment_start_list,
+                window_duration=datetime.timedelta(seconds=10)
+            )
+            for time_segment_start, position_data_time_segment_df in zip(time_segment_start_list, position_data_time_segment_df_list):
+                position_data_time_segment_df = position_data_time_segment_df.reset_index(drop=True)
                 if len(position_data_time_segment_df) == 0:
                     continue
                 process_pose_data.local_io.write_data_local(
@@ -2515,10 +3504,32 @@ def download_position_data_by_datapoint(
                     sort_field=None,
                     pose_processing_subdirectory=pose_processing_subdirectory
                 )
+        if compact_output:
+            logger.info('Compacting appended position data')
+            process_pose_data.local_io.compact_data_local_by_time_segment(
+                start=start,
+                end=end,
+                base_dir=base_dir,
+                pipeline_stage='download_position_data',
+                environment_id=environment_id,
+                filename_stem='position_data',
+                inference_id=download_position_data_inference_id,
+                sort_field=None,
+                pose_processing_subdirectory=pose_processing_subdirectory
+            )
     else:
         raise ValueError('Source object specification \'{}\' not recognized'.format(
             source_objects
         ))
+    # All output is written, so segments missing from the manifest have no data
+    process_pose_data.local_io.mark_manifest_complete(
+        base_dir=base_dir,
+        pipeline_stage='download_position_data',
+        environment_id=environment_id,
+        filename_stem='position_data',
+        inference_id=download_position_data_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
     processing_time = time.time() - processing_start
     logger.info('Downloaded {:.3f} minutes of position data in {:.3f} minutes (ratio of {:.3f})'.format(
         num_minutes,
@@ -2537,6 +3548,7 @@ def download_position_data_trays_by_datapoint(
     datapoint_timestamp_max=None,
     pose_processing_subdirectory='pose_processing',
     chunk_size=100,
+    compact_output=True,
     client=None,
     uri=None,
     token_uri=None,
@@ -2586,6 +3598,7 @@ def download_position_data_trays_by_datapoint(
         source_objects (str): Source data in Honeycomb (either \'position_objects\' or \'datapoints\') (default is \'position_objects\')
         pose_processing_subdirectory (str): subdirectory (under base directory) for all pose processing data (default is \'pose_processing\')
         chunk_size (int): Maximum number of records to pull with Honeycomb request (default is 100)
+        compact_output (bool): Boolean indicating whether appended output parts (written when source is \'datapoints\') should be folded into a single file per segment at the end of the run (default is True)
         client (MinimalHoneycombClient): Honeycomb client (otherwise generates one) (default is None)
         uri (str): Honeycomb URI (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
         token_uri (str): Honeycomb token URI (otherwise falls back on default strategy of MinimalHoneycombClient) (default is None)
@@ -2833,11 +3846,13 @@ def download_position_data_trays_by_datapoint(
                 how='inner',
                 on='assignment_id'
             )
-            for time_segment_start in time_segment_start_list:
-                position_data_time_segment_df = position_data_df.loc[
-                    (position_data_df['timestamp'] >= time_segment_start) &
-                    (position_data_df['timestamp'] < time_segment_start + datetime.timedelta(seconds=10))
-                ].reset_index(drop=True)
+            position_data_time_segment_df_list = process_pose_data.local_io.split_data_by_time_windows(
+                data_object=position_data_df,
+                window_start_list=time_segment_start_list,
+                window_duration=datetime.timedelta(seconds=10)
+            )
+            for time_segment_start, position_data_time_segment_df in zip(time_segment_start_list, position_data_time_segment_df_list):
+                position_data_time_segment_df = position_data_time_segment_df.reset_index(drop=True)
                 if len(position_data_time_segment_df) == 0:
                     continue
                 process_pose_data.local_io.write_data_local(
@@ -2846,17 +3861,39 @@ def download_position_data_trays_by_datapoint(
                     pipeline_stage='download_position_data_trays',
                     environment_id=environment_id,
                     filename_stem='position_data_trays',
-                    inference_id=download_position_data_inference_id,
+                    inference_id=download_position_data_trays_inference_id,
                     time_segment_start=time_segment_start,
                     object_type='dataframe',
                     append=True,
                     sort_field=None,
                     pose_processing_subdirectory=pose_processing_subdirectory
                 )
+        if compact_output:
+            logger.info('Compacting appended position data')
+            process_pose_data.local_io.compact_data_local_by_time_segment(
+                start=start,
+                end=end,
+                base_dir=base_dir,
+                pipeline_stage='download_position_data_trays',
+                environment_id=environment_id,
+                filename_stem='position_data_trays',
+                inference_id=download_position_data_trays_inference_id,
+                sort_field=None,
+                pose_processing_subdirectory=pose_processing_subdirectory
+            )
     else:
         raise ValueError('Source object specification \'{}\' not recognized'.format(
             source_objects
         ))
+    # All output is written, so segments missing from the manifest have no data
+    process_pose_data.local_io.mark_manifest_complete(
+        base_dir=base_dir,
+        pipeline_stage='download_position_data_trays',
+        environment_id=environment_id,
+        filename_stem='position_data_trays',
+        inference_id=download_position_data_trays_inference_id,
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
     processing_time = time.time() - processing_start
     logger.info('Downloaded {:.3f} minutes of position data in {:.3f} minutes (ratio of {:.3f})'.format(
         num_minutes,
@@ -3006,13 +4043,17 @@ def identify_pose_tracks_3d_local_by_segment(
         object_type='dict',
         pose_processing_subdirectory=pose_processing_subdirectory
     )
+    # Track IDs are categorical, so joining them onto each time segment's
+    # poses and counting poses per track work on integer codes
     pose_3d_ids_with_tracks_before_interpolation_df = process_pose_data.local_io.convert_pose_tracks_3d_to_df(
-        pose_tracks_3d=pose_tracks_3d_before_interpolation
+        pose_tracks_3d=pose_tracks_3d_before_interpolation,
+        encode_ids=True
     )
     pose_3d_ids_with_tracks_from_interpolation_df = process_pose_data.local_io.convert_pose_tracks_3d_to_df(
-        pose_tracks_3d=pose_tracks_3d_from_interpolation
+        pose_tracks_3d=pose_tracks_3d_from_interpolation,
+        encode_ids=True
     )
-    pose_3d_ids_with_tracks_df = pd.concat(
+    pose_3d_ids_with_tracks_df = process_pose_data.local_io.concat_data_objects(
         (pose_3d_ids_with_tracks_before_interpolation_df, pose_3d_ids_with_tracks_from_interpolation_df)
     ).sort_values('pose_track_3d_id')
     logger.info('Generating list of time segments')
@@ -3028,6 +4069,25 @@ def identify_pose_tracks_3d_local_by_segment(
         time_segment_start_list[0].isoformat(),
         time_segment_start_list[-1].isoformat()
     ))
+    manifests = process_pose_data.local_io.fetch_manifests_local(
+        base_dir=base_dir,
+        pipeline_stage='pose_reconstruction_3d',
+        environment_id=environment_id,
+        filename_stem='poses_3d',
+        inference_ids=[
+            pose_reconstruction_3d_inference_id,
+            pose_track_3d_interpolation_inference_id
+        ],
+        pose_processing_subdirectory=pose_processing_subdirectory
+    )
+    time_segment_start_list = process_pose_data.local_io.filter_time_segment_start_list_by_manifests(
+        time_segment_start_list=time_segment_start_list,
+        manifests=manifests
+    )
+    if manifests is not None:
+        logger.info('{} of these time segments may contain 3D poses'.format(
+            len(time_segment_start_list)
+        ))
     if task_progress_bar:
         if notebook:
             time_segment_start_iterator = tqdm.notebook.tqdm(time_segment_start_list)
@@ -3053,11 +4113,16 @@ def identify_pose_tracks_3d_local_by_segment(
             sort_field=None,
             time_segment_start=time_segment_start,
             object_type='dataframe',
-            pose_processing_subdirectory=pose_processing_subdirectory
+            pose_processing_subdirectory=pose_processing_subdirectory,
+            manifests=manifests,
+            columns=['timestamp', 'keypoint_coordinates_3d']
         )
         if len(poses_3d_time_segment_df) == 0:
             continue
-        poses_3d_with_tracks_time_segment_df = poses_3d_time_segment_df.join(pose_3d_ids_with_tracks_df, how='inner')
+        poses_3d_with_tracks_time_segment_df = process_pose_data.local_io.join_pose_tracks_3d(
+            poses_3d_df=poses_3d_time_segment_df,
+            pose_3d_ids_with_tracks_df=pose_3d_ids_with_tracks_df
+        )
         uwb_data_resampled_time_segment_df = process_pose_data.local_io.fetch_data_local(
             base_dir=base_dir,
             pipeline_stage='download_position_data',
@@ -3070,6 +4135,9 @@ def identify_pose_tracks_3d_local_by_segment(
             object_type='dataframe',
             pose_processing_subdirectory=pose_processing_subdirectory
         )
+        # poseconnect expects plain ID values rather than categorical codes
+        poses_3d_with_tracks_time_segment_df = process_pose_data.local_io.decode_id_columns(poses_3d_with_tracks_time_segment_df)
+        uwb_data_resampled_time_segment_df = process_pose_data.local_io.decode_id_columns(uwb_data_resampled_time_segment_df)
         # Identify poses
         if return_diagnostics:
             pose_identification_time_segment_df, diagnostics_time_segment_df = poseconnect.identify.generate_pose_identification(
@@ -3100,7 +4168,8 @@ def identify_pose_tracks_3d_local_by_segment(
     pose_track_identification_df = poseconnect.identify.generate_pose_track_identification(
         pose_identification=pose_identification_df
     )
-    num_poses_df = pose_3d_ids_with_tracks_df.groupby('pose_track_3d_id').size().to_frame(name='num_poses')
+    num_poses_df = pose_3d_ids_with_tracks_df.groupby('pose_track_3d_id', observed=True).size().to_frame(name='num_poses')
+    num_poses_df.index = num_poses_df.index.astype('object')
     pose_track_identification_df = pose_track_identification_df.join(num_poses_df, on='pose_track_3d_id')
     pose_track_identification_df['fraction_matched'] = pose_track_identification_df['max_matches']/pose_track_identification_df['num_poses']
     if min_fraction_matched is not None:
@@ -3920,6 +4989,97 @@ def overlay_pose_tracks_3d_identified_interpolated_local(
         notebook=notebook
     )
 
+def compact_time_segments_local(
+    start,
+    end,
+    base_dir,
+    environment_id,
+    pipeline_stage,
+    filename_stem,
+    inference_id,
+    period='day',
+    delete_segment_files=True,
+    pose_processing_subdirectory='pose_processing',
+    task_progress_bar=False,
+    notebook=False
+):
+    """
+    Packs the 10 second segment files for an inference into one file per day (or hour).
+
+    Each pack is saved as
+    \'BASE_DIR/POSE_PROCESSING_SUBDIRECTORY/PIPELINE_STAGE/ENVIRONMENT_ID/YYYY/MM/DD/FILENAME_STEM_INFERENCE_ID.pack\'
+    (for day packs) or
+    \'BASE_DIR/POSE_PROCESSING_SUBDIRECTORY/PIPELINE_STAGE/ENVIRONMENT_ID/YYYY/MM/DD/FILENAME_STEM_INFERENCE_ID_HH.pack\'
+    (for hour packs) and contains the time-sorted segment data along with an
+    index of byte offsets. fetch_data_local() and
+    fetch_data_local_by_time_segment() read packed segments transparently.
+    Segment files written after packing take precedence over packed data, and
+    running the compaction again folds them into the pack.
+
+    Args:
+        start (datetime): Start of period to be compacted
+        end (datetime): End of period to be compacted
+        base_dir: Base directory for local data (e.g., \'/data\')
+        environment_id (str): Honeycomb environment ID for source environment
+        pipeline_stage (str): Pipeline stage of data to be compacted (e.g., \'pose_reconstruction_3d\')
+        filename_stem (str): Filename stem of data to be compacted (e.g., \'poses_3d\')
+        inference_id (str): Inference ID of data to be compacted
+        period (str): Period covered by each pack (either \'day\' or \'hour\') (default is \'day\')
+        delete_segment_files (bool): Boolean indicating whether to delete segment files once they have been packed (default is True)
+        pose_processing_subdirectory (str): subdirectory (under base directory) for all pose processing data (default is \'pose_processing\')
+        task_progress_bar (bool): Boolean indicating whether script should display a progress bar (default is False)
+        notebook (bool): Boolean indicating whether script is being run in a Jupyter notebook (for progress bar display) (default is False)
+
+    Returns:
+        (int) Number of segments packed
+    """
+    if start.tzinfo is None:
+        logger.info('Specified start is timezone-naive. Assuming UTC')
+        start=start.replace(tzinfo=datetime.timezone.utc)
+    if end.tzinfo is None:
+        logger.info('Specified end is timezone-naive. Assuming UTC')
+        end=end.replace(tzinfo=datetime.timezone.utc)
+    period_start_list = process_pose_data.local_io.generate_pack_period_start_list(
+        start=start,
+        end=end,
+        period=period
+    )
+    logger.info('Packing {} data for inference ID {} into {} {} packs: {} to {}'.format(
+        pipeline_stage,
+        inference_id,
+        len(period_start_list),
+        period,
+        period_start_list[0].isoformat(),
+        period_start_list[-1].isoformat()
+    ))
+    processing_start = time.time()
+    if task_progress_bar:
+        if notebook:
+            period_start_iterator = tqdm.notebook.tqdm(period_start_list)
+        else:
+            period_start_iterator = tqdm.tqdm(period_start_list)
+    else:
+        period_start_iterator = period_start_list
+    num_segments = 0
+    for period_start in period_start_iterator:
+        num_segments += process_pose_data.local_io.pack_time_segments_local(
+            period_start=period_start,
+            base_dir=base_dir,
+            pipeline_stage=pipeline_stage,
+            environment_id=environment_id,
+            filename_stem=filename_stem,
+            inference_id=inference_id,
+            period=period,
+            delete_segment_files=delete_segment_files,
+            pose_processing_subdirectory=pose_processing_subdirectory
+        )
+    processing_time = time.time() - processing_start
+    logger.info('Packed {} segments in {:.3f} minutes'.format(
+        num_segments,
+        processing_time/60
+    ))
+    return num_segments
+
 def generate_metadata(
     environment_id,
     pipeline_stage,
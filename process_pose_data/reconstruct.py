@@ -0,0 +1,932 @@
+import process_pose_data.local_io
+import process_pose_data.shared_constants
+import poseconnect.reconstruct
+import poseconnect.filter
+import poseconnect.utils
+import poseconnect.defaults
+import cv_utils
+import pandas as pd
+import numpy as np
+import tqdm
+import tqdm.notebook
+import multiprocessing
+import threading
+import queue
+import warnings
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Per-process state for parallel reconstruction. Pool workers receive the
+# static inputs once through initialize_worker_context() (and, when the pool
+# forks, share the parent's copy until they write to it), so each task only
+# needs to carry its time segment start
+worker_context = dict()
+
+CALIBRATION_PARAMETER_NAMES = [
+    'camera_matrix',
+    'distortion_coefficients',
+    'rotation_vector',
+    'translation_vector'
+]
+
+def initialize_worker_context(
+    task_function,
+    task_kwargs,
+    camera_calibrations=None,
+    pose_3d_limits=None
+):
+    worker_context.clear()
+    worker_context['task_function'] = task_function
+    worker_context['task_kwargs'] = task_kwargs
+    if camera_calibrations is not None:
+        fetch_camera_data(camera_calibrations)
+        if pose_3d_limits is not None:
+            fetch_camera_pair_data(camera_calibrations, pose_3d_limits)
+
+def run_worker_task(task_argument):
+    return worker_context['task_function'](
+        task_argument,
+        **worker_context['task_kwargs']
+    )
+
+def run_pipeline_worker_task(task_argument):
+    time_segment_start, data_object = task_argument
+    return time_segment_start, worker_context['task_function'](
+        time_segment_start,
+        data_object,
+        **worker_context['task_kwargs']
+    )
+
+def run_worker_task_batch(task_arguments):
+    for task_argument in task_arguments:
+        run_worker_task(task_argument)
+    return len(task_arguments)
+
+def schedule_time_segments(
+    time_segment_start_list,
+    time_segment_costs=None,
+    num_processes=1,
+    tasks_per_process=process_pose_data.shared_constants.RECONSTRUCTION_TASKS_PER_PROCESS
+):
+    # Groups time segments into pool tasks. If costs are known (e.g., 2D pose
+    # counts from the manifests), segments with zero cost are dropped and the
+    # rest are dispatched longest first, with each task taking segments until
+    # it reaches the remaining cost divided by the target number of tasks, so
+    # busy segments run alone early and quiet ones are batched together near
+    # the end. Segments without a cost (missing or None) are kept and treated
+    # as being as costly as the costliest known segment. Otherwise each
+    # segment is its own task, in the original order
+    if time_segment_costs is None:
+        return [[time_segment_start] for time_segment_start in time_segment_start_list]
+    estimated_costs = estimate_time_segment_costs(
+        time_segment_start_list=time_segment_start_list,
+        time_segment_costs=time_segment_costs
+    )
+    time_segment_start_list = sort_time_segments_by_cost(
+        time_segment_start_list=[
+            time_segment_start for time_segment_start in time_segment_start_list
+            if estimated_costs[time_segment_start] > 0
+        ],
+        time_segment_costs=estimated_costs
+    )
+    num_tasks = max(num_processes, 1)*tasks_per_process
+    remaining_cost = sum([estimated_costs[time_segment_start] for time_segment_start in time_segment_start_list])
+    tasks = list()
+    task = list()
+    task_cost = 0
+    for time_segment_start in time_segment_start_list:
+        task.append(time_segment_start)
+        task_cost += estimated_costs[time_segment_start]
+        if task_cost >= remaining_cost/num_tasks:
+            tasks.append(task)
+            remaining_cost -= task_cost
+            task = list()
+            task_cost = 0
+    if len(task) > 0:
+        tasks.append(task)
+    return tasks
+
+def estimate_time_segment_costs(
+    time_segment_start_list,
+    time_segment_costs
+):
+    known_costs = [
+        time_segment_costs[time_segment_start] for time_segment_start in time_segment_start_list
+        if time_segment_costs.get(time_segment_start) is not None
+    ]
+    unknown_cost = max(known_costs + [1])
+    return {
+        time_segment_start: (
+            time_segment_costs[time_segment_start]
+            if time_segment_costs.get(time_segment_start) is not None
+            else unknown_cost
+        )
+        for time_segment_start in time_segment_start_list
+    }
+
+def sort_time_segments_by_cost(
+    time_segment_start_list,
+    time_segment_costs
+):
+    # Longest first, with segments of unknown cost at the front (see
+    # schedule_time_segments())
+    estimated_costs = estimate_time_segment_costs(
+        time_segment_start_list=time_segment_start_list,
+        time_segment_costs=time_segment_costs
+    )
+    return sorted(
+        time_segment_start_list,
+        key=lambda time_segment_start: estimated_costs[time_segment_start],
+        reverse=True
+    )
+
+def run_time_segment_tasks(
+    pool,
+    time_segment_tasks,
+    progress_bar=False,
+    notebook=False
+):
+    results = pool.imap_unordered(run_worker_task_batch, time_segment_tasks)
+    if not progress_bar:
+        list(results)
+        return
+    num_time_segments = sum([len(task) for task in time_segment_tasks])
+    if notebook:
+        progress = tqdm.notebook.tqdm(total=num_time_segments)
+    else:
+        progress = tqdm.tqdm(total=num_time_segments)
+    for num_time_segments_completed in results:
+        progress.update(num_time_segments_completed)
+    progress.close()
+
+def process_time_segments_pipelined(
+    time_segment_start_list,
+    fetch_function,
+    compute_function,
+    compute_kwargs,
+    write_function,
+    num_processes=None,
+    camera_calibrations=None,
+    pose_3d_limits=None,
+    manifests=None,
+    read_queue_depth=process_pose_data.shared_constants.DEFAULT_PIPELINE_READ_QUEUE_DEPTH,
+    write_queue_depth=process_pose_data.shared_constants.DEFAULT_PIPELINE_WRITE_QUEUE_DEPTH,
+    progress_bar=False,
+    notebook=False
+):
+    # Runs fetch_function(time_segment_start=...) ->
+    # compute_function(time_segment_start, data_object, **compute_kwargs) ->
+    # write_function(time_segment_start, output) for each time segment as
+    # three overlapping stages: reader threads fetch up to read_queue_depth
+    # time segments ahead of compute, compute runs in this process (or in a
+    # pool of num_processes workers), and a writer thread drains up to
+    # write_queue_depth finished time segments to disk. Full queues block the
+    # stage that feeds them, so memory stays bounded when one stage is slower.
+    # Time segments with no data, and compute results of None, are skipped
+    write_queue = queue.Queue(maxsize=max(write_queue_depth, 1))
+    write_errors = list()
+    def write_outputs():
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            if len(write_errors) > 0:
+                continue
+            time_segment_start, output = item
+            try:
+                write_function(time_segment_start, output)
+            except Exception as e:
+                write_errors.append(e)
+    writer_thread = threading.Thread(target=write_outputs, daemon=True)
+    writer_thread.start()
+    def enqueue_output(time_segment_start, output):
+        if len(write_errors) > 0:
+            raise write_errors[0]
+        if output is not None:
+            write_queue.put((time_segment_start, output))
+    time_segments = process_pose_data.local_io.fetch_time_segments_prefetched(
+        time_segment_start_list=time_segment_start_list,
+        fetch_function=fetch_function,
+        prefetch=read_queue_depth,
+        manifests=manifests
+    )
+    if progress_bar:
+        if notebook:
+            progress = tqdm.notebook.tqdm(total=len(time_segment_start_list))
+        else:
+            progress = tqdm.tqdm(total=len(time_segment_start_list))
+    try:
+        if num_processes is None or num_processes <= 1:
+            for time_segment_start, data_object in time_segments:
+                if data_object is not None and len(data_object) > 0:
+                    enqueue_output(
+                        time_segment_start,
+                        compute_function(time_segment_start, data_object, **compute_kwargs)
+                    )
+                if progress_bar:
+                    progress.update()
+        else:
+            # Pool.imap_unordered() would otherwise read the whole input
+            # iterator up front, so the reader waits for a free slot before
+            # handing each time segment to the pool
+            task_slots = threading.Semaphore(num_processes + read_queue_depth)
+            stop = threading.Event()
+            num_skipped = [0]
+            def generate_tasks():
+                for time_segment_start, data_object in time_segments:
+                    if data_object is None or len(data_object) == 0:
+                        num_skipped[0] += 1
+                        continue
+                    task_slots.acquire()
+                    if stop.is_set():
+                        return
+                    yield time_segment_start, data_object
+            with multiprocessing.Pool(
+                num_processes,
+                initializer=initialize_worker_context,
+                initargs=(
+                    compute_function,
+                    compute_kwargs,
+                    camera_calibrations,
+                    pose_3d_limits
+                )
+            ) as p:
+                try:
+                    for time_segment_start, output in p.imap_unordered(run_pipeline_worker_task, generate_tasks()):
+                        task_slots.release()
+                        enqueue_output(time_segment_start, output)
+                        if progress_bar:
+                            progress.update(1 + num_skipped[0])
+                            num_skipped[0] = 0
+                    if progress_bar:
+                        progress.update(num_skipped[0])
+                finally:
+                    stop.set()
+                    task_slots.release()
+    finally:
+        time_segments.close()
+        write_queue.put(None)
+        writer_thread.join()
+        if progress_bar:
+            progress.close()
+    if len(write_errors) > 0:
+        raise write_errors[0]
+
+def fetch_camera_data(camera_calibrations):
+    # Returns the derived camera data for these calibrations, reusing the
+    # copy computed when the worker was initialized if there is one
+    if worker_context.get('camera_calibrations') is camera_calibrations:
+        return worker_context['camera_data']
+    camera_data = generate_camera_data(camera_calibrations)
+    worker_context.pop('camera_pair_data', None)
+    worker_context['camera_calibrations'] = camera_calibrations
+    worker_context['camera_data'] = camera_data
+    return camera_data
+
+def fetch_camera_pair_data(camera_calibrations, pose_3d_limits):
+    # Same as fetch_camera_data() for the camera pair data, which also depends
+    # on the 3D pose limits (which define the room volume)
+    camera_data = fetch_camera_data(camera_calibrations)
+    if 'camera_pair_data' in worker_context and worker_context.get('pose_3d_limits') is pose_3d_limits:
+        return worker_context['camera_pair_data']
+    camera_pair_data = generate_camera_pair_data(
+        camera_data=camera_data,
+        pose_3d_limits=pose_3d_limits
+    )
+    worker_context['pose_3d_limits'] = pose_3d_limits
+    worker_context['camera_pair_data'] = camera_pair_data
+    return camera_pair_data
+
+def generate_camera_data(camera_calibrations):
+    camera_data = dict()
+    for camera_id, camera_calibration in camera_calibrations.items():
+        if any([camera_calibration.get(calibration_parameter) is None for calibration_parameter in CALIBRATION_PARAMETER_NAMES]):
+            continue
+        camera_matrix = np.asarray(camera_calibration['camera_matrix']).reshape((3, 3))
+        rotation_vector = np.asarray(camera_calibration['rotation_vector']).reshape(3)
+        translation_vector = np.asarray(camera_calibration['translation_vector']).reshape(3)
+        rotation_matrix = cv_utils.rotation_vector_to_rotation_matrix(rotation_vector)
+        camera_data[camera_id] = {
+            'camera_matrix': camera_matrix,
+            'distortion_coefficients': np.asarray(camera_calibration['distortion_coefficients']).reshape(-1),
+            'rotation_vector': rotation_vector,
+            'translation_vector': translation_vector,
+            'rotation_matrix': rotation_matrix,
+            'inverse_rotation_matrix': rotation_matrix.T,
+            'projection_matrix': cv_utils.generate_projection_matrix(
+                camera_matrix=camera_matrix,
+                rotation_vector=rotation_vector,
+                translation_vector=translation_vector
+            ),
+            'camera_position': cv_utils.extract_camera_position_rotation_matrix(
+                rotation_matrix=rotation_matrix,
+                translation_vector=translation_vector
+            ),
+            'image_width': camera_calibration.get('image_width'),
+            'image_height': camera_calibration.get('image_height')
+        }
+    return camera_data
+
+def generate_camera_pair_data(
+    camera_data,
+    pose_3d_limits=None,
+    grid_step=process_pose_data.shared_constants.VIEW_VOLUME_GRID_STEP,
+    image_margin=process_pose_data.shared_constants.VIEW_VOLUME_IMAGE_MARGIN
+):
+    # For each (ordered) pair of cameras, whether their views overlap inside
+    # the room and the fundamental matrix mapping undistorted image points in
+    # the first camera to epipolar lines in the second
+    camera_ids = list(camera_data.keys())
+    room_grid_points = generate_room_grid_points(
+        pose_3d_limits=pose_3d_limits,
+        grid_step=grid_step
+    )
+    if room_grid_points is not None:
+        room_grid_visibility = {
+            camera_id: room_points_visible(
+                room_points=room_grid_points,
+                camera_data_camera=camera_data[camera_id],
+                image_margin=image_margin
+            )
+            for camera_id in camera_ids
+        }
+    camera_pair_data = dict()
+    for camera_id_a in camera_ids:
+        for camera_id_b in camera_ids:
+            if camera_id_a == camera_id_b:
+                continue
+            if room_grid_points is not None:
+                overlap = bool(np.any(room_grid_visibility[camera_id_a] & room_grid_visibility[camera_id_b]))
+            else:
+                overlap = True
+            camera_pair_data[(camera_id_a, camera_id_b)] = {
+                'overlap': overlap,
+                'fundamental_matrix': fundamental_matrix(
+                    projection_matrix_a=camera_data[camera_id_a]['projection_matrix'],
+                    projection_matrix_b=camera_data[camera_id_b]['projection_matrix'],
+                    camera_position_a=camera_data[camera_id_a]['camera_position']
+                )
+            }
+    num_overlapping_camera_pairs = sum([data['overlap'] for data in camera_pair_data.values()])//2
+    logger.info('{} of {} camera pairs have overlapping views inside the room'.format(
+        num_overlapping_camera_pairs,
+        len(camera_pair_data)//2
+    ))
+    return camera_pair_data
+
+def generate_room_grid_points(
+    pose_3d_limits,
+    grid_step=process_pose_data.shared_constants.VIEW_VOLUME_GRID_STEP
+):
+    # Grid of points spanning the volume allowed by the 3D pose limits (None
+    # if the limits don't bound the volume)
+    if pose_3d_limits is None:
+        return None
+    pose_3d_limits = np.asarray(pose_3d_limits, dtype='float')
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', category=RuntimeWarning)
+        room_min = np.nanmin(pose_3d_limits[0].reshape((-1, 3)), axis=0)
+        room_max = np.nanmax(pose_3d_limits[1].reshape((-1, 3)), axis=0)
+    if not np.all(np.isfinite(room_min)) or not np.all(np.isfinite(room_max)):
+        return None
+    grid_axes = [
+        np.linspace(room_min[axis], room_max[axis], max(int(np.ceil((room_max[axis] - room_min[axis])/grid_step)) + 1, 2))
+        for axis in range(3)
+    ]
+    room_grid_points = np.stack(np.meshgrid(*grid_axes, indexing='ij'), axis=-1).reshape((-1, 3))
+    return room_grid_points
+
+def room_points_visible(
+    room_points,
+    camera_data_camera,
+    image_margin=process_pose_data.shared_constants.VIEW_VOLUME_IMAGE_MARGIN
+):
+    image_width = camera_data_camera.get('image_width')
+    image_height = camera_data_camera.get('image_height')
+    if image_width is None or image_height is None:
+        return np.full(len(room_points), True)
+    image_points = cv_utils.project_points(
+        object_points=room_points,
+        rotation_vector=camera_data_camera['rotation_vector'],
+        translation_vector=camera_data_camera['translation_vector'],
+        camera_matrix=camera_data_camera['camera_matrix'],
+        distortion_coefficients=camera_data_camera['distortion_coefficients'],
+        remove_behind_camera=True
+    ).reshape((-1, 2))
+    image_size = np.array([image_width, image_height], dtype='float')
+    with np.errstate(invalid='ignore'):
+        visible = np.all(
+            (image_points >= -image_margin*image_size) &
+            (image_points <= (1.0 + image_margin)*image_size),
+            axis=-1
+        )
+    return visible
+
+def fundamental_matrix(
+    projection_matrix_a,
+    projection_matrix_b,
+    camera_position_a
+):
+    epipole_b = np.matmul(projection_matrix_b, np.append(camera_position_a, 1.0))
+    epipole_b_cross_product_matrix = np.array([
+        [0.0, -epipole_b[2], epipole_b[1]],
+        [epipole_b[2], 0.0, -epipole_b[0]],
+        [-epipole_b[1], epipole_b[0], 0.0]
+    ])
+    return np.matmul(
+        epipole_b_cross_product_matrix,
+        np.matmul(projection_matrix_b, np.linalg.pinv(projection_matrix_a))
+    )
+
+def reconstruct_poses_3d(
+    poses_2d,
+    camera_calibrations,
+    pose_3d_limits=None,
+    min_keypoint_quality=poseconnect.defaults.RECONSTRUCTION_MIN_KEYPOINT_QUALITY,
+    min_num_keypoints=poseconnect.defaults.RECONSTRUCTION_MIN_NUM_KEYPOINTS,
+    min_pose_quality=poseconnect.defaults.RECONSTRUCTION_MIN_POSE_QUALITY,
+    min_pose_pair_score=poseconnect.defaults.RECONSTRUCTION_MIN_POSE_PAIR_SCORE,
+    max_pose_pair_score=poseconnect.defaults.RECONSTRUCTION_MAX_POSE_PAIR_SCORE,
+    pose_pair_score_distance_method=poseconnect.defaults.RECONSTRUCTION_POSE_PAIR_SCORE_DISTANCE_METHOD,
+    pose_3d_graph_initial_edge_threshold=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_INITIAL_EDGE_THRESHOLD,
+    pose_3d_graph_max_dispersion=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_MAX_DISPERSION,
+    include_track_labels=poseconnect.defaults.RECONSTRUCTION_INCLUDE_TRACK_LABELS,
+    reconstruction_backend=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BACKEND,
+    progress_bar=False,
+    notebook=False
+):
+    if reconstruction_backend == 'poseconnect':
+        return poseconnect.reconstruct.reconstruct_poses_3d(
+            poses_2d=poses_2d,
+            camera_calibrations=camera_calibrations,
+            pose_3d_limits=pose_3d_limits,
+            min_keypoint_quality=min_keypoint_quality,
+            min_num_keypoints=min_num_keypoints,
+            min_pose_quality=min_pose_quality,
+            min_pose_pair_score=min_pose_pair_score,
+            max_pose_pair_score=max_pose_pair_score,
+            pose_pair_score_distance_method=pose_pair_score_distance_method,
+            pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
+            pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
+            include_track_labels=include_track_labels,
+            parallel=False,
+            progress_bar=progress_bar,
+            notebook=notebook
+        )
+    if reconstruction_backend == 'batched':
+        return reconstruct_poses_3d_batched(
+            poses_2d=poses_2d,
+            camera_calibrations=camera_calibrations,
+            pose_3d_limits=pose_3d_limits,
+            min_keypoint_quality=min_keypoint_quality,
+            min_num_keypoints=min_num_keypoints,
+            min_pose_quality=min_pose_quality,
+            min_pose_pair_score=min_pose_pair_score,
+            max_pose_pair_score=max_pose_pair_score,
+            pose_pair_score_distance_method=pose_pair_score_distance_method,
+            pose_3d_graph_initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
+            pose_3d_graph_max_dispersion=pose_3d_graph_max_dispersion,
+            include_track_labels=include_track_labels,
+            progress_bar=progress_bar,
+            notebook=notebook
+        )
+    raise ValueError('Only allowed reconstruction backends are {}'.format(
+        process_pose_data.shared_constants.SUPPORTED_RECONSTRUCTION_BACKENDS
+    ))
+
+def reconstruct_poses_3d_batched(
+    poses_2d,
+    camera_calibrations,
+    pose_3d_limits=None,
+    min_keypoint_quality=poseconnect.defaults.RECONSTRUCTION_MIN_KEYPOINT_QUALITY,
+    min_num_keypoints=poseconnect.defaults.RECONSTRUCTION_MIN_NUM_KEYPOINTS,
+    min_pose_quality=poseconnect.defaults.RECONSTRUCTION_MIN_POSE_QUALITY,
+    min_pose_pair_score=poseconnect.defaults.RECONSTRUCTION_MIN_POSE_PAIR_SCORE,
+    max_pose_pair_score=poseconnect.defaults.RECONSTRUCTION_MAX_POSE_PAIR_SCORE,
+    pose_pair_score_distance_method=poseconnect.defaults.RECONSTRUCTION_POSE_PAIR_SCORE_DISTANCE_METHOD,
+    pose_3d_graph_initial_edge_threshold=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_INITIAL_EDGE_THRESHOLD,
+    pose_3d_graph_max_dispersion=poseconnect.defaults.RECONSTRUCTION_POSE_3D_GRAPH_MAX_DISPERSION,
+    include_track_labels=poseconnect.defaults.RECONSTRUCTION_INCLUDE_TRACK_LABELS,
+    pose_pair_prefilter=True,
+    batch_size=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BATCH_SIZE,
+    progress_bar=False,
+    notebook=False
+):
+    # Produces the same 3D poses as poseconnect.reconstruct.reconstruct_poses_3d()
+    # but generates, triangulates, reprojects, scores, and filters the
+    # candidate pose pairs for all timestamps and camera pairs at once. Only
+    # the final grouping of pose pairs into people runs timestamp by timestamp.
+    # With the prefilter enabled, pose pairs from cameras that can't see the
+    # same part of the room, or whose epipolar error rules out an acceptable
+    # reprojection score, are dropped before triangulation
+    poses_2d = poseconnect.utils.ingest_poses_2d(poses_2d)
+    camera_data = fetch_camera_data(camera_calibrations)
+    missing_cameras = [camera_id for camera_id in poses_2d['camera_id'].unique() if camera_id not in camera_data]
+    for camera_id in missing_cameras:
+        logger.warning('Camera {} in data is missing calibration information. Excluding these poses.'.format(
+            camera_id
+        ))
+    if len(missing_cameras) > 0:
+        poses_2d = poses_2d.loc[~poses_2d['camera_id'].isin(missing_cameras)]
+    if len(poses_2d) == 0:
+        return empty_poses_3d()
+    num_frames = poses_2d['timestamp'].nunique()
+    logger.info('Reconstructing 3D poses from {} 2D poses across {} frames ({} to {}) using batched triangulation'.format(
+        len(poses_2d),
+        num_frames,
+        poses_2d['timestamp'].min().isoformat(),
+        poses_2d['timestamp'].max().isoformat()
+    ))
+    start_time = time.time()
+    if min_keypoint_quality is not None:
+        poses_2d = poseconnect.filter.filter_keypoints_by_quality(
+            poses_2d=poses_2d,
+            min_keypoint_quality=min_keypoint_quality
+        )
+    poses_2d = poseconnect.filter.remove_empty_2d_poses(
+        poses_2d=poses_2d
+    )
+    if min_num_keypoints is not None:
+        poses_2d = poseconnect.filter.filter_poses_by_num_valid_keypoints(
+            poses_2d=poses_2d,
+            min_num_keypoints=min_num_keypoints
+        )
+    if min_pose_quality is not None:
+        poses_2d = poseconnect.filter.filter_poses_by_quality(
+            poses_2d=poses_2d,
+            min_pose_quality=min_pose_quality
+        )
+    pose_pair_indices_a, pose_pair_indices_b = generate_pose_pair_indices(poses_2d)
+    if len(pose_pair_indices_a) == 0:
+        return empty_poses_3d()
+    if poses_2d['keypoint_coordinates_2d'].apply(len).nunique() > 1:
+        raise ValueError('Keypoint arrays have differing numbers of keypoints')
+    keypoints_2d = np.stack(poses_2d['keypoint_coordinates_2d'].values)
+    camera_indices, camera_ids = pd.factorize(poses_2d['camera_id'])
+    keypoints_2d_undistorted = np.full_like(keypoints_2d, np.nan)
+    for camera_index, camera_id in enumerate(camera_ids):
+        camera_mask = (camera_indices == camera_index)
+        keypoints_2d_undistorted[camera_mask] = cv_utils.undistort_points(
+            keypoints_2d[camera_mask],
+            camera_data[camera_id]['camera_matrix'],
+            camera_data[camera_id]['distortion_coefficients']
+        ).reshape(keypoints_2d[camera_mask].shape)
+    if pose_pair_prefilter:
+        prefilter = prefilter_pose_pairs(
+            pose_pair_indices_a=pose_pair_indices_a,
+            pose_pair_indices_b=pose_pair_indices_b,
+            keypoints_2d_undistorted=keypoints_2d_undistorted,
+            camera_indices=camera_indices,
+            camera_ids=camera_ids,
+            camera_data=camera_data,
+            camera_pair_data=fetch_camera_pair_data(camera_calibrations, pose_3d_limits),
+            max_pose_pair_score=max_pose_pair_score,
+            pose_pair_score_distance_method=pose_pair_score_distance_method,
+            batch_size=batch_size
+        )
+        logger.debug('Prefilter removed {} of {} candidate pose pairs'.format(
+            np.count_nonzero(~prefilter),
+            len(prefilter)
+        ))
+        pose_pair_indices_a = pose_pair_indices_a[prefilter]
+        pose_pair_indices_b = pose_pair_indices_b[prefilter]
+        if len(pose_pair_indices_a) == 0:
+            return empty_poses_3d()
+    projection_matrices = np.stack([camera_data[camera_id]['projection_matrix'] for camera_id in camera_ids])
+    valid_pose_pair_indices = list()
+    keypoint_coordinates_3d = list()
+    scores = list()
+    for batch_start in range(0, len(pose_pair_indices_a), batch_size):
+        indices_a = pose_pair_indices_a[batch_start:(batch_start + batch_size)]
+        indices_b = pose_pair_indices_b[batch_start:(batch_start + batch_size)]
+        camera_indices_a = camera_indices[indices_a]
+        camera_indices_b = camera_indices[indices_b]
+        keypoints_3d = triangulate_image_points_batched(
+            image_points_a=keypoints_2d_undistorted[indices_a],
+            image_points_b=keypoints_2d_undistorted[indices_b],
+            projection_matrices_a=projection_matrices[camera_indices_a],
+            projection_matrices_b=projection_matrices[camera_indices_b]
+        )
+        keypoints_a_reprojected = np.full(keypoints_3d.shape[:-1] + (2,), np.nan)
+        keypoints_b_reprojected = np.full(keypoints_3d.shape[:-1] + (2,), np.nan)
+        for camera_index, camera_id in enumerate(camera_ids):
+            camera_mask_a = (camera_indices_a == camera_index)
+            camera_mask_b = (camera_indices_b == camera_index)
+            num_a = np.count_nonzero(camera_mask_a)
+            if num_a + np.count_nonzero(camera_mask_b) == 0:
+                continue
+            keypoints_reprojected = cv_utils.project_points(
+                object_points=np.concatenate((keypoints_3d[camera_mask_a], keypoints_3d[camera_mask_b])),
+                rotation_vector=camera_data[camera_id]['rotation_vector'],
+                translation_vector=camera_data[camera_id]['translation_vector'],
+                camera_matrix=camera_data[camera_id]['camera_matrix'],
+                distortion_coefficients=camera_data[camera_id]['distortion_coefficients'],
+                remove_behind_camera=True
+            ).reshape((-1,) + keypoints_3d.shape[1:-1] + (2,))
+            keypoints_a_reprojected[camera_mask_a] = keypoints_reprojected[:num_a]
+            keypoints_b_reprojected[camera_mask_b] = keypoints_reprojected[num_a:]
+        score = score_pose_pairs_batched(
+            keypoints_a=keypoints_2d[indices_a],
+            keypoints_b=keypoints_2d[indices_b],
+            keypoints_a_reprojected=keypoints_a_reprojected,
+            keypoints_b_reprojected=keypoints_b_reprojected,
+            keypoints_3d=keypoints_3d,
+            camera_ids_a=camera_ids[camera_indices_a],
+            camera_ids_b=camera_ids[camera_indices_b],
+            camera_data=camera_data,
+            distance_method=pose_pair_score_distance_method
+        )
+        valid = (
+            non_empty_keypoint_arrays(keypoints_3d) &
+            non_empty_keypoint_arrays(keypoints_a_reprojected) &
+            non_empty_keypoint_arrays(keypoints_b_reprojected) &
+            ~np.isnan(score)
+        )
+        if min_pose_pair_score is not None:
+            valid &= (score >= min_pose_pair_score)
+        if max_pose_pair_score is not None:
+            valid &= (score <= max_pose_pair_score)
+        if pose_3d_limits is not None:
+            valid &= poses_3d_in_range(keypoints_3d, pose_3d_limits)
+        valid_pose_pair_indices.append(batch_start + np.flatnonzero(valid))
+        keypoint_coordinates_3d.extend(keypoints_3d[valid])
+        scores.append(score[valid])
+    valid_pose_pair_indices = np.concatenate(valid_pose_pair_indices)
+    indices_a = pose_pair_indices_a[valid_pose_pair_indices]
+    indices_b = pose_pair_indices_b[valid_pose_pair_indices]
+    pose_pairs_2d = pd.DataFrame({
+        'pose_2d_id_a': poses_2d.index.values[indices_a],
+        'pose_2d_id_b': poses_2d.index.values[indices_b],
+        'timestamp': poses_2d['timestamp'].take(indices_a).reset_index(drop=True),
+        'camera_id_a': camera_ids[camera_indices[indices_a]],
+        'camera_id_b': camera_ids[camera_indices[indices_b]],
+        'pose_quality_2d_a': poses_2d['pose_quality_2d'].values[indices_a],
+        'pose_quality_2d_b': poses_2d['pose_quality_2d'].values[indices_b],
+        'keypoint_coordinates_3d': pd.Series(keypoint_coordinates_3d, dtype='object'),
+        'score': np.concatenate(scores)
+    })
+    pose_pairs_2d = filter_pose_pairs_by_best_match_batched(pose_pairs_2d)
+    pose_pairs_2d.set_index(['pose_2d_id_a', 'pose_2d_id_b'], inplace=True)
+    poses_3d_list = list()
+    timestamp_groups = pose_pairs_2d.groupby('timestamp')
+    if progress_bar:
+        if notebook:
+            timestamp_groups = tqdm.notebook.tqdm(timestamp_groups)
+        else:
+            timestamp_groups = tqdm.tqdm(timestamp_groups)
+    for timestamp, pose_pairs_2d_timestamp in timestamp_groups:
+        poses_3d_timestamp = poseconnect.reconstruct.generate_3d_poses_timestamp(
+            pose_pairs_2d_timestamp=pose_pairs_2d_timestamp,
+            initial_edge_threshold=pose_3d_graph_initial_edge_threshold,
+            max_dispersion=pose_3d_graph_max_dispersion,
+            include_track_labels=include_track_labels
+        )
+        if len(poses_3d_timestamp) > 0:
+            poses_3d_list.append(poses_3d_timestamp.set_index('pose_3d_id'))
+    if len(poses_3d_list) == 0:
+        return empty_poses_3d()
+    poses_3d = pd.concat(poses_3d_list)
+    poses_3d.sort_values('timestamp', inplace=True)
+    elapsed_time = time.time() - start_time
+    logger.info('Generated {} 3D poses in {:.1f} seconds ({:.3f} ms/frame)'.format(
+        len(poses_3d),
+        elapsed_time,
+        1000*elapsed_time/num_frames
+    ))
+    return poses_3d
+
+def generate_pose_pair_indices(poses_2d):
+    # Pairs every 2D pose with every 2D pose from a different camera at the
+    # same timestamp. Within each timestamp, camera A is the camera that
+    # appears first in the data (as in poseconnect)
+    if len(poses_2d) == 0:
+        return np.zeros(0, dtype='int'), np.zeros(0, dtype='int')
+    poses = pd.DataFrame({
+        'timestamp_index': pd.factorize(poses_2d['timestamp'])[0],
+        'camera_order': poses_2d.groupby(['timestamp', 'camera_id'], sort=False).ngroup().values,
+        'pose_index': np.arange(len(poses_2d))
+    })
+    pose_pairs = poses.merge(
+        poses,
+        on='timestamp_index',
+        suffixes=('_a', '_b')
+    )
+    pose_pairs = pose_pairs.loc[pose_pairs['camera_order_a'] < pose_pairs['camera_order_b']]
+    return pose_pairs['pose_index_a'].values, pose_pairs['pose_index_b'].values
+
+def prefilter_pose_pairs(
+    pose_pair_indices_a,
+    pose_pair_indices_b,
+    keypoints_2d_undistorted,
+    camera_indices,
+    camera_ids,
+    camera_data,
+    camera_pair_data,
+    max_pose_pair_score=poseconnect.defaults.RECONSTRUCTION_MAX_POSE_PAIR_SCORE,
+    pose_pair_score_distance_method=poseconnect.defaults.RECONSTRUCTION_POSE_PAIR_SCORE_DISTANCE_METHOD,
+    epipolar_tolerance=process_pose_data.shared_constants.EPIPOLAR_PREFILTER_TOLERANCE,
+    batch_size=process_pose_data.shared_constants.DEFAULT_RECONSTRUCTION_BATCH_SIZE
+):
+    num_cameras = len(camera_ids)
+    overlap = np.full((num_cameras, num_cameras), True)
+    fundamental_matrices = np.zeros((num_cameras, num_cameras, 3, 3))
+    for camera_index_a, camera_id_a in enumerate(camera_ids):
+        for camera_index_b, camera_id_b in enumerate(camera_ids):
+            if camera_index_a == camera_index_b:
+                continue
+            overlap[camera_index_a, camera_index_b] = camera_pair_data[(camera_id_a, camera_id_b)]['overlap']
+            fundamental_matrices[camera_index_a, camera_index_b] = camera_pair_data[(camera_id_a, camera_id_b)]['fundamental_matrix']
+    camera_indices_a = camera_indices[pose_pair_indices_a]
+    camera_indices_b = camera_indices[pose_pair_indices_b]
+    prefilter = overlap[camera_indices_a, camera_indices_b]
+    # The RMS reprojection error of a triangulated pose pair can't be much
+    # smaller than its RMS epipolar (Sampson) error, so pose pairs far above
+    # the maximum score in epipolar error can be dropped without
+    # triangulating them. Only available for pixel-based scores
+    if max_pose_pair_score is None:
+        return prefilter
+    if pose_pair_score_distance_method == 'pixels':
+        max_epipolar_scores = np.full(len(prefilter), epipolar_tolerance*max_pose_pair_score)
+    elif pose_pair_score_distance_method == 'image_frac':
+        image_widths = np.array(
+            [camera_data[camera_id]['image_width'] for camera_id in camera_ids],
+            dtype='float'
+        )
+        max_epipolar_scores = epipolar_tolerance*max_pose_pair_score*np.maximum(
+            image_widths[camera_indices_a],
+            image_widths[camera_indices_b]
+        )
+    else:
+        return prefilter
+    for batch_start in range(0, len(prefilter), batch_size):
+        batch = slice(batch_start, batch_start + batch_size)
+        epipolar_scores = score_pose_pairs_epipolar(
+            image_points_a=keypoints_2d_undistorted[pose_pair_indices_a[batch]],
+            image_points_b=keypoints_2d_undistorted[pose_pair_indices_b[batch]],
+            fundamental_matrices=fundamental_matrices[camera_indices_a[batch], camera_indices_b[batch]]
+        )
+        with np.errstate(invalid='ignore'):
+            prefilter[batch] &= ~(epipolar_scores > max_epipolar_scores[batch])
+    return prefilter
+
+def score_pose_pairs_epipolar(
+    image_points_a,
+    image_points_b,
+    fundamental_matrices
+):
+    # RMS Sampson distance across keypoints, scaled to match the score
+    # definition (which averages over both cameras)
+    image_points_a = np.concatenate((image_points_a, np.ones(image_points_a.shape[:-1] + (1,))), axis=-1)
+    image_points_b = np.concatenate((image_points_b, np.ones(image_points_b.shape[:-1] + (1,))), axis=-1)
+    epipolar_lines_b = np.einsum('nij,nkj->nki', fundamental_matrices, image_points_a)
+    epipolar_lines_a = np.einsum('nji,nkj->nki', fundamental_matrices, image_points_b)
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', category=RuntimeWarning)
+        sampson_distances_squared = np.divide(
+            np.square(np.sum(image_points_b*epipolar_lines_b, axis=-1)),
+            np.sum(np.square(epipolar_lines_b[..., :2]), axis=-1) + np.sum(np.square(epipolar_lines_a[..., :2]), axis=-1)
+        )
+        epipolar_scores = np.sqrt(np.nanmean(sampson_distances_squared, axis=-1)/2)
+    return epipolar_scores
+
+def triangulate_image_points_batched(
+    image_points_a,
+    image_points_b,
+    projection_matrices_a,
+    projection_matrices_b
+):
+    # Direct linear transform for arrays of undistorted image points with
+    # shape (NUM_POSE_PAIRS, NUM_KEYPOINTS, 2) and projection matrices with
+    # shape (NUM_POSE_PAIRS, 3, 4), solved for all points in one call (same
+    # linear system as cv.triangulatePoints())
+    projection_matrices_a = np.expand_dims(projection_matrices_a, axis=1)
+    projection_matrices_b = np.expand_dims(projection_matrices_b, axis=1)
+    linear_systems = np.stack(
+        (
+            image_points_a[..., 0:1]*projection_matrices_a[..., 2, :] - projection_matrices_a[..., 0, :],
+            image_points_a[..., 1:2]*projection_matrices_a[..., 2, :] - projection_matrices_a[..., 1, :],
+            image_points_b[..., 0:1]*projection_matrices_b[..., 2, :] - projection_matrices_b[..., 0, :],
+            image_points_b[..., 1:2]*projection_matrices_b[..., 2, :] - projection_matrices_b[..., 1, :]
+        ),
+        axis=-2
+    )
+    object_points = np.full(image_points_a.shape[:-1] + (3,), np.nan)
+    valid = np.all(np.isfinite(linear_systems), axis=(-1, -2))
+    if not np.any(valid):
+        return object_points
+    object_points_homogeneous = np.linalg.svd(linear_systems[valid])[2][..., -1, :]
+    scale = object_points_homogeneous[:, 3:]
+    scale = np.divide(1.0, scale, out=np.ones_like(scale), where=(scale != 0.0))
+    object_points[valid] = object_points_homogeneous[:, :3]*scale
+    return object_points
+
+def score_pose_pairs_batched(
+    keypoints_a,
+    keypoints_b,
+    keypoints_a_reprojected,
+    keypoints_b_reprojected,
+    keypoints_3d,
+    camera_ids_a,
+    camera_ids_b,
+    camera_data,
+    distance_method=poseconnect.defaults.RECONSTRUCTION_POSE_PAIR_SCORE_DISTANCE_METHOD
+):
+    # Same score as poseconnect.reconstruct.score_pose_pairs(): RMS
+    # reprojection error across both cameras and all keypoints
+    reprojection_differences_pixels = np.stack(
+        (
+            np.subtract(keypoints_a_reprojected, keypoints_a),
+            np.subtract(keypoints_b_reprojected, keypoints_b)
+        ),
+        axis=1
+    )
+    if distance_method == 'pixels':
+        reprojection_differences = reprojection_differences_pixels
+    elif distance_method == 'image_frac':
+        image_widths = np.stack(
+            (
+                [camera_data[camera_id]['image_width'] for camera_id in camera_ids_a],
+                [camera_data[camera_id]['image_width'] for camera_id in camera_ids_b]
+            ),
+            axis=1
+        ).astype('float')
+        reprojection_differences = np.divide(
+            reprojection_differences_pixels,
+            np.expand_dims(image_widths, axis=(2, 3))
+        )
+    elif distance_method == '3d':
+        camera_positions = np.stack(
+            (
+                np.stack([camera_data[camera_id]['camera_position'] for camera_id in camera_ids_a]),
+                np.stack([camera_data[camera_id]['camera_position'] for camera_id in camera_ids_b])
+            ),
+            axis=1
+        )
+        focal_lengths = np.stack(
+            (
+                np.stack([np.diag(camera_data[camera_id]['camera_matrix'])[:2] for camera_id in camera_ids_a]),
+                np.stack([np.diag(camera_data[camera_id]['camera_matrix'])[:2] for camera_id in camera_ids_b])
+            ),
+            axis=1
+        )
+        camera_distances = np.linalg.norm(
+            np.subtract(
+                np.expand_dims(keypoints_3d, axis=1),
+                np.expand_dims(camera_positions, axis=-2)
+            ),
+            axis=-1
+        )
+        reprojection_differences = np.multiply(
+            np.divide(
+                reprojection_differences_pixels,
+                np.expand_dims(focal_lengths, axis=-2)
+            ),
+            np.expand_dims(camera_distances, axis=-1)
+        )
+    else:
+        raise ValueError('Distance method not recognized')
+    reprojection_distances = np.linalg.norm(reprojection_differences, axis=-1)
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', category=RuntimeWarning)
+        score = np.sqrt(np.nanmean(np.square(reprojection_distances), axis=(-1, -2)))
+    return score
+
+def non_empty_keypoint_arrays(keypoint_arrays):
+    return np.any(np.all(np.isfinite(keypoint_arrays), axis=-1), axis=-1)
+
+def poses_3d_in_range(
+    poses_3d,
+    pose_3d_limits
+):
+    # Vectorized poseconnect.reconstruct.pose_3d_in_range(): missing keypoints
+    # and missing limits always pass
+    pose_3d_limits = np.asarray(pose_3d_limits)
+    not_checked = ~np.isfinite(poses_3d)
+    with np.errstate(invalid='ignore'):
+        above_min = np.greater_equal(poses_3d, pose_3d_limits[0]) | not_checked | ~np.isfinite(pose_3d_limits[0])
+        below_max = np.less_equal(poses_3d, pose_3d_limits[1]) | not_checked | ~np.isfinite(pose_3d_limits[1])
+    return np.all(above_min & below_max, axis=(-1, -2))
+
+def filter_pose_pairs_by_best_match_batched(pose_pairs_2d):
+    # Keeps pose pairs in which each pose is the other pose's best match
+    # within its timestamp and camera pair (as in
+    # poseconnect.filter.filter_pose_pairs_by_best_match(), applied to all
+    # timestamps at once)
+    if len(pose_pairs_2d) == 0:
+        return pose_pairs_2d
+    pose_pairs_2d = pose_pairs_2d.sort_values(['pose_2d_id_a', 'pose_2d_id_b']).reset_index(drop=True)
+    best_a_score_for_b = pose_pairs_2d.groupby(['camera_id_a', 'pose_2d_id_b'])['score'].idxmin()
+    best_b_score_for_a = pose_pairs_2d.groupby(['camera_id_b', 'pose_2d_id_a'])['score'].idxmin()
+    best_score_indices = np.intersect1d(best_a_score_for_b.values, best_b_score_for_a.values)
+    return pose_pairs_2d.loc[best_score_indices]
+
+def empty_poses_3d():
+    poses_3d = pd.DataFrame([], columns=[
+        'pose_3d_id',
+        'timestamp',
+        'keypoint_coordinates_3d',
+        'pose_2d_ids'
+    ])
+    return poseconnect.utils.ingest_poses_3d(poses_3d)
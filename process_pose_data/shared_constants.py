@@ -27,4 +27,88 @@ DEFAULT_BATCH_LENGTH_MINUTES = 10
 VIDEO_DURATION_SECONDS = 10
 VIDEO_FRAMES_PER_SECOND = 10
 VIDEO_FRAMES_PER_VIDEO = 100
-VIDEO_FRAME_PERIOD_MICROSECONDS = 100000
\ No newline at end of file
+VIDEO_FRAME_PERIOD_MICROSECONDS = 100000
+# Local storage formats (file extension for each object type)
+DATA_FILE_EXTENSIONS = {
+    'dataframe': 'pkl',
+    'dict': 'pkl',
+    'columnar': 'npz'
+}
+SUPPORTED_OBJECT_TYPES = list(DATA_FILE_EXTENSIONS.keys())
+DEFAULT_OUTPUT_OBJECT_TYPE = 'dataframe'
+
+# Read-ahead for fetching local data by time segment
+DEFAULT_PREFETCH_NUM_SEGMENTS = 8
+DEFAULT_PREFETCH_MAX_BYTES = 1024**3
+
+# Maximum number of pack files (see local_io.pack_time_segments_local()) kept
+# open with their indexes parsed
+MAX_OPEN_PACK_FILES = 64
+
+# Optional in-process cache for segment file reads (see local_io.enable_segment_cache())
+DEFAULT_SEGMENT_CACHE_MAX_BYTES = 2*1024**3
+
+# Compression codecs for segment files (None for uncompressed). Codecs are
+# detected from the file contents on read. 'zstd' and 'lz4' require the
+# optional zstandard and lz4 packages
+SUPPORTED_STORAGE_CODECS = [None, 'gzip', 'bz2', 'lzma', 'zstd', 'lz4']
+DEFAULT_STORAGE_CODEC = None
+
+# Storage precision for keypoint columns. 'float32' halves the size of
+# keypoint arrays; 'int16' additionally quantizes 2D pixel coordinates (in
+# units of 1/KEYPOINT_INT16_SCALE pixels, or coarser when a column has
+# coordinates beyond the int16 range at that scale; columnar storage only).
+# Readers upcast to DEFAULT_KEYPOINT_DTYPE unless asked for the stored
+# precision
+KEYPOINT_COLUMN_NAMES = [
+    'keypoint_coordinates_2d',
+    'keypoint_quality_2d',
+    'keypoint_coordinates_3d',
+    'keypoint_quality_3d'
+]
+QUANTIZABLE_KEYPOINT_COLUMN_NAMES = ['keypoint_coordinates_2d']
+SUPPORTED_KEYPOINT_DTYPES = ['float64', 'float32', 'int16']
+DEFAULT_KEYPOINT_DTYPE = 'float64'
+KEYPOINT_INT16_SCALE = 10
+
+# ID columns that repeat across rows and can be stored as categoricals (see
+# local_io.encode_id_columns())
+ID_COLUMN_NAMES = [
+    'camera_id',
+    'assignment_id',
+    'person_id',
+    'pose_track_3d_id'
+]
+
+# Backends for 3D pose reconstruction. 'poseconnect' triangulates each camera
+# pair at each timestamp separately; 'batched' triangulates every candidate
+# pose pair in a time segment in a single vectorized solve (see
+# reconstruct.reconstruct_poses_3d_batched())
+SUPPORTED_RECONSTRUCTION_BACKENDS = ['poseconnect', 'batched']
+DEFAULT_RECONSTRUCTION_BACKEND = 'poseconnect'
+
+# Maximum number of candidate pose pairs triangulated in a single vectorized
+# solve by the batched reconstruction backend (bounds memory use)
+DEFAULT_RECONSTRUCTION_BATCH_SIZE = 10000
+
+# Pose pair prefilter for the batched reconstruction backend. Camera pairs
+# whose views never overlap inside the room (sampled on a grid with this
+# spacing in meters, counting points within this fraction of the image size
+# outside the frame) are never paired, and pose pairs whose epipolar error
+# exceeds the maximum pose pair score by more than this factor are dropped
+# before triangulation
+VIEW_VOLUME_GRID_STEP = 0.1
+VIEW_VOLUME_IMAGE_MARGIN = 0.1
+EPIPOLAR_PREFILTER_TOLERANCE = 2.0
+
+# Queue depths (in time segments) for pipelined reconstruction: how far the
+# reader runs ahead of compute, and how many finished time segments can wait
+# for the writer
+DEFAULT_PIPELINE_READ_QUEUE_DEPTH = 4
+DEFAULT_PIPELINE_WRITE_QUEUE_DEPTH = 4
+
+# Target number of tasks per worker process when parallel reconstruction
+# groups time segments by estimated cost. Segments are dispatched longest
+# first and task sizes shrink as the remaining work shrinks, so workers finish
+# close together
+RECONSTRUCTION_TASKS_PER_PROCESS = 4
@@ -18,7 +18,7 @@ BASE_DEPENDENCIES = [
     'wf-video-io>=1.0.0',
     'wf-geom-render>=0.3.0',
     'poseconnect>=0.1.0',
-    'pandas>=1.2.2',
+    'pandas>=1.2.2,<3',
     'numpy>=1.20.1',
     'opencv-python>=4.5.1',
     'matplotlib>=3.3.4',
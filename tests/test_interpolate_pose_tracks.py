@@ -0,0 +1,156 @@
+import datetime
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('poseconnect.track')
+pytest.importorskip('honeycomb_io')
+pytest.importorskip('pose_db_io')
+pytest.importorskip('video_io')
+
+import process_pose_data.local_io
+import process_pose_data.process
+
+NUM_KEYPOINTS = 17
+ENVIRONMENT_ID = 'environment'
+START = datetime.datetime(2023, 1, 1, 10, 0, 3, tzinfo=datetime.timezone.utc)
+
+def generate_pose_track(rng, start, num_frames, missing_keypoints):
+    # Keypoints drift smoothly so that interpolated values are easy to tell
+    # apart. Some frames are dropped (gaps to interpolate) and the listed
+    # keypoints are missing over the specified frame ranges
+    frame_numbers = np.flatnonzero(rng.random(num_frames) > 0.3)
+    frame_numbers = np.union1d(frame_numbers, [0, num_frames - 1])
+    keypoints = (
+        rng.uniform(0, 5, (1, NUM_KEYPOINTS, 3)) +
+        np.cumsum(rng.normal(0, 0.02, (num_frames, NUM_KEYPOINTS, 3)), axis=0)
+    )
+    keypoints[rng.random((num_frames, NUM_KEYPOINTS)) < 0.05] = np.nan
+    for keypoint_index, (first_frame, last_frame) in missing_keypoints.items():
+        keypoints[first_frame:last_frame, keypoint_index] = np.nan
+    return pd.DataFrame(
+        {
+            'timestamp': [start + datetime.timedelta(milliseconds=100*int(frame_number)) for frame_number in frame_numbers],
+            'keypoint_coordinates_3d': list(keypoints[frame_numbers])
+        },
+        index=pd.Index([uuid.uuid4().hex for _ in frame_numbers], name='pose_3d_id')
+    )
+
+@pytest.fixture
+def pose_tracking_3d_inference_id(tmp_path):
+    rng = np.random.default_rng(0)
+    pose_track_list = [
+        # Missing a keypoint for most of the track (so no pose is complete
+        # for long stretches), with leading and trailing missing keypoints
+        generate_pose_track(rng, START, 350, {0: (40, 300), 1: (0, 20), 2: (330, 350)}),
+        generate_pose_track(rng, START + datetime.timedelta(seconds=5), 120, {3: (10, 110)}),
+        generate_pose_track(rng, START + datetime.timedelta(seconds=21), 60, {}),
+        # A keypoint that is never seen
+        generate_pose_track(rng, START + datetime.timedelta(seconds=12), 90, {4: (0, 90)})
+    ]
+    poses_3d = pd.concat(pose_track_list).sort_values('timestamp')
+    pose_reconstruction_3d_inference_id = uuid.uuid4().hex
+    process_pose_data.local_io.write_data_local_by_time_segment(
+        data_object=poses_3d,
+        base_dir=str(tmp_path),
+        pipeline_stage='pose_reconstruction_3d',
+        environment_id=ENVIRONMENT_ID,
+        filename_stem='poses_3d',
+        inference_id=pose_reconstruction_3d_inference_id,
+        index_data_ids=True
+    )
+    pose_tracks_3d = {
+        uuid.uuid4().hex: {
+            'start': pose_track['timestamp'].min().to_pydatetime(),
+            'end': pose_track['timestamp'].max().to_pydatetime(),
+            'pose_3d_ids': pose_track.index.tolist()
+        }
+        for pose_track in pose_track_list
+    }
+    pose_tracking_3d_inference_id = uuid.uuid4().hex
+    process_pose_data.local_io.write_data_local(
+        data_object={'parameters': {
+            'start': poses_3d['timestamp'].min().to_pydatetime(),
+            'end': poses_3d['timestamp'].max().to_pydatetime(),
+            'pose_reconstruction_3d_inference_id': pose_reconstruction_3d_inference_id
+        }},
+        base_dir=str(tmp_path),
+        pipeline_stage='pose_tracking_3d',
+        environment_id=ENVIRONMENT_ID,
+        filename_stem='pose_tracking_3d_metadata',
+        inference_id=pose_tracking_3d_inference_id,
+        object_type='dict'
+    )
+    process_pose_data.local_io.write_data_local(
+        data_object=pose_tracks_3d,
+        base_dir=str(tmp_path),
+        pipeline_stage='pose_tracking_3d',
+        environment_id=ENVIRONMENT_ID,
+        filename_stem='pose_tracks_3d',
+        inference_id=pose_tracking_3d_inference_id,
+        object_type='dict'
+    )
+    return pose_tracking_3d_inference_id
+
+def fetch_interpolated_poses(base_dir, pose_track_3d_interpolation_inference_id):
+    # Returns the interpolated keypoints by pose track and timestamp
+    pose_tracks_3d = process_pose_data.local_io.fetch_data_local(
+        base_dir=base_dir,
+        pipeline_stage='pose_tracking_3d',
+        environment_id=ENVIRONMENT_ID,
+        filename_stem='pose_tracks_3d',
+        inference_ids=pose_track_3d_interpolation_inference_id,
+        object_type='dict'
+    )
+    poses_3d = pd.concat([
+        process_pose_data.local_io.fetch_data_local(
+            base_dir=base_dir,
+            pipeline_stage='pose_reconstruction_3d',
+            environment_id=ENVIRONMENT_ID,
+            filename_stem='poses_3d',
+            inference_ids=pose_track_3d_interpolation_inference_id,
+            time_segment_start=time_segment_start
+        )
+        for time_segment_start in process_pose_data.local_io.generate_time_segment_start_list(
+            start=START,
+            end=START + datetime.timedelta(seconds=40)
+        )
+    ])
+    interpolated_poses = dict()
+    for pose_track_3d_id, pose_track_3d in pose_tracks_3d.items():
+        poses_3d_track = poses_3d.loc[pose_track_3d['pose_3d_ids']].sort_values('timestamp')
+        interpolated_poses[pose_track_3d_id] = (
+            list(poses_3d_track['timestamp']),
+            np.stack(poses_3d_track['keypoint_coordinates_3d'])
+        )
+    return interpolated_poses
+
+def test_interpolate_by_time_segment_matches_by_pose_track(tmp_path, pose_tracking_3d_inference_id):
+    expected = fetch_interpolated_poses(
+        str(tmp_path),
+        process_pose_data.process.interpolate_pose_tracks_3d_local_by_pose_track(
+            base_dir=str(tmp_path),
+            environment_id=ENVIRONMENT_ID,
+            pose_tracking_3d_inference_id=pose_tracking_3d_inference_id
+        )
+    )
+    actual = fetch_interpolated_poses(
+        str(tmp_path),
+        process_pose_data.process.interpolate_pose_tracks_3d_local_by_time_segment(
+            base_dir=str(tmp_path),
+            environment_id=ENVIRONMENT_ID,
+            pose_tracking_3d_inference_id=pose_tracking_3d_inference_id
+        )
+    )
+    assert sorted(actual.keys()) == sorted(expected.keys())
+    for pose_track_3d_id, (expected_timestamps, expected_keypoints) in expected.items():
+        actual_timestamps, actual_keypoints = actual[pose_track_3d_id]
+        assert actual_timestamps == expected_timestamps
+        np.testing.assert_allclose(
+            actual_keypoints,
+            expected_keypoints,
+            rtol=0,
+            atol=1e-9
+        )
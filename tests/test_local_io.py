@@ -0,0 +1,364 @@
+import datetime
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('honeycomb_io')
+
+import process_pose_data.local_io
+import process_pose_data.shared_constants
+
+NUM_KEYPOINTS = 17
+TIME_SEGMENT_START = datetime.datetime(2023, 1, 1, 10, 0, 0, tzinfo=datetime.timezone.utc)
+
+@pytest.fixture
+def storage_kwargs(tmp_path):
+    return dict(
+        base_dir=str(tmp_path),
+        pipeline_stage='pose_extraction_2d',
+        environment_id='environment',
+        filename_stem='poses_2d'
+    )
+
+def generate_poses_2d(num_poses, time_segment_start=TIME_SEGMENT_START, seed=0):
+    rng = np.random.default_rng(seed)
+    keypoints = rng.uniform(0, 1280, (num_poses, NUM_KEYPOINTS, 2))
+    keypoints[rng.random((num_poses, NUM_KEYPOINTS)) < 0.1] = np.nan
+    return pd.DataFrame(
+        {
+            'timestamp': [
+                time_segment_start + datetime.timedelta(milliseconds=100*(pose_index % 100))
+                for pose_index in range(num_poses)
+            ],
+            'camera_id': rng.choice(['camera_a', 'camera_b', 'camera_c'], num_poses),
+            'keypoint_coordinates_2d': list(keypoints),
+            'pose_quality_2d': rng.uniform(0, 1, num_poses)
+        },
+        index=pd.Index([uuid.uuid4().hex for _ in range(num_poses)], name='pose_2d_id')
+    )
+
+def assert_poses_2d_equal(actual, expected, atol=0.0):
+    assert sorted(actual.index) == sorted(expected.index)
+    actual = actual.loc[expected.index]
+    assert list(actual['timestamp']) == list(expected['timestamp'])
+    assert list(np.asarray(actual['camera_id'], dtype='object')) == list(expected['camera_id'])
+    np.testing.assert_allclose(
+        np.stack(actual['keypoint_coordinates_2d']),
+        np.stack(expected['keypoint_coordinates_2d']),
+        rtol=0,
+        atol=atol
+    )
+    np.testing.assert_allclose(actual['pose_quality_2d'], expected['pose_quality_2d'])
+
+def test_append_and_compact_round_trip(storage_kwargs):
+    poses_2d = generate_poses_2d(30)
+    for poses_2d_part in [poses_2d.iloc[:10], poses_2d.iloc[10:20], poses_2d.iloc[20:]]:
+        process_pose_data.local_io.write_data_local(
+            data_object=poses_2d_part,
+            inference_id='inference',
+            time_segment_start=TIME_SEGMENT_START,
+            append=True,
+            **storage_kwargs
+        )
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        **storage_kwargs
+    )
+    assert_poses_2d_equal(fetched, poses_2d)
+    assert process_pose_data.local_io.compact_data_local(
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        sort_field='timestamp',
+        **storage_kwargs
+    )
+    directory_path, filename = process_pose_data.local_io.data_file_path(
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        **storage_kwargs
+    )
+    assert not os.path.exists(process_pose_data.local_io.data_parts_directory_path(
+        directory_path=directory_path,
+        filename=filename
+    ))
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        **storage_kwargs
+    )
+    assert_poses_2d_equal(fetched, poses_2d)
+    assert fetched['timestamp'].is_monotonic_increasing
+
+def test_columnar_round_trip(storage_kwargs):
+    poses_2d = generate_poses_2d(30)
+    process_pose_data.local_io.write_data_local(
+        data_object=poses_2d,
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type='columnar',
+        **storage_kwargs
+    )
+    directory_path, filename = process_pose_data.local_io.data_file_path(
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type='columnar',
+        **storage_kwargs
+    )
+    assert filename.endswith('.npz')
+    assert os.path.exists(os.path.join(directory_path, filename))
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type='columnar',
+        **storage_kwargs
+    )
+    assert_poses_2d_equal(fetched, poses_2d)
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type='columnar',
+        columns=['keypoint_coordinates_2d'],
+        **storage_kwargs
+    )
+    assert list(fetched.columns) == ['keypoint_coordinates_2d']
+    arrays = process_pose_data.local_io.fetch_columnar_arrays_local(
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        columns=['keypoint_coordinates_2d'],
+        **storage_kwargs
+    )
+    assert list(arrays.keys()) == ['__index__', 'keypoint_coordinates_2d']
+    assert list(arrays['__index__']) == list(poses_2d.index)
+    np.testing.assert_array_equal(
+        arrays['keypoint_coordinates_2d'],
+        np.stack(poses_2d['keypoint_coordinates_2d'])
+    )
+
+def test_pack_round_trip(storage_kwargs):
+    time_segment_starts = [
+        TIME_SEGMENT_START + datetime.timedelta(seconds=10*time_segment_index)
+        for time_segment_index in range(3)
+    ]
+    poses_2d_list = [
+        generate_poses_2d(20, time_segment_start=time_segment_start, seed=time_segment_index)
+        for time_segment_index, time_segment_start in enumerate(time_segment_starts)
+    ]
+    for time_segment_start, poses_2d in zip(time_segment_starts, poses_2d_list):
+        process_pose_data.local_io.write_data_local(
+            data_object=poses_2d,
+            inference_id='inference',
+            time_segment_start=time_segment_start,
+            **storage_kwargs
+        )
+    try:
+        num_packed_segments = process_pose_data.local_io.pack_time_segments_local(
+            period_start=TIME_SEGMENT_START,
+            inference_id='inference',
+            **storage_kwargs
+        )
+        assert num_packed_segments == 3
+        for time_segment_start, poses_2d in zip(time_segment_starts, poses_2d_list):
+            directory_path, filename = process_pose_data.local_io.data_file_path(
+                inference_id='inference',
+                time_segment_start=time_segment_start,
+                **storage_kwargs
+            )
+            assert not os.path.exists(os.path.join(directory_path, filename))
+            fetched = process_pose_data.local_io.fetch_data_local(
+                inference_ids='inference',
+                time_segment_start=time_segment_start,
+                **storage_kwargs
+            )
+            assert_poses_2d_equal(fetched, poses_2d)
+        fetched = process_pose_data.local_io.fetch_data_local(
+            inference_ids='inference',
+            time_segment_start=TIME_SEGMENT_START + datetime.timedelta(seconds=30),
+            **storage_kwargs
+        )
+        assert len(fetched) == 0
+    finally:
+        process_pose_data.local_io.close_pack_files()
+
+@pytest.fixture
+def segment_cache():
+    process_pose_data.local_io.enable_segment_cache()
+    yield
+    process_pose_data.local_io.disable_segment_cache()
+
+def test_write_invalidates_segment_cache(storage_kwargs, segment_cache):
+    poses_2d = generate_poses_2d(20)
+    process_pose_data.local_io.write_data_local(
+        data_object=poses_2d,
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        **storage_kwargs
+    )
+    for _ in range(2):
+        fetched = process_pose_data.local_io.fetch_data_local(
+            inference_ids='inference',
+            time_segment_start=TIME_SEGMENT_START,
+            **storage_kwargs
+        )
+        assert_poses_2d_equal(fetched, poses_2d)
+    stats = process_pose_data.local_io.fetch_segment_cache_stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['num_entries'] == 1
+    # Rewrite the segment with data of the same shape (so the file size can't
+    # tell the versions apart) and then append to it
+    new_poses_2d = generate_poses_2d(20, seed=1)
+    process_pose_data.local_io.write_data_local(
+        data_object=new_poses_2d,
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        **storage_kwargs
+    )
+    assert process_pose_data.local_io.fetch_segment_cache_stats()['num_entries'] == 0
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        **storage_kwargs
+    )
+    assert_poses_2d_equal(fetched, new_poses_2d)
+    appended_poses_2d = generate_poses_2d(5, seed=2)
+    process_pose_data.local_io.write_data_local(
+        data_object=appended_poses_2d,
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        append=True,
+        **storage_kwargs
+    )
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        **storage_kwargs
+    )
+    assert_poses_2d_equal(fetched, pd.concat([new_poses_2d, appended_poses_2d]))
+
+@pytest.mark.parametrize('object_type', ['dataframe', 'columnar'])
+@pytest.mark.parametrize('codec', process_pose_data.shared_constants.SUPPORTED_STORAGE_CODECS)
+def test_codec_round_trip(storage_kwargs, codec, object_type):
+    if codec == 'zstd' and process_pose_data.local_io.zstandard is None:
+        pytest.skip('zstandard is not installed')
+    if codec == 'lz4' and process_pose_data.local_io.lz4 is None:
+        pytest.skip('lz4 is not installed')
+    poses_2d = generate_poses_2d(30)
+    for poses_2d_part in [poses_2d.iloc[:20], poses_2d.iloc[20:]]:
+        process_pose_data.local_io.write_data_local(
+            data_object=poses_2d_part,
+            inference_id='inference',
+            time_segment_start=TIME_SEGMENT_START,
+            object_type=object_type,
+            append=True,
+            codec=codec,
+            **storage_kwargs
+        )
+    process_pose_data.local_io.compact_data_local(
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        **storage_kwargs
+    )
+    directory_path, filename = process_pose_data.local_io.data_file_path(
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type=object_type,
+        **storage_kwargs
+    )
+    assert process_pose_data.local_io.detect_file_codec(os.path.join(directory_path, filename)) == codec
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type=object_type,
+        **storage_kwargs
+    )
+    assert_poses_2d_equal(fetched, poses_2d)
+
+@pytest.mark.parametrize('object_type,keypoint_dtype', [
+    ('dataframe', 'float32'),
+    ('columnar', 'float32'),
+    ('columnar', 'int16')
+])
+def test_keypoint_dtype_round_trip(storage_kwargs, object_type, keypoint_dtype, caplog):
+    poses_2d = generate_poses_2d(30)
+    keypoints = np.stack(poses_2d['keypoint_coordinates_2d'])
+    # Coordinates beyond the int16 range at the default quantization scale
+    keypoints[3, 2] = [5000.3, -4100.7]
+    poses_2d['keypoint_coordinates_2d'] = list(keypoints)
+    process_pose_data.local_io.write_data_local(
+        data_object=poses_2d,
+        inference_id='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type=object_type,
+        keypoint_dtype=keypoint_dtype,
+        **storage_kwargs
+    )
+    if keypoint_dtype == 'int16':
+        assert 'exceed the int16 range' in caplog.text
+        # Within one step of the reduced quantization scale
+        atol = 5000.3/np.iinfo('int16').max
+    else:
+        atol = 1e-3
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type=object_type,
+        **storage_kwargs
+    )
+    assert fetched['keypoint_coordinates_2d'].iloc[0].dtype == 'float64'
+    fetched_keypoints = np.stack(fetched.loc[poses_2d.index, 'keypoint_coordinates_2d'])
+    np.testing.assert_array_equal(np.isnan(fetched_keypoints), np.isnan(keypoints))
+    assert_poses_2d_equal(fetched, poses_2d, atol=atol)
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type=object_type,
+        keypoint_dtype=None,
+        **storage_kwargs
+    )
+    assert fetched['keypoint_coordinates_2d'].iloc[0].dtype == 'float32'
+
+def test_quantized_keypoints_require_columnar_storage(storage_kwargs):
+    with pytest.raises(ValueError):
+        process_pose_data.local_io.write_data_local(
+            data_object=generate_poses_2d(10),
+            inference_id='inference',
+            time_segment_start=TIME_SEGMENT_START,
+            keypoint_dtype='int16',
+            **storage_kwargs
+        )
+
+@pytest.mark.parametrize('object_type', ['dataframe', 'columnar'])
+def test_encoded_id_round_trip(storage_kwargs, object_type):
+    poses_2d_list = [generate_poses_2d(20, seed=seed) for seed in range(2)]
+    # Give the inference runs different sets of camera IDs, so that their
+    # categories don't match
+    poses_2d_list[1]['camera_id'] = poses_2d_list[1]['camera_id'].str.replace('camera', 'other_camera')
+    for inference_id, poses_2d in zip(['inference_a', 'inference_b'], poses_2d_list):
+        process_pose_data.local_io.write_data_local(
+            data_object=poses_2d,
+            inference_id=inference_id,
+            time_segment_start=TIME_SEGMENT_START,
+            object_type=object_type,
+            encode_ids=True,
+            **storage_kwargs
+        )
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids='inference_a',
+        time_segment_start=TIME_SEGMENT_START,
+        object_type=object_type,
+        **storage_kwargs
+    )
+    assert isinstance(fetched['camera_id'].dtype, pd.CategoricalDtype)
+    assert_poses_2d_equal(fetched, poses_2d_list[0])
+    fetched = process_pose_data.local_io.fetch_data_local(
+        inference_ids=['inference_a', 'inference_b'],
+        time_segment_start=TIME_SEGMENT_START,
+        object_type=object_type,
+        **storage_kwargs
+    )
+    decoded = process_pose_data.local_io.decode_id_columns(fetched)
+    assert not isinstance(decoded['camera_id'].dtype, pd.CategoricalDtype)
+    assert_poses_2d_equal(decoded, pd.concat(poses_2d_list))
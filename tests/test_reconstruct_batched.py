@@ -0,0 +1,154 @@
+import datetime
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# poseconnect's reference reconstruction fails under pandas 3 (its grouped
+# apply drops the camera ID columns), hence the pandas<3 pin in setup.py
+poseconnect_reconstruct = pytest.importorskip('poseconnect.reconstruct')
+cv = pytest.importorskip('cv2')
+pytest.importorskip('cv_utils')
+
+import process_pose_data.reconstruct
+
+NUM_KEYPOINTS = 17
+MAX_POSE_PAIR_SCORES = {
+    'pixels': 25.0,
+    'image_frac': 0.02,
+    '3d': 0.1
+}
+
+def camera_calibration_looking_at(position, target):
+    z_axis = target - position
+    z_axis /= np.linalg.norm(z_axis)
+    x_axis = np.cross(z_axis, [0.0, 0.0, 1.0])
+    x_axis /= np.linalg.norm(x_axis)
+    y_axis = np.cross(z_axis, x_axis)
+    rotation_matrix = np.stack([x_axis, y_axis, z_axis])
+    rotation_vector = cv.Rodrigues(rotation_matrix)[0].ravel()
+    translation_vector = -rotation_matrix @ position
+    return {
+        'camera_matrix': [[800.0, 0.0, 640.0], [0.0, 800.0, 360.0], [0.0, 0.0, 1.0]],
+        'distortion_coefficients': [-0.1, 0.02, 0.001, 0.0005, 0.0],
+        'rotation_vector': rotation_vector.tolist(),
+        'translation_vector': translation_vector.tolist(),
+        'image_width': 1280,
+        'image_height': 720
+    }
+
+@pytest.fixture(scope='module')
+def scene():
+    # Four people seen by five cameras around a 6m x 5m room (plus one camera
+    # facing away from it) over eight frames, with keypoint noise, missing
+    # keypoints, and one spurious pose per camera per frame
+    rng = np.random.default_rng(0)
+    room_target = np.array([3.0, 2.5, 1.0])
+    camera_calibrations = dict()
+    for camera_index, position in enumerate([[0, 0, 2.5], [6, 0, 2.5], [6, 5, 2.5], [0, 5, 2.5], [3, -1, 2.8]]):
+        camera_calibrations['camera_{}'.format(camera_index)] = camera_calibration_looking_at(
+            np.array(position, dtype='float'),
+            room_target
+        )
+    camera_calibrations['camera_away'] = camera_calibration_looking_at(
+        np.array([3.0, -1.0, 2.5]),
+        np.array([3.0, -10.0, 1.0])
+    )
+    body = np.stack([
+        np.r_[rng.uniform(-0.2, 0.2, 2), z]
+        for z in np.linspace(1.7, 0.05, NUM_KEYPOINTS)
+    ])
+    start = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+    rows = list()
+    for frame_index in range(8):
+        timestamp = start + datetime.timedelta(milliseconds=100*frame_index)
+        positions = [np.array([x, y, 0.0]) for x, y in rng.uniform([0.5, 0.5], [5.5, 4.5], size=(4, 2))]
+        for camera_id in rng.permutation(list(camera_calibrations.keys())):
+            camera_calibration = camera_calibrations[camera_id]
+            for position in positions:
+                if camera_id == 'camera_away':
+                    keypoints = rng.uniform(0, 1000, (NUM_KEYPOINTS, 2))
+                else:
+                    keypoints = cv.projectPoints(
+                        body + position,
+                        np.array(camera_calibration['rotation_vector']),
+                        np.array(camera_calibration['translation_vector']),
+                        np.array(camera_calibration['camera_matrix']),
+                        np.array(camera_calibration['distortion_coefficients'])
+                    )[0].reshape(NUM_KEYPOINTS, 2)
+                    keypoints += rng.normal(0, 1.5, keypoints.shape)
+                keypoints[rng.random(NUM_KEYPOINTS) < 0.1] = np.nan
+                rows.append({
+                    'pose_2d_id': uuid.uuid4().hex,
+                    'timestamp': timestamp,
+                    'camera_id': camera_id,
+                    'keypoint_coordinates_2d': keypoints,
+                    'keypoint_quality_2d': rng.uniform(0.0, 1.0, NUM_KEYPOINTS),
+                    'pose_quality_2d': rng.uniform(0.2, 1.0)
+                })
+            rows.append({
+                'pose_2d_id': uuid.uuid4().hex,
+                'timestamp': timestamp,
+                'camera_id': camera_id,
+                'keypoint_coordinates_2d': rng.uniform(0, 1280, (NUM_KEYPOINTS, 2)),
+                'keypoint_quality_2d': rng.uniform(0.0, 1.0, NUM_KEYPOINTS),
+                'pose_quality_2d': 0.5
+            })
+    poses_2d = pd.DataFrame(rows).set_index('pose_2d_id')
+    pose_3d_limits = poseconnect_reconstruct.pose_3d_limits_by_pose_model(
+        room_x_limits=[0, 6],
+        room_y_limits=[0, 5],
+        pose_model_name='COCO-17'
+    )
+    return poses_2d, camera_calibrations, pose_3d_limits
+
+def canonical_poses_3d(poses_3d):
+    # 3D pose IDs are random, so poses are matched by timestamp and the 2D
+    # poses they were built from
+    return sorted(
+        [
+            (row['timestamp'], tuple(sorted(row['pose_2d_ids'])), row['keypoint_coordinates_3d'])
+            for _, row in poses_3d.iterrows()
+        ],
+        key=lambda pose: (pose[0], pose[1])
+    )
+
+@pytest.mark.parametrize('pose_pair_prefilter', [True, False])
+@pytest.mark.parametrize('pose_pair_score_distance_method', ['pixels', 'image_frac', '3d'])
+def test_reconstruct_poses_3d_batched_matches_poseconnect(
+    scene,
+    pose_pair_score_distance_method,
+    pose_pair_prefilter
+):
+    poses_2d, camera_calibrations, pose_3d_limits = scene
+    reconstruction_kwargs = dict(
+        pose_3d_limits=pose_3d_limits,
+        pose_pair_score_distance_method=pose_pair_score_distance_method,
+        max_pose_pair_score=MAX_POSE_PAIR_SCORES[pose_pair_score_distance_method]
+    )
+    expected = poseconnect_reconstruct.reconstruct_poses_3d(
+        poses_2d,
+        camera_calibrations,
+        **reconstruction_kwargs
+    )
+    actual = process_pose_data.reconstruct.reconstruct_poses_3d_batched(
+        poses_2d,
+        camera_calibrations,
+        pose_pair_prefilter=pose_pair_prefilter,
+        batch_size=97,
+        **reconstruction_kwargs
+    )
+    assert len(expected) > 0
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.index.name == expected.index.name
+    expected_poses = canonical_poses_3d(expected)
+    actual_poses = canonical_poses_3d(actual)
+    assert [pose[:2] for pose in actual_poses] == [pose[:2] for pose in expected_poses]
+    for actual_pose, expected_pose in zip(actual_poses, expected_poses):
+        np.testing.assert_allclose(
+            actual_pose[2],
+            expected_pose[2],
+            rtol=0,
+            atol=1e-6
+        )